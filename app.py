@@ -1,5 +1,5 @@
 import os
-from datetime import datetime, timedelta
+from datetime import datetime
 from datetime import timezone as dt_timezone
 from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 from flask import template_rendered, current_app, request, g
@@ -9,8 +9,24 @@ from flask_login import LoginManager, current_user
 from flask_migrate import Migrate
 from flask.signals import before_render_template
 import ipaddress
+import click
 # DB a modely
-from models import db, Pouzivatel, Mesto  # db je tu inicializované až nižšie
+from models import db, Pouzivatel  # db je tu inicializované až nižšie
+from utils.mesta_cache import get_mesta, get_mesto
+from utils.images import picture, image_url
+from utils.unread import unread_counts, reconcile_unread
+from utils.fulltext import rebuild_people_index, rebuild_forum_index
+from utils.search_keys import backfill_keys
+from utils.blobs import collect_garbage, reconcile_blobs, blob_stats
+from modules.housekeep import parse_intervals, start_housekeep_thread
+from modules.image_jobs import start_image_thread
+from modules.outbox import start_outbox_thread
+from utils.perf import init_perf
+from utils.nplusone import init_nplusone
+from utils.uploads import init_uploads
+from utils.storage import init_storage
+from utils.db_engine import init_sqlite, sqlite_readonly_uri, READONLY_BIND
+from utils.db_engine import normalize_database_uri, engine_options
 
 # Feature helpers (používaš v šablónach)
 from features import has_feature, get_quota, user_plan
@@ -33,6 +49,7 @@ GATE_ENABLED = os.getenv("GATE_ENABLED", "1") == "1"
 
 # cesty voľné pre všetkých (healthcheck, stránka s kódom, robots, statika)
 OPEN_PATHS = {"/healthz", "/access", "/robots.txt"}
+OPEN_PREFIXES = ("/static/", "/media/")  # prístup k súborom kontroluje modules/media.py
 
 def _safe_ip(ip: str) -> str:
     try:
@@ -103,7 +120,7 @@ def gatekeeper():
         return  # gate je vypnutý
 
     p = request.path
-    if p in OPEN_PATHS or p.startswith("/static/"):
+    if p in OPEN_PATHS or p.startswith(OPEN_PREFIXES):
         return
 
     # voľný vstup pre teba podľa IP
@@ -134,12 +151,80 @@ os.makedirs(os.path.join(basedir, "instance"), exist_ok=True)
 
 # SQLite databáza v instance/
 db_path = os.path.join(basedir, "instance", "muzikuj.db").replace("\\", "/")
-app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite:///" + db_path
+# DATABASE_URL: iná DB (MySQL/PostgreSQL na produkcii, syntetická DB pre benchmark);
+# bez nej SQLite v instance/. Pool: DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_PRE_PING,
+# DB_POOL_RECYCLE, DB_POOL_TIMEOUT.
+app.config["SQLALCHEMY_DATABASE_URI"] = normalize_database_uri(
+    os.getenv("DATABASE_URL") or ("sqlite:///" + db_path)
+)
+app.config["SQLALCHEMY_ENGINE_OPTIONS"] = engine_options(app.config["SQLALCHEMY_DATABASE_URI"], os.environ)
 app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
 
-# Upload cesty
-app.config["UPLOAD_FOLDER"] = os.path.join(app.root_path, "static", "profilovky")
-app.config["UPLOAD_FOLDER_INZERAT"] = os.path.join(app.root_path, "static", "galeria_inzerat")
+# SQLite profil (utils/db_engine.py): WAL, synchronous=NORMAL, busy_timeout, mmap, cache, temp_store
+app.config["SQLITE_TUNING"] = os.getenv("SQLITE_TUNING", "1") == "1"
+app.config["SQLITE_BUSY_TIMEOUT_MS"] = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+app.config["SQLITE_MMAP_SIZE"] = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+app.config["SQLITE_CACHE_SIZE_KB"] = int(os.getenv("SQLITE_CACHE_SIZE_KB", str(64 * 1024)))
+# GET/HEAD čítajú cez samostatný read-only engine (mode=ro)
+app.config["SQLITE_READONLY_ENGINE"] = os.getenv("SQLITE_READONLY_ENGINE", "0") == "1"
+if app.config["SQLITE_READONLY_ENGINE"]:
+    _ro_uri = sqlite_readonly_uri(app.config["SQLALCHEMY_DATABASE_URI"])
+    if _ro_uri:
+        app.config["SQLALCHEMY_BINDS"] = {READONLY_BIND: _ro_uri}
+
+# cache zoznamu miest – ako často overiť zmeny z iného procesu (s)
+app.config["MESTA_CACHE_CHECK_SECONDS"] = int(os.getenv("MESTA_CACHE_CHECK_SECONDS", "60"))
+
+# periodické úlohy (modules/housekeep.py)
+# HOUSEKEEP_MODE: thread = vlákno vo workeri (default), cli = beží `flask housekeep`, off = nič
+app.config["HOUSEKEEP_MODE"] = os.getenv("HOUSEKEEP_MODE", "thread").strip().lower()
+app.config["HOUSEKEEP_POLL_SECONDS"] = int(os.getenv("HOUSEKEEP_POLL_SECONDS", "30"))
+app.config["HOUSEKEEP_LEASE_SECONDS"] = int(os.getenv("HOUSEKEEP_LEASE_SECONDS", "900"))
+# napr. "erase_due=3600,dopyty_expired=300" (sekundy)
+app.config["HOUSEKEEP_INTERVALS"] = parse_intervals(os.getenv("HOUSEKEEP_INTERVALS", ""))
+
+# meranie requestov (utils/perf.py): Server-Timing, /admin/perf, voliteľný JSON log
+app.config["PERF_ENABLED"] = os.getenv("PERF_ENABLED", "1") == "1"
+app.config["PERF_SERVER_TIMING"] = os.getenv("PERF_SERVER_TIMING", "1") == "1"
+app.config["PERF_LOG_JSON"] = os.getenv("PERF_LOG_JSON", "0") == "1"
+app.config["PERF_WINDOW"] = int(os.getenv("PERF_WINDOW", "500"))  # posledných N meraní na endpoint
+# N+1 detektor (utils/nplusone.py); NPLUSONE_RAISE nenastavené => raise len pri app.testing
+app.config["NPLUSONE_ENABLED"] = os.getenv("NPLUSONE_ENABLED", "1") == "1"
+app.config["NPLUSONE_THRESHOLD"] = int(os.getenv("NPLUSONE_THRESHOLD", "10"))
+if os.getenv("NPLUSONE_RAISE"):
+    app.config["NPLUSONE_RAISE"] = os.getenv("NPLUSONE_RAISE") == "1"
+
+# úložisko uploadov (utils/storage.py): local = static/ na tomto serveri, s3 = S3/MinIO (potrebuje boto3)
+# STORAGE_PUBLIC_URL = CDN pred úložiskom (URL fotiek = <CDN>/<kľúč>)
+app.config["STORAGE_BACKEND"] = os.getenv("STORAGE_BACKEND", "local").strip().lower()
+app.config["STORAGE_PUBLIC_URL"] = os.getenv("STORAGE_PUBLIC_URL") or None
+if os.getenv("STORAGE_LOCAL_ROOT"):  # inak static/ aplikácie (utils/storage.init_storage)
+    app.config["STORAGE_LOCAL_ROOT"] = os.getenv("STORAGE_LOCAL_ROOT")
+app.config["S3_BUCKET"] = os.getenv("S3_BUCKET")
+app.config["S3_ENDPOINT_URL"] = os.getenv("S3_ENDPOINT_URL") or None   # MinIO: http://127.0.0.1:9000
+app.config["S3_REGION"] = os.getenv("S3_REGION") or None
+app.config["S3_ACCESS_KEY_ID"] = os.getenv("S3_ACCESS_KEY_ID") or None  # inak štandardné AWS_* / IAM rola
+app.config["S3_SECRET_ACCESS_KEY"] = os.getenv("S3_SECRET_ACCESS_KEY") or None
+# servovanie lokálnych uploadov (modules/media.py): static | flask | x-accel (nginx) | x-sendfile
+app.config["UPLOAD_SERVE_MODE"] = os.getenv("UPLOAD_SERVE_MODE", "static").strip().lower()
+app.config["UPLOAD_ACCEL_PREFIX"] = os.getenv("UPLOAD_ACCEL_PREFIX", "/_uploads")  # internal location v nginx
+app.config["UPLOAD_CACHE_SECONDS"] = int(os.getenv("UPLOAD_CACHE_SECONDS", "3600"))  # súbory bez hashu v názve
+# ZIP export galérií (utils/gallery_zip.py): vlákna na čítanie z úložiska, koľko súborov načítať dopredu
+app.config["GALLERY_ZIP_WORKERS"] = int(os.getenv("GALLERY_ZIP_WORKERS", "4"))
+app.config["GALLERY_ZIP_PREFETCH"] = int(os.getenv("GALLERY_ZIP_PREFETCH", "8"))
+
+# limity uploadov (utils/uploads.py): celý request / galérie s viacerými fotkami / jeden súbor
+_MB = 1024 * 1024
+app.config["MAX_CONTENT_LENGTH"] = int(os.getenv("UPLOAD_MAX_REQUEST_MB", "16")) * _MB
+app.config["UPLOAD_GALLERY_MAX_BYTES"] = int(os.getenv("UPLOAD_GALLERY_MAX_MB", "160")) * _MB
+app.config["UPLOAD_MAX_FILE_BYTES"] = int(os.getenv("UPLOAD_MAX_FILE_MB", "12")) * _MB
+
+# fronta spracovania fotiek z galérií (modules/image_jobs.py)
+# IMAGE_QUEUE_MODE: thread = vlákno + process pool vo workeri (default), cli = `flask images-worker`, inline = v requeste
+app.config["IMAGE_QUEUE_MODE"] = os.getenv("IMAGE_QUEUE_MODE", "thread").strip().lower()
+app.config["IMAGE_WORKER_PROCESSES"] = int(os.getenv("IMAGE_WORKER_PROCESSES", "2"))
+app.config["IMAGE_WORKER_POLL_SECONDS"] = float(os.getenv("IMAGE_WORKER_POLL_SECONDS", "2"))
+app.config["IMAGE_INCOMING_DIR"] = os.getenv("IMAGE_INCOMING_DIR") or os.path.join(app.instance_path, "uploads_incoming")
 
 # SMTP (vieš prepísať env premennými)
 app.config.update(
@@ -148,13 +233,40 @@ app.config.update(
     SMTP_USERNAME=os.environ.get("SMTP_USERNAME"),
     SMTP_PASSWORD=os.environ.get("SMTP_PASSWORD"),
     SMTP_SENDER=os.environ.get("SMTP_SENDER", "noreply@muzikuj.sk"),
+    SMTP_STARTTLS=os.environ.get("SMTP_STARTTLS", "1") == "1",
+    SMTP_AUTH=os.environ.get("SMTP_AUTH", "1") == "1",       # 0 = bez loginu (lokálny relay / sink)
+    SMTP_TIMEOUT=float(os.environ.get("SMTP_TIMEOUT", "30")),
 )
+# odchádzajúce e-maily (modules/outbox.py)
+# OUTBOX_MODE: thread = vlákno vo workeri (default), cli = `flask outbox-worker`
+app.config["OUTBOX_MODE"] = os.getenv("OUTBOX_MODE", "thread").strip().lower()
+app.config["OUTBOX_SMTP_CONNECTIONS"] = int(os.getenv("OUTBOX_SMTP_CONNECTIONS", "2"))
+app.config["OUTBOX_SMTP_IDLE_SECONDS"] = float(os.getenv("OUTBOX_SMTP_IDLE_SECONDS", "60"))
+app.config["OUTBOX_SMTP_MAX_PER_CONNECTION"] = int(os.getenv("OUTBOX_SMTP_MAX_PER_CONNECTION", "100"))
+app.config["OUTBOX_BATCH"] = int(os.getenv("OUTBOX_BATCH", "50"))
+app.config["OUTBOX_POLL_SECONDS"] = float(os.getenv("OUTBOX_POLL_SECONDS", "5"))
+app.config["OUTBOX_MAX_ATTEMPTS"] = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "8"))
+app.config["OUTBOX_BACKOFF_SECONDS"] = int(os.getenv("OUTBOX_BACKOFF_SECONDS", "60"))
+# e-mailové súhrny fóra (modules/forum_digest.py, housekeep úloha forum_digest)
+app.config["SITE_URL"] = os.getenv("SITE_URL", "https://muzikuj.sk")   # odkazy v e-mailoch mimo requestu
+app.config["FORUM_DIGEST_DEFAULT"] = os.getenv("FORUM_DIGEST_DEFAULT", "daily")   # off | hourly | daily
+app.config["FORUM_DIGEST_SETTLE_SECONDS"] = int(os.getenv("FORUM_DIGEST_SETTLE_SECONDS", "600"))
+app.config["FORUM_DIGEST_MAX_AGE_DAYS"] = int(os.getenv("FORUM_DIGEST_MAX_AGE_DAYS", "7"))
+# zoznam / vyhľadávanie vo fóre (utils/fulltext.py)
+app.config["FORUM_PAGE_SIZE"] = int(os.getenv("FORUM_PAGE_SIZE", "50"))
+app.config["FORUM_SEARCH_HALF_LIFE_DAYS"] = float(os.getenv("FORUM_SEARCH_HALF_LIFE_DAYS", "30"))
+app.config["FORUM_SEARCH_MAX_HITS"] = int(os.getenv("FORUM_SEARCH_MAX_HITS", "1000"))
 
 # -----------------------------
 # DB / MIGRÁCIE / LOGIN
 # -----------------------------
+init_sqlite(app)
 db.init_app(app)
 migrate = Migrate(app, db)
+init_perf(app)
+init_nplusone(app)
+init_uploads(app)
+init_storage(app)
 
 login_manager = LoginManager()
 login_manager.init_app(app)
@@ -203,12 +315,16 @@ def jinja_localtime(value, fmt="%d.%m.%Y %H:%M"):
 # -----------------------------
 @app.context_processor
 def inject_mesta_all():
-    # pri prvom spustení/migráciách môže tabuľka ešte neexistovať
-    try:
-        mesta = Mesto.query.order_by(Mesto.nazov.asc()).all()
-    except Exception:
-        mesta = []
-    return dict(mesta_all=mesta)
+    # procesová cache (utils/mesta_cache.py); pri migráciách vráti prázdny zoznam.
+    # Formuláre už mestá nevypisujú – pole s našepkávačom (includes/mesto_input.html)
+    # ťahá návrhy z /api/mesta/suggest; mesto_podla_id slúži na predvyplnenie.
+    return dict(mesta_all=get_mesta())
+
+
+app.add_template_global(get_mesto, "mesto_podla_id")
+# obrázky vo veľkostiach (utils/images.py): picture(...) → <picture> so srcset, img_url(...) → jedna URL
+app.add_template_global(picture, "picture")
+app.add_template_global(image_url, "img_url")
 
 
 @app.context_processor
@@ -222,34 +338,13 @@ def inject_features():
 
 @app.context_processor
 def inject_header_badges():
+    # počítadlá sú priamo na používateľovi (utils/unread.py) → žiadny COUNT na request
     data = {"neprecitane_count": 0, "neprecitane_forum_count": 0}
     try:
         if current_user.is_authenticated:
-            # SPRÁVY
-            try:
-                from models import Sprava
-
-                data["neprecitane_count"] = (
-                    Sprava.query.filter_by(
-                        komu_id=current_user.id,
-                        precitane=False,
-                        deleted_by_recipient=False,
-                    ).count()
-                )
-            except Exception:
-                pass
-
-            # FÓRUM
-            try:
-                from models import ForumNotification
-
-                data["neprecitane_forum_count"] = (
-                    ForumNotification.query.filter_by(
-                        user_id=current_user.id, read_at=None
-                    ).count()
-                )
-            except Exception:
-                pass
+            spravy, forum = unread_counts(current_user)
+            data["neprecitane_count"] = spravy
+            data["neprecitane_forum_count"] = forum
     except Exception:
         pass
     return data
@@ -261,32 +356,26 @@ def inject_dev_flags():
 # -----------------------------
 # BEFORE REQUEST HOOKY
 # -----------------------------
-_last_housekeep = None
-_HOUSEKEEP_INTERVAL = timedelta(minutes=10)
+@app.before_request
+def start_housekeep():
+    # úlohy bežia mimo requestu; tu len (raz na worker) naštartujeme vlákno
+    if app.config.get("HOUSEKEEP_MODE") != "thread":
+        return
+    start_housekeep_thread(app)
 
 
 @app.before_request
-def global_housekeep():
-    global _last_housekeep
-    now = datetime.utcnow()
-    if _last_housekeep and (now - _last_housekeep) < _HOUSEKEEP_INTERVAL:
+def start_image_worker():
+    if app.config.get("IMAGE_QUEUE_MODE") != "thread":
         return
-    try:
-        from modules.dopyty import _housekeep_expired
-        _housekeep_expired()
-
-        from modules.komunita import _housekeep_rychle_dopyty
-        _housekeep_rychle_dopyty()
+    start_image_thread(app)
 
-        # ⇩⇩ sem to patrí
-        from modules.erase_job import run_erase_due
-        cnt = run_erase_due()
-        if cnt:
-            app.logger.info("Anonymized %s users due to erase deadline", cnt)
 
-        _last_housekeep = now
-    except Exception as e:
-        app.logger.debug(f"Housekeep skipped: {e}")
+@app.before_request
+def start_outbox_worker():
+    if app.config.get("OUTBOX_MODE") != "thread":
+        return
+    start_outbox_thread(app)
 
 def run_erase_expired():
     from datetime import datetime
@@ -350,7 +439,8 @@ from modules.podujatie import podujatie_bp
 from modules.reklama import reklama_bp
 from modules.nastavenia import nastavenia_bp
 from modules.ratings import ratings_bp
-from modules.erase_job import run_erase_due
+from modules.mesta import mesta_bp
+from modules.media import init_media
 from routes import bp as main_blueprint
 
 app.register_blueprint(uzivatel)
@@ -371,6 +461,181 @@ app.register_blueprint(podujatie_bp)
 app.register_blueprint(reklama_bp)
 app.register_blueprint(nastavenia_bp)
 app.register_blueprint(ratings_bp)
+app.register_blueprint(mesta_bp)
+init_media(app)
+
+
+# -----------------------------
+# CLI
+# -----------------------------
+@app.cli.command("unread-reconcile")
+@click.option("--user-id", type=int, default=None, help="Len pre jedného používateľa.")
+def unread_reconcile_cmd(user_id):
+    """Prepočíta počítadlá neprečítaných správ/notifikácií zo zdrojových tabuliek."""
+    changed = reconcile_unread(user_id)
+    click.echo(f"Opravené počítadlá: {changed}")
+
+
+@app.cli.command("search-reindex")
+def search_reindex_cmd():
+    """Prebuduje fulltextové indexy (pouzivatel_fts, forum_fts) a hľadacie kľúče (*_key)."""
+    click.echo(f"Opravené hľadacie kľúče: {backfill_keys()}")
+    for label, rebuild in (("Používatelia", rebuild_people_index), ("Fórum (témy + odpovede)", rebuild_forum_index)):
+        n = rebuild()
+        click.echo(f"{label}: {n}" if n else f"{label}: FTS5 index nie je k dispozícii (iná DB / bez migrácie).")
+
+
+@app.cli.command("housekeep")
+@click.option("--once", is_flag=True, help="Jeden prechod (napr. z cronu) a koniec.")
+@click.option("--job", "jobs", multiple=True, help="Len vybrané úlohy (dá sa opakovať).")
+@click.option("--force", is_flag=True, help="Spusti hneď, aj keď úloha ešte nie je na rade.")
+@click.option("--status", is_flag=True, help="Vypíš posledné behy a metriky.")
+def housekeep_cmd(once, jobs, force, status):
+    """Periodické úlohy mimo requestov (použi s HOUSEKEEP_MODE=cli)."""
+    import time
+    from modules.housekeep import run_due_jobs, seconds_until_next, job_status
+
+    if status:
+        for j in job_status():
+            avg = (j.total_ms / j.run_count) if j.run_count else 0
+            click.echo(f"{j.name:16} every {j.interval_s}s  next={j.next_run_at}  "
+                       f"last={j.last_finished_at} ok={j.last_ok} result={j.last_result} "
+                       f"{j.last_duration_ms}ms  runs={j.run_count} fails={j.fail_count} "
+                       f"avg={avg:.0f}ms max={j.max_ms}ms"
+                       + (f"  lease={j.lease_owner}" if j.lease_owner else ""))
+            if j.last_error:
+                click.echo(f"{'':16} error: {j.last_error}")
+        return
+
+    poll = app.config["HOUSEKEEP_POLL_SECONDS"]
+    while True:
+        for name, (ok, ms) in run_due_jobs(only=set(jobs), force=force).items():
+            click.echo(f"{datetime.utcnow():%Y-%m-%d %H:%M:%S} {name}: {'ok' if ok else 'FAIL'} {ms}ms")
+        if once:
+            break
+        force = False  # --force platí len pre prvý prechod
+        wait = seconds_until_next(poll)
+        db.session.remove()
+        time.sleep(wait)
+
+
+@app.cli.command("images-worker")
+@click.option("--once", is_flag=True, help="Spracuj, čo je vo fronte, a skonči.")
+@click.option("--processes", type=int, default=None, help="Počet procesov (default IMAGE_WORKER_PROCESSES).")
+@click.option("--status", is_flag=True, help="Vypíš počty úloh podľa stavu.")
+def images_worker_cmd(once, processes, status):
+    """Worker fronty obrázkov (použi s IMAGE_QUEUE_MODE=cli)."""
+    from modules.image_jobs import run_worker, queue_status
+
+    if status:
+        for stav, cnt in sorted(queue_status().items()):
+            click.echo(f"{stav:8} {cnt}")
+        return
+
+    run_worker(app, once=once, processes=processes,
+               on_batch=lambda n: click.echo(f"{datetime.utcnow():%Y-%m-%d %H:%M:%S} spracované: {n}"))
+
+
+@app.cli.command("outbox-worker")
+@click.option("--once", is_flag=True, help="Odošli, čo je na rade, a skonči.")
+@click.option("--status", is_flag=True, help="Vypíš počty e-mailov podľa stavu.")
+@click.option("--retry-failed", is_flag=True, help="Vráť neúspešné e-maily do fronty.")
+def outbox_worker_cmd(once, status, retry_failed):
+    """Odosielanie e-mailov z `email_outbox` (použi s OUTBOX_MODE=cli)."""
+    from modules.outbox import run_sender, outbox_status, retry_failed as _retry
+
+    if retry_failed:
+        click.echo(f"Vrátené do fronty: {_retry()}")
+    if status or retry_failed:
+        for stav, cnt in sorted(outbox_status().items()):
+            click.echo(f"{stav:8} {cnt}")
+        return
+
+    run_sender(app, once=once,
+               on_batch=lambda n: click.echo(f"{datetime.utcnow():%Y-%m-%d %H:%M:%S} odoslané: {n}"))
+
+
+@app.cli.command("forum-digest")
+@click.option("--dry-run", is_flag=True, help="Len vypíš, koľko súhrnov je na rade.")
+def forum_digest_cmd(dry_run):
+    """Zaraď e-mailové súhrny notifikácií z fóra do outboxu."""
+    from modules.forum_digest import send_digests
+
+    mails, notifs = send_digests(dry_run=dry_run)
+    click.echo(f"{'Na rade' if dry_run else 'Zaradené'}: {mails} súhrnov ({notifs} notifikácií)")
+
+
+@app.cli.command("images-backfill-meta")
+@click.option("--processes", type=int, default=None, help="Počet procesov (default IMAGE_WORKER_PROCESSES).")
+@click.option("--batch", type=int, default=200, help="Záznamov na jeden commit.")
+def images_backfill_meta_cmd(processes, batch):
+    """Doplň rozmery, dominantnú farbu a LQIP k už nahratým fotkám."""
+    from modules.image_jobs import backfill_meta, make_pool
+
+    pool = make_pool(processes)
+    try:
+        n = backfill_meta(pool, batch=batch, on_progress=lambda n: click.echo(f"… {n}"))
+    finally:
+        pool.shutdown()
+    click.echo(f"Doplnené metadáta: {n}")
+
+
+@app.cli.command("blobs")
+@click.option("--gc", is_flag=True, help="Zmaž bloby bez odkazov (po ochrannej lehote) aj so súbormi.")
+@click.option("--dry-run", is_flag=True, help="S --gc: len vypíš, čo by sa zmazalo.")
+@click.option("--grace", type=int, default=3600, help="Ochranná lehota v sekundách (default 3600).")
+@click.option("--reconcile", is_flag=True, help="Prepočítaj ref_count zo zdrojových tabuliek.")
+def blobs_cmd(gc, dry_run, grace, reconcile):
+    """Obsahovo adresované úložisko obrázkov (utils/blobs.py)."""
+    if reconcile:
+        click.echo(f"Opravené počítadlá: {reconcile_blobs()}")
+    if gc:
+        count, freed = collect_garbage(grace_seconds=grace, dry_run=dry_run)
+        click.echo(f"{'Na zmazanie' if dry_run else 'Zmazané'}: {count} blobov, {freed / 1024 / 1024:.1f} MB")
+    for k, v in blob_stats().items():
+        click.echo(f"{k:14} {v}")
+
+
+@app.cli.command("storage-check")
+def storage_check_cmd():
+    """Zápis / čítanie / zmazanie testovacieho súboru v úložisku (aj multipart)."""
+    from utils.storage import check_storage
+    with app.test_request_context():
+        for line in check_storage():
+            click.echo(line)
+
+
+@app.cli.command("orphans")
+@click.option("--dry-run", is_flag=True, help="Len vypíš, koľko by sa uvoľnilo.")
+@click.option("--grace", type=int, default=3600, help="Preskoč súbory mladšie ako N sekúnd (default 3600).")
+@click.option("--purge-days", type=int, default=7, help="Karanténu staršiu ako N dní zmaž (default 7).")
+def orphans_cmd(dry_run, grace, purge_days):
+    """Súbory uploadov bez odkazu v DB: presun do karantény, neskôr zmazanie (utils/orphans.py)."""
+    from utils.orphans import collect_orphans, quarantine_root
+
+    report = collect_orphans(grace_seconds=grace, quarantine_days=purge_days, dry_run=dry_run)
+    runs, purged = report.pop("purged")
+    for label, (count, size) in report.items():
+        click.echo(f"{label:20} {count:6} súborov  {size / 1024 / 1024:8.2f} MB")
+    total = sum(s for _, s in report.values())
+    verb = "Do karantény by išlo" if dry_run else "Presunuté do karantény"
+    click.echo(f"{verb}: {total / 1024 / 1024:.2f} MB ({quarantine_root()})")
+    click.echo(f"{'Zmazalo by sa' if dry_run else 'Zmazané'} z karantény: {runs} behov, {purged / 1024 / 1024:.2f} MB")
+
+
+@app.cli.command("uploads-shard")
+@click.option("--batch", type=int, default=200, help="Názvov na jeden commit.")
+@click.option("--dry-run", is_flag=True, help="Len spočítaj, čo by sa presunulo.")
+def uploads_shard_cmd(batch, dry_run):
+    """Presuň staré ploché uploady do <adresár>/ab/cd/ a prepíš názvy v DB (utils/sharding.py)."""
+    from utils.sharding import migrate_flat
+
+    report = migrate_flat(batch=batch, dry_run=dry_run,
+                          on_progress=lambda folder, n: click.echo(f"… {folder}: {n}"))
+    for folder, (names, files) in report.items():
+        click.echo(f"{folder:20} {names:6} názvov  {files:6} súborov")
+    if dry_run:
+        click.echo("Dry run – nič sa nepresunulo.")
 
 
 # -----------------------------
@@ -0,0 +1,221 @@
+# benchmark.py
+"""
+Benchmark hlavných stránok cez Flask test client (bez siete, bez gunicornu).
+
+Pre každý endpoint: p50 / p95 / p99 latencia (ms) a počet SQL dotazov na request.
+Výsledok sa dá uložiť ako baseline a neskoršie behy s ním porovnať.
+
+Použitie:
+  python seed_dataset.py --scale 0.1 --reset        # najprv dáta (instance/bench.db)
+  python benchmark.py                               # 30 requestov na endpoint
+  python benchmark.py --save-baseline               # uloží instance/bench_baseline.json
+  python benchmark.py --compare --fail-on-regression
+  python benchmark.py --only bazar,komunita_forum -n 100
+
+Prihlásené endpointy bežia ako používateľ --user-id (default 1 = admin zo seedu,
+vďaka šikmému rozdeleniu aj najaktívnejší používateľ).
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+BASE = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_DB = os.path.join(BASE, "instance", "bench.db")
+DEFAULT_BASELINE = os.path.join(BASE, "instance", "bench_baseline.json")
+
+# (názov, URL; {inzerat}/{user}/{podujatie}/{topic} sa doplní náhodným id, potrebuje login)
+ENDPOINTS = [
+    ("index",              "/",                              False),
+    ("bazar",              "/bazar",                         False),
+    ("bazar_detail",       "/bazar/{inzerat}",               False),
+    ("dopyty",             "/dopyty",                        True),
+    ("komunita_ludia",     "/komunita?tab=ludia",            False),
+    ("komunita_org",       "/komunita?tab=organizacie",      False),
+    ("komunita_rychly",    "/komunita?tab=rychly-dopyt",     False),
+    ("komunita_forum",     "/komunita?tab=forum",            False),
+    ("komunita_topic",     "/komunita?tab=forum&t={topic}",  True),
+    ("podujatia",          "/podujatia/",                    False),
+    ("podujatie_detail",   "/podujatia/{podujatie}",         False),
+    ("uzivatelia",         "/uzivatelia",                    False),
+    ("verejny_profil",     "/u/{user}",                      False),
+    ("spravy_inbox",       "/spravy/",                       True),
+    ("mesta_suggest",      "/api/mesta/suggest?q=ba",        False),
+]
+
+
+def percentile(sorted_vals, p):
+    if not sorted_vals:
+        return 0.0
+    k = (len(sorted_vals) - 1) * p / 100.0
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_vals) - 1)
+    return sorted_vals[lo] + (sorted_vals[hi] - sorted_vals[lo]) * (k - lo)
+
+
+def _git_rev():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=BASE,
+                                       stderr=subprocess.DEVNULL).decode().strip()
+    except Exception:
+        return None
+
+
+def _compare(results, baseline, tolerance):
+    """Vypíše rozdiely oproti baseline; vráti zoznam regresií."""
+    regressions = []
+    base_eps = baseline.get("endpoints", {})
+    print(f"\nPorovnanie s baseline ({baseline.get('meta', {}).get('created')}, "
+          f"rev {baseline.get('meta', {}).get('git_rev')}):")
+    print(f"{'endpoint':20} {'p50':>16} {'p95':>16} {'dotazy':>14}")
+    for name, r in results.items():
+        b = base_eps.get(name)
+        if not b:
+            print(f"{name:20} {'(nové)':>16}")
+            continue
+
+        def fmt(cur, old):
+            if not old:
+                return f"{cur:.1f}"
+            d = (cur - old) / old
+            return f"{cur:.1f} ({d:+.0%})"
+
+        print(f"{name:20} {fmt(r['p50'], b['p50']):>16} {fmt(r['p95'], b['p95']):>16} "
+              f"{r['queries']:>6.1f} ({r['queries'] - b['queries']:+.0f})")
+        if b["p95"] and (r["p95"] - b["p95"]) / b["p95"] > tolerance:
+            regressions.append(f"{name}: p95 {b['p95']:.1f} → {r['p95']:.1f} ms")
+        if r["queries"] > b["queries"] + 0.5:
+            regressions.append(f"{name}: dotazy {b['queries']:.1f} → {r['queries']:.1f}")
+    return regressions
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark endpointov (p50/p95/p99, SQL dotazy).")
+    ap.add_argument("--db", default=DEFAULT_DB, help="SQLite DB (default instance/bench.db zo seed_dataset.py)")
+    ap.add_argument("-n", "--requests", type=int, default=30, help="meraných requestov na endpoint")
+    ap.add_argument("--warmup", type=int, default=3, help="nemeraných requestov na začiatku")
+    ap.add_argument("--only", default="", help="čiarkou oddelené názvy endpointov")
+    ap.add_argument("--user-id", type=int, default=1, help="prihlásený používateľ")
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--baseline", default=DEFAULT_BASELINE, help="cesta k baseline súboru")
+    ap.add_argument("--save-baseline", action="store_true", help="ulož výsledok ako baseline")
+    ap.add_argument("--compare", action="store_true", help="porovnaj s baseline")
+    ap.add_argument("--tolerance", type=float, default=0.2, help="povolené zhoršenie p95 (0.2 = 20 %%)")
+    ap.add_argument("--fail-on-regression", action="store_true", help="exit 1 pri regresii")
+    ap.add_argument("--json", dest="json_out", help="ulož výsledok aj do tohto súboru")
+    args = ap.parse_args()
+
+    db_file = os.path.abspath(args.db)
+    if not os.path.exists(db_file):
+        sys.exit(f"❌ {db_file} neexistuje – najprv spusti seed_dataset.py")
+
+    os.environ["DATABASE_URL"] = "sqlite:///" + db_file.replace("\\", "/")
+    os.environ["HOUSEKEEP_MODE"] = "off"
+    os.environ.setdefault("IMAGE_QUEUE_MODE", "cli")  # žiadne vlákno s pollingom počas merania
+    os.environ.setdefault("NPLUSONE_ENABLED", "0")
+    os.environ["PERF_ENABLED"] = "0"
+    sys.path.insert(0, BASE)
+
+    from sqlalchemy import event, func
+    from sqlalchemy.engine import Engine
+    from app import app
+    from models import db, Inzerat, Pouzivatel, Podujatie, ForumTopic
+
+    counter = {"q": 0}
+
+    @event.listens_for(Engine, "before_cursor_execute")
+    def _count(conn, cursor, statement, parameters, context, executemany):
+        counter["q"] += 1
+
+    app.config["PROPAGATE_EXCEPTIONS"] = False
+    rnd = random.Random(args.seed)
+
+    with app.app_context():
+        max_ids = {
+            "inzerat": db.session.query(func.max(Inzerat.id)).scalar() or 1,
+            "user": db.session.query(func.max(Pouzivatel.id)).scalar() or 1,
+            "podujatie": db.session.query(func.max(Podujatie.id)).scalar() or 1,
+            "topic": db.session.query(func.max(ForumTopic.id)).scalar() or 1,
+        }
+        db.session.remove()
+
+    only = {x.strip() for x in args.only.split(",") if x.strip()}
+    endpoints = [e for e in ENDPOINTS if not only or e[0] in only]
+
+    anon = app.test_client()
+    with anon.session_transaction() as s:
+        s["guest_access_granted"] = True
+    auth = app.test_client()
+    with auth.session_transaction() as s:
+        s["guest_access_granted"] = True
+        s["_user_id"] = str(args.user_id)
+        s["_fresh"] = True
+
+    results = {}
+    print(f"⏱️  {db_file} | {args.requests} req/endpoint (+{args.warmup} warmup)\n")
+    print(f"{'endpoint':20} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8} {'dotazy':>7} {'chyby':>6}")
+    for name, pattern, login in endpoints:
+        client = auth if login else anon
+        lat, queries, errors = [], [], 0
+        for i in range(args.warmup + args.requests):
+            url = pattern.format(**{k: rnd.randint(1, v) for k, v in max_ids.items()})
+            counter["q"] = 0
+            t0 = time.perf_counter()
+            resp = client.get(url)
+            ms = (time.perf_counter() - t0) * 1000
+            if i < args.warmup:
+                continue
+            if resp.status_code >= 400:
+                errors += 1
+            lat.append(ms)
+            queries.append(counter["q"])
+        lat.sort()
+        r = {
+            "p50": percentile(lat, 50), "p95": percentile(lat, 95), "p99": percentile(lat, 99),
+            "max": lat[-1] if lat else 0.0, "mean": sum(lat) / len(lat) if lat else 0.0,
+            "queries": sum(queries) / len(queries) if queries else 0.0,
+            "queries_max": max(queries) if queries else 0, "errors": errors, "n": len(lat),
+        }
+        results[name] = r
+        print(f"{name:20} {r['p50']:8.1f} {r['p95']:8.1f} {r['p99']:8.1f} {r['max']:8.1f} "
+              f"{r['queries']:7.1f} {errors:6}")
+
+    doc = {
+        "meta": {"created": datetime.utcnow().isoformat(timespec="seconds"), "git_rev": _git_rev(),
+                 "db": db_file, "requests": args.requests, "python": sys.version.split()[0]},
+        "endpoints": results,
+    }
+
+    if args.json_out:
+        with open(args.json_out, "w", encoding="utf-8") as f:
+            json.dump(doc, f, indent=2, ensure_ascii=False)
+
+    regressions = []
+    if args.compare:
+        if not os.path.exists(args.baseline):
+            print(f"\n⚠️  Baseline {args.baseline} neexistuje (spusti s --save-baseline).")
+        else:
+            with open(args.baseline, encoding="utf-8") as f:
+                regressions = _compare(results, json.load(f), args.tolerance)
+            if regressions:
+                print("\n❌ Regresie:")
+                for line in regressions:
+                    print("  -", line)
+            else:
+                print("\n✅ Bez regresií.")
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(doc, f, indent=2, ensure_ascii=False)
+        print(f"\n💾 Baseline uložená: {args.baseline}")
+
+    if regressions and args.fail_on_regression:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
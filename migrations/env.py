@@ -123,6 +123,18 @@ def process_revision_directives(context, revision, directives):
 if conf_args.get("process_revision_directives") is None:
     conf_args["process_revision_directives"] = process_revision_directives
 
+
+def include_object(obj, name, type_, reflected, compare_to):
+    # FTS5 virtuálne tabuľky (utils/fulltext.py) a ich tieňové *_fts_data, *_fts_idx …
+    # nie sú v modeloch – autogenerate ich nesmie navrhnúť na zmazanie
+    if type_ == "table" and reflected and compare_to is None and "_fts" in name:
+        return False
+    return True
+
+
+if conf_args.get("include_object") is None:
+    conf_args["include_object"] = include_object
+
 connectable = get_engine()
 with connectable.connect() as connection:
     # kópia + vyhodenie duplicitných kľúčov
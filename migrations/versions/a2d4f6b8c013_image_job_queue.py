@@ -0,0 +1,42 @@
+"""image_job: queue for off-request image processing
+
+Revision ID: a2d4f6b8c013
+Revises: f1c3a8e2b907
+Create Date: 2026-10-18 15:10:37.902114
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a2d4f6b8c013'
+down_revision = 'f1c3a8e2b907'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'image_job',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('kind', sa.String(length=32), nullable=False),
+        sa.Column('target_id', sa.Integer(), nullable=False),
+        sa.Column('src_path', sa.String(length=255), nullable=False),
+        sa.Column('stem', sa.String(length=120), nullable=False),
+        sa.Column('stav', sa.String(length=12), nullable=False),
+        sa.Column('attempts', sa.Integer(), nullable=False),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('lease_owner', sa.String(length=128), nullable=True),
+        sa.Column('lease_until', sa.DateTime(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('finished_at', sa.DateTime(), nullable=True),
+        sa.Column('duration_ms', sa.Integer(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_image_job_stav_id', 'image_job', ['stav', 'id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_image_job_stav_id', table_name='image_job')
+    op.drop_table('image_job')
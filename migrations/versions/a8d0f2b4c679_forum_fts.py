@@ -0,0 +1,75 @@
+"""forum_fts: FTS5 index over forum topics and posts (+ sync triggers)
+
+Revision ID: a8d0f2b4c679
+Revises: f7c9e1a3b568
+Create Date: 2026-10-18 22:03:51.207446
+
+Len SQLite. rowid = forum_post.id, pre tému -forum_topic.id (jedna tabuľka,
+jeden MATCH pre témy aj odpovede). Index držia triggery nižšie.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a8d0f2b4c679'
+down_revision = 'f7c9e1a3b568'
+branch_labels = None
+depends_on = None
+
+TRIGGERS = {
+    "forum_topic_fts_ai": """
+        CREATE TRIGGER forum_topic_fts_ai AFTER INSERT ON forum_topic BEGIN
+            INSERT INTO forum_fts(rowid, nazov, body, topic_id, post_id)
+            VALUES (-new.id, new.nazov, new.body, new.id, NULL);
+        END""",
+    "forum_topic_fts_au": """
+        CREATE TRIGGER forum_topic_fts_au AFTER UPDATE OF nazov, body ON forum_topic BEGIN
+            DELETE FROM forum_fts WHERE rowid = -old.id;
+            INSERT INTO forum_fts(rowid, nazov, body, topic_id, post_id)
+            VALUES (-new.id, new.nazov, new.body, new.id, NULL);
+        END""",
+    "forum_topic_fts_ad": """
+        CREATE TRIGGER forum_topic_fts_ad AFTER DELETE ON forum_topic BEGIN
+            DELETE FROM forum_fts WHERE rowid = -old.id;
+        END""",
+    "forum_post_fts_ai": """
+        CREATE TRIGGER forum_post_fts_ai AFTER INSERT ON forum_post BEGIN
+            INSERT INTO forum_fts(rowid, nazov, body, topic_id, post_id)
+            VALUES (new.id, '', new.body, new.topic_id, new.id);
+        END""",
+    "forum_post_fts_au": """
+        CREATE TRIGGER forum_post_fts_au AFTER UPDATE OF body, topic_id ON forum_post BEGIN
+            DELETE FROM forum_fts WHERE rowid = old.id;
+            INSERT INTO forum_fts(rowid, nazov, body, topic_id, post_id)
+            VALUES (new.id, '', new.body, new.topic_id, new.id);
+        END""",
+    "forum_post_fts_ad": """
+        CREATE TRIGGER forum_post_fts_ad AFTER DELETE ON forum_post BEGIN
+            DELETE FROM forum_fts WHERE rowid = old.id;
+        END""",
+}
+
+
+def upgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    op.execute(
+        "CREATE VIRTUAL TABLE forum_fts USING fts5("
+        "nazov, body, topic_id UNINDEXED, post_id UNINDEXED, "
+        "tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')"
+    )
+    op.execute("INSERT INTO forum_fts(rowid, nazov, body, topic_id, post_id) "
+               "SELECT -id, nazov, body, id, NULL FROM forum_topic")
+    op.execute("INSERT INTO forum_fts(rowid, nazov, body, topic_id, post_id) "
+               "SELECT id, '', body, topic_id, id FROM forum_post")
+    for sql in TRIGGERS.values():
+        op.execute(sql)
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    for name in TRIGGERS:
+        op.execute(f"DROP TRIGGER IF EXISTS {name}")
+    op.execute("DROP TABLE IF EXISTS forum_fts")
@@ -0,0 +1,63 @@
+"""blob: content-addressed (SHA-256) image store with reference counts
+
+Revision ID: b3e5a7c9d124
+Revises: a2d4f6b8c013
+Create Date: 2026-10-18 16:21:05.114872
+
+Pred upgradom dobehni frontu (`flask images-worker --once`) – worker po tejto
+revízii berie už len úlohy typu "blob", staré ostanú v stave pending.
+Staré súbory ostávajú, kde sú (blob_id NULL), nové uploady idú do static/blobs/.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b3e5a7c9d124'
+down_revision = 'a2d4f6b8c013'
+branch_labels = None
+depends_on = None
+
+# tabuľka -> stĺpec s odkazom na blob
+REFS = [
+    ('galeria_pouzivatel', 'blob_id'),
+    ('galeria_skupina', 'blob_id'),
+    ('foto_inzerat', 'blob_id'),
+    ('podujatie', 'foto_blob_id'),
+    ('reklama', 'foto_blob_id'),
+]
+
+
+def upgrade():
+    op.create_table(
+        'blob',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('sha256', sa.String(length=64), nullable=False),
+        sa.Column('size', sa.BigInteger(), nullable=False),
+        sa.Column('stav', sa.String(length=12), nullable=False),
+        sa.Column('nazov', sa.String(length=255), nullable=True),
+        sa.Column('varianty', sa.Text(), nullable=True),
+        sa.Column('ref_count', sa.Integer(), nullable=False),
+        sa.Column('released_at', sa.DateTime(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('sha256'),
+    )
+    op.create_index('ix_blob_ref_count_released', 'blob', ['ref_count', 'released_at'], unique=False)
+
+    for table, column in REFS:
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.add_column(sa.Column(column, sa.Integer(), nullable=True))
+            batch_op.create_index(batch_op.f(f'ix_{table}_{column}'), [column], unique=False)
+            batch_op.create_foreign_key(f'fk_{table}_blob', 'blob', [column], ['id'])
+
+
+def downgrade():
+    for table, column in reversed(REFS):
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.drop_constraint(f'fk_{table}_blob', type_='foreignkey')
+            batch_op.drop_index(batch_op.f(f'ix_{table}_{column}'))
+            batch_op.drop_column(column)
+
+    op.drop_index('ix_blob_ref_count_released', table_name='blob')
+    op.drop_table('blob')
@@ -0,0 +1,70 @@
+"""search keys: lower-case, diacritics-free shadow columns (+ indexes)
+
+Revision ID: b9e1a3c5d780
+Revises: a8d0f2b4c679
+Create Date: 2026-10-18 23:10:27.664015
+
+Backfill v Pythone (NFD strip ako utils/moderation_text._strip_diacritics);
+ďalej ich drží utils/search_keys.py.
+"""
+import re
+import unicodedata
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b9e1a3c5d780'
+down_revision = 'a8d0f2b4c679'
+branch_labels = None
+depends_on = None
+
+# tabuľka -> [(kľúčový stĺpec, dĺžka, zdrojové stĺpce)]
+KEYS = {
+    'pouzivatel': [
+        ('prezyvka_key', 50, ('prezyvka',)),
+        ('meno_key', 201, ('meno', 'priezvisko')),
+        ('organizacia_key', 150, ('organizacia_nazov',)),
+    ],
+    'skupina': [
+        ('nazov_key', 100, ('nazov',)),
+    ],
+    'podujatie': [
+        ('nazov_key', 120, ('nazov',)),
+        ('organizator_key', 120, ('organizator',)),
+        ('miesto_key', 120, ('miesto',)),
+    ],
+}
+
+
+def _key(text):
+    t = "".join(c for c in unicodedata.normalize("NFD", (text or "").lower())
+                if unicodedata.category(c) != "Mn")
+    return re.sub(r"\s+", " ", t).strip() or None
+
+
+def upgrade():
+    for tbl, cols in KEYS.items():
+        with op.batch_alter_table(tbl, schema=None) as batch_op:
+            for name, length, _ in cols:
+                batch_op.add_column(sa.Column(name, sa.String(length=length), nullable=True))
+                batch_op.create_index(batch_op.f(f'ix_{tbl}_{name}'), [name], unique=False)
+
+    bind = op.get_bind()
+    for tbl, cols in KEYS.items():
+        sources = sorted({s for _, _, src in cols for s in src})
+        t = sa.table(tbl, sa.column('id'), *(sa.column(s) for s in sources),
+                     *(sa.column(name) for name, _, _ in cols))
+        rows = bind.execute(sa.select(t.c.id, *(t.c[s] for s in sources))).all()
+        for r in rows:
+            values = {name: _key(" ".join(getattr(r, s) or "" for s in src)) for name, _, src in cols}
+            bind.execute(t.update().where(t.c.id == r.id).values(**values))
+
+
+def downgrade():
+    for tbl, cols in KEYS.items():
+        with op.batch_alter_table(tbl, schema=None) as batch_op:
+            for name, _, _ in reversed(cols):
+                batch_op.drop_index(batch_op.f(f'ix_{tbl}_{name}'))
+                batch_op.drop_column(name)
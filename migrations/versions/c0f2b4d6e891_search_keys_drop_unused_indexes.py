@@ -0,0 +1,38 @@
+"""search keys: drop indexes no query uses
+
+Revision ID: c0f2b4d6e891
+Revises: b9e1a3c5d780
+Create Date: 2026-10-19 09:40:12.318207
+
+Hľadá sa cez key_contains() (LIKE '%q%') – index nepoužije. Ostávajú
+ix_pouzivatel_prezyvka_key (prefix vo find_user) a ix_podujatie_miesto_key
+(rovnosť pri filtri mesta).
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'c0f2b4d6e891'
+down_revision = 'b9e1a3c5d780'
+branch_labels = None
+depends_on = None
+
+UNUSED = {
+    'pouzivatel': ['meno_key', 'organizacia_key'],
+    'skupina': ['nazov_key'],
+    'podujatie': ['nazov_key', 'organizator_key'],
+}
+
+
+def upgrade():
+    for tbl, cols in UNUSED.items():
+        with op.batch_alter_table(tbl, schema=None) as batch_op:
+            for name in cols:
+                batch_op.drop_index(batch_op.f(f'ix_{tbl}_{name}'))
+
+
+def downgrade():
+    for tbl, cols in UNUSED.items():
+        with op.batch_alter_table(tbl, schema=None) as batch_op:
+            for name in cols:
+                batch_op.create_index(batch_op.f(f'ix_{tbl}_{name}'), [name], unique=False)
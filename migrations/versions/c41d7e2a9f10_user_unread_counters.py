@@ -0,0 +1,39 @@
+"""user: unread counters (spravy, forum)
+
+Revision ID: c41d7e2a9f10
+Revises: b22712aac778
+Create Date: 2026-10-18 10:12:04.381522
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c41d7e2a9f10'
+down_revision = 'b22712aac778'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('pouzivatel', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('unread_spravy', sa.Integer(), nullable=False, server_default=sa.text('0')))
+        batch_op.add_column(sa.Column('unread_forum', sa.Integer(), nullable=False, server_default=sa.text('0')))
+
+    # naplnenie z existujúcich dát (rovnaké podmienky ako utils/unread.reconcile_unread)
+    op.execute("""
+        UPDATE pouzivatel SET
+          unread_spravy = (SELECT COUNT(*) FROM spravy s
+                           WHERE s.komu_id = pouzivatel.id
+                             AND s.precitane IS NOT TRUE
+                             AND s.deleted_by_recipient IS NOT TRUE),
+          unread_forum  = (SELECT COUNT(*) FROM forum_notification n
+                           WHERE n.user_id = pouzivatel.id AND n.read_at IS NULL)
+    """)
+
+
+def downgrade():
+    with op.batch_alter_table('pouzivatel', schema=None) as batch_op:
+        batch_op.drop_column('unread_forum')
+        batch_op.drop_column('unread_spravy')
@@ -0,0 +1,50 @@
+"""images: width/height, dominant color and LQIP placeholder per upload
+
+Revision ID: c4f6b8d0e235
+Revises: b3e5a7c9d124
+Create Date: 2026-10-18 17:05:48.527391
+
+Existujúce záznamy doplní `flask images-backfill-meta`.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4f6b8d0e235'
+down_revision = 'b3e5a7c9d124'
+branch_labels = None
+depends_on = None
+
+# tabuľka -> prefix stĺpcov
+TABLES = [
+    ('blob', ''),
+    ('galeria_pouzivatel', ''),
+    ('galeria_skupina', ''),
+    ('foto_inzerat', ''),
+    ('podujatie', 'foto_'),
+    ('reklama', 'foto_'),
+]
+
+
+def _columns(prefix):
+    return [
+        sa.Column(f'{prefix}sirka', sa.Integer(), nullable=True),
+        sa.Column(f'{prefix}vyska', sa.Integer(), nullable=True),
+        sa.Column(f'{prefix}farba', sa.String(length=7), nullable=True),
+        sa.Column(f'{prefix}lqip', sa.Text(), nullable=True),
+    ]
+
+
+def upgrade():
+    for table, prefix in TABLES:
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            for col in _columns(prefix):
+                batch_op.add_column(col)
+
+
+def downgrade():
+    for table, prefix in reversed(TABLES):
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            for col in reversed(_columns(prefix)):
+                batch_op.drop_column(col.name)
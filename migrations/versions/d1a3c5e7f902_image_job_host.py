@@ -0,0 +1,27 @@
+"""image_job.host: jobs are claimed only on the host that staged the original
+
+Revision ID: d1a3c5e7f902
+Revises: c0f2b4d6e891
+Create Date: 2026-10-19 10:25:41.902317
+
+Staršie úlohy ostanú s host NULL – vezme ich ktorýkoľvek worker ako doteraz.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd1a3c5e7f902'
+down_revision = 'c0f2b4d6e891'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('image_job', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('host', sa.String(length=255), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('image_job', schema=None) as batch_op:
+        batch_op.drop_column('host')
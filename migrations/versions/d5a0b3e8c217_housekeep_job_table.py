@@ -0,0 +1,44 @@
+"""housekeep_job: scheduler lease + last run metrics
+
+Revision ID: d5a0b3e8c217
+Revises: c41d7e2a9f10
+Create Date: 2026-10-18 11:48:27.905113
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd5a0b3e8c217'
+down_revision = 'c41d7e2a9f10'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'housekeep_job',
+        sa.Column('name', sa.String(length=64), nullable=False),
+        sa.Column('interval_s', sa.Integer(), nullable=False, server_default=sa.text('600')),
+        sa.Column('next_run_at', sa.DateTime(), nullable=True),
+        sa.Column('lease_owner', sa.String(length=128), nullable=True),
+        sa.Column('lease_until', sa.DateTime(), nullable=True),
+        sa.Column('last_started_at', sa.DateTime(), nullable=True),
+        sa.Column('last_finished_at', sa.DateTime(), nullable=True),
+        sa.Column('last_ok', sa.Boolean(), nullable=True),
+        sa.Column('last_result', sa.String(length=255), nullable=True),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.Column('last_duration_ms', sa.Integer(), nullable=True),
+        sa.Column('run_count', sa.Integer(), nullable=False, server_default=sa.text('0')),
+        sa.Column('fail_count', sa.Integer(), nullable=False, server_default=sa.text('0')),
+        sa.Column('total_ms', sa.BigInteger(), nullable=False, server_default=sa.text('0')),
+        sa.Column('max_ms', sa.Integer(), nullable=False, server_default=sa.text('0')),
+        sa.PrimaryKeyConstraint('name'),
+    )
+    op.create_index('ix_housekeep_job_next_run_at', 'housekeep_job', ['next_run_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_housekeep_job_next_run_at', table_name='housekeep_job')
+    op.drop_table('housekeep_job')
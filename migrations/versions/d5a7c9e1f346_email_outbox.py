@@ -0,0 +1,44 @@
+"""email_outbox: transactional e-mail queue for the pooled SMTP sender
+
+Revision ID: d5a7c9e1f346
+Revises: c4f6b8d0e235
+Create Date: 2026-10-18 19:20:11.304518
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd5a7c9e1f346'
+down_revision = 'c4f6b8d0e235'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'email_outbox',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('kind', sa.String(length=32), nullable=True),
+        sa.Column('to_email', sa.String(length=255), nullable=False),
+        sa.Column('sender', sa.String(length=255), nullable=True),
+        sa.Column('subject', sa.String(length=255), nullable=False),
+        sa.Column('body_text', sa.Text(), nullable=True),
+        sa.Column('body_html', sa.Text(), nullable=True),
+        sa.Column('stav', sa.String(length=12), nullable=False),
+        sa.Column('attempts', sa.Integer(), nullable=False),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('next_attempt_at', sa.DateTime(), nullable=False),
+        sa.Column('lease_owner', sa.String(length=128), nullable=True),
+        sa.Column('lease_until', sa.DateTime(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('sent_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_email_outbox_stav_next', 'email_outbox', ['stav', 'next_attempt_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_email_outbox_stav_next', table_name='email_outbox')
+    op.drop_table('email_outbox')
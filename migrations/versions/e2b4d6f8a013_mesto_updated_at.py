@@ -0,0 +1,29 @@
+"""mesto.updated_at: version signal for the cross-process city cache
+
+Revision ID: e2b4d6f8a013
+Revises: d1a3c5e7f902
+Create Date: 2026-10-19 11:05:18.447120
+
+Existujúce riadky ostanú NULL – max(updated_at) sa zmení pri prvej úprave.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e2b4d6f8a013'
+down_revision = 'd1a3c5e7f902'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('mesto', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('updated_at', sa.DateTime(), nullable=True))
+        batch_op.create_index(batch_op.f('ix_mesto_updated_at'), ['updated_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('mesto', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_mesto_updated_at'))
+        batch_op.drop_column('updated_at')
@@ -0,0 +1,30 @@
+"""forum_notification.emailed_at for e-mail digests
+
+Revision ID: e6b8d0f2a457
+Revises: d5a7c9e1f346
+Create Date: 2026-10-18 20:05:42.118305
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e6b8d0f2a457'
+down_revision = 'd5a7c9e1f346'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('forum_notification', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('emailed_at', sa.DateTime(), nullable=True))
+        batch_op.create_index('ix_forumnotif_digest', ['emailed_at', 'read_at'], unique=False)
+        batch_op.create_index('ix_forumnotif_user_emailed', ['user_id', 'emailed_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('forum_notification', schema=None) as batch_op:
+        batch_op.drop_index('ix_forumnotif_user_emailed')
+        batch_op.drop_index('ix_forumnotif_digest')
+        batch_op.drop_column('emailed_at')
@@ -0,0 +1,58 @@
+"""dopyt: end_at (computed end of event) + index for SQL-side expiry
+
+Revision ID: e7b19c4d5a62
+Revises: d5a0b3e8c217
+Create Date: 2026-10-18 12:20:41.552310
+
+"""
+from datetime import datetime, time, timedelta
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e7b19c4d5a62'
+down_revision = 'd5a0b3e8c217'
+branch_labels = None
+depends_on = None
+
+
+def _end_at(datum, cas_od, cas_do):
+    # rovnaké pravidlá ako modules/dopyty.dopyt_end_at (migrácia nemá importovať appku)
+    if not datum:
+        return None
+    if cas_do:
+        return datetime.combine(datum, cas_do)
+    if cas_od:
+        return datetime.combine(datum, cas_od) + timedelta(hours=4)
+    return datetime.combine(datum, time(23, 59))
+
+
+def upgrade():
+    with op.batch_alter_table('dopyt', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('end_at', sa.DateTime(), nullable=True))
+        batch_op.create_index('ix_dopyt_aktivny_end_at', ['aktivny', 'end_at'], unique=False)
+
+    dopyt = sa.table(
+        'dopyt',
+        sa.column('id', sa.Integer),
+        sa.column('datum', sa.Date),
+        sa.column('cas_od', sa.Time),
+        sa.column('cas_do', sa.Time),
+        sa.column('end_at', sa.DateTime),
+    )
+    bind = op.get_bind()
+    rows = bind.execute(
+        sa.select(dopyt.c.id, dopyt.c.datum, dopyt.c.cas_od, dopyt.c.cas_do)
+        .where(dopyt.c.datum.isnot(None))
+    ).all()
+    for r in rows:
+        bind.execute(dopyt.update().where(dopyt.c.id == r.id)
+                     .values(end_at=_end_at(r.datum, r.cas_od, r.cas_do)))
+
+
+def downgrade():
+    with op.batch_alter_table('dopyt', schema=None) as batch_op:
+        batch_op.drop_index('ix_dopyt_aktivny_end_at')
+        batch_op.drop_column('end_at')
@@ -0,0 +1,39 @@
+"""images: JSON list of generated derivatives (sizes x WebP/JPEG) per upload
+
+Revision ID: f1c3a8e2b907
+Revises: e7b19c4d5a62
+Create Date: 2026-10-18 14:02:11.318204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f1c3a8e2b907'
+down_revision = 'e7b19c4d5a62'
+branch_labels = None
+depends_on = None
+
+# tabuľka -> stĺpec (staré záznamy ostávajú NULL = pôvodný súbor bez variantov)
+COLUMNS = [
+    ('pouzivatel', 'profil_fotka_varianty'),
+    ('skupina', 'profil_fotka_skupina_varianty'),
+    ('galeria_pouzivatel', 'varianty'),
+    ('galeria_skupina', 'varianty'),
+    ('foto_inzerat', 'varianty'),
+    ('podujatie', 'foto_varianty'),
+    ('reklama', 'foto_varianty'),
+]
+
+
+def upgrade():
+    for table, column in COLUMNS:
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.add_column(sa.Column(column, sa.Text(), nullable=True))
+
+
+def downgrade():
+    for table, column in reversed(COLUMNS):
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.drop_column(column)
@@ -0,0 +1,44 @@
+"""pouzivatel_fts: FTS5 index for people / organization search
+
+Revision ID: f7c9e1a3b568
+Revises: e6b8d0f2a457
+Create Date: 2026-10-18 21:14:09.530817
+
+Len SQLite (na iných DB sa nevytvorí nič a vyhľadávanie ostane pri ilike).
+Migrácia naplní textové stĺpce priamo z tabuľky pouzivatel; štítky zamerania
+vznikajú v Pythone (Pouzivatel.zamerania_list) → po upgrade spusti
+`flask search-reindex`.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f7c9e1a3b568'
+down_revision = 'e6b8d0f2a457'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    op.execute(
+        "CREATE VIRTUAL TABLE pouzivatel_fts USING fts5("
+        "prezyvka, meno, organizacia, mesto, bio, zamerania, "
+        "tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')"
+    )
+    op.execute(
+        "INSERT INTO pouzivatel_fts(rowid, prezyvka, meno, organizacia, mesto, bio, zamerania) "
+        "SELECT id, COALESCE(prezyvka, ''), TRIM(COALESCE(meno, '') || ' ' || COALESCE(priezvisko, '')), "
+        "COALESCE(organizacia_nazov, ''), "
+        "TRIM(COALESCE(obec, '') || CASE WHEN sidlo_mesto IS NOT NULL AND sidlo_mesto != COALESCE(obec, '') "
+        "THEN ' ' || sidlo_mesto ELSE '' END), "
+        "COALESCE(bio, ''), '' FROM pouzivatel"
+    )
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    op.execute("DROP TABLE IF EXISTS pouzivatel_fts")
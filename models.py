@@ -7,8 +7,11 @@ from flask_login import UserMixin
 from werkzeug.security import generate_password_hash, check_password_hash
 from alembic import op
 import sqlalchemy as sa
+from utils.db_engine import RoutingSession
+from utils.images import image_url, ImageMeta
 
-db = SQLAlchemy()
+# RoutingSession: pri GET môže čítať z read-only SQLite enginu (utils/db_engine.py)
+db = SQLAlchemy(session_options={"class_": RoutingSession})
 
 import json
 
@@ -26,6 +29,7 @@ class Pouzivatel(db.Model, UserMixin):
     datum_registracie = db.Column(db.DateTime, default=datetime.utcnow)
     aktivny = db.Column(db.Boolean, default=True)
     profil_fotka = db.Column(db.String(200))
+    profil_fotka_varianty = db.Column(db.Text, nullable=True)  # JSON, viď utils/images.py
 
     # historické pole – nepoužívame na zobrazenie, ale nechávame
     zamerania = db.Column(db.Text, nullable=True)
@@ -44,6 +48,10 @@ class Pouzivatel(db.Model, UserMixin):
     typ_subjektu = db.Column(db.String(10), default='fyzicka')  # 'fyzicka' | 'ico'
     ico = db.Column(db.String(20), nullable=True)
     organizacia_nazov = db.Column(db.String(150), nullable=True)
+    # hľadacie kľúče: malé písmená bez diakritiky (utils/search_keys.py drží aktuálne)
+    prezyvka_key = db.Column(db.String(50), index=True)   # prefix vo find_user
+    meno_key = db.Column(db.String(201))
+    organizacia_key = db.Column(db.String(150))
     plan = db.Column(db.String(20), nullable=False, default='free')
     account_type = db.Column(db.String(20), nullable=False, default='individual')
     searchable = db.Column(db.Boolean, nullable=False, default=False)
@@ -76,6 +84,10 @@ class Pouzivatel(db.Model, UserMixin):
     rating_avg   = db.Column(db.Float,   default=0.0, nullable=False)
     rating_bayes = db.Column(db.Float,   default=0.0, nullable=False)
 
+    # badge v hlavičke (udržiava utils/unread.py)
+    unread_spravy = db.Column(db.Integer, default=0, nullable=False)
+    unread_forum  = db.Column(db.Integer, default=0, nullable=False)
+
     # vymazanie účtu
     erase_requested_at = db.Column(db.DateTime)
     erase_deadline_at  = db.Column(db.DateTime)
@@ -150,7 +162,7 @@ class Pouzivatel(db.Model, UserMixin):
     @property
     def profil_fotka_url(self):
         if self.profil_fotka:
-            return url_for('static', filename=f'profilovky/{self.profil_fotka}')
+            return image_url('profilovky', self.profil_fotka, self.profil_fotka_varianty, width=160)
         return url_for('static', filename='profilovky/default.png')
 
     @property
@@ -486,8 +498,19 @@ class Inzerat(db.Model):
 class FotoInzerat(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     nazov_suboru = db.Column(db.String(200), nullable=False)
+    varianty = db.Column(db.Text, nullable=True)  # JSON, viď utils/images.py
+    blob_id = db.Column(db.Integer, db.ForeignKey('blob.id', name='fk_foto_inzerat_blob'), nullable=True, index=True)
+    # metadáta pre šablóny (rozmery, dominantná farba, LQIP) – utils/images.compute_meta
+    sirka = db.Column(db.Integer, nullable=True)
+    vyska = db.Column(db.Integer, nullable=True)
+    farba = db.Column(db.String(7), nullable=True)
+    lqip = db.Column(db.Text, nullable=True)
     inzerat_id = db.Column(db.Integer, db.ForeignKey('inzerat.id'), nullable=False)
 
+    @property
+    def meta(self) -> ImageMeta:
+        return ImageMeta(self.sirka, self.vyska, self.farba, self.lqip)
+
 
 # 🧩 Pomocná tabuľka pre Many-to-Many medzi skupina a Pouzivatel
 skupina_clenovia = db.Table('skupina_clenovia',
@@ -524,10 +547,19 @@ class Dopyt(db.Model):
     # kedy (ak vôbec) sme poslali CTA mail zadávateľovi
     cta_sent_at = db.Column(db.DateTime, nullable=True)
 
+    # koniec akcie (dopočítaný z datum/cas_od/cas_do, viď modules/dopyty.dopyt_end_at);
+    # NULL = bez dátumu, neexpiruje
+    end_at = db.Column(db.DateTime, nullable=True)
+
+    __table_args__ = (
+        Index("ix_dopyt_aktivny_end_at", "aktivny", "end_at"),
+    )
+
 
 class Skupina(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     nazov = db.Column(db.String(100), nullable=False)
+    nazov_key = db.Column(db.String(100))   # utils/search_keys.py
     zaner = db.Column(db.String(100))
     typ   = db.Column(db.String(20), index=True)
     mesto = db.Column(db.String(100))
@@ -535,6 +567,7 @@ class Skupina(db.Model):
     web = db.Column(db.String(255))
     popis = db.Column(db.Text)
     profil_fotka_skupina = db.Column(db.String(120), nullable=True)
+    profil_fotka_skupina_varianty = db.Column(db.Text, nullable=True)
     datum_vytvorenia = db.Column(db.DateTime, default=datetime.utcnow)
 
     zakladatel_id = db.Column(db.Integer, db.ForeignKey('pouzivatel.id'), nullable=False)
@@ -549,10 +582,21 @@ class Skupina(db.Model):
 class GaleriaPouzivatel(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     nazov_suboru = db.Column(db.String(200), nullable=False)
+    varianty = db.Column(db.Text, nullable=True)  # JSON, viď utils/images.py
+    blob_id = db.Column(db.Integer, db.ForeignKey('blob.id', name='fk_galeria_pouzivatel_blob'), nullable=True, index=True)
+    # metadáta pre šablóny (rozmery, dominantná farba, LQIP) – utils/images.compute_meta
+    sirka = db.Column(db.Integer, nullable=True)
+    vyska = db.Column(db.Integer, nullable=True)
+    farba = db.Column(db.String(7), nullable=True)
+    lqip = db.Column(db.Text, nullable=True)
     pouzivatel_id = db.Column(db.Integer, db.ForeignKey('pouzivatel.id'), nullable=False)
 
     pouzivatel = db.relationship('Pouzivatel', back_populates='galeria')
 
+    @property
+    def meta(self) -> ImageMeta:
+        return ImageMeta(self.sirka, self.vyska, self.farba, self.lqip)
+
 
 class VideoPouzivatel(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -569,10 +613,21 @@ class GaleriaSkupina(db.Model):
 
     id = db.Column(db.Integer, primary_key=True)
     nazov_suboru = db.Column(db.String(200), nullable=False)
+    varianty = db.Column(db.Text, nullable=True)
+    blob_id = db.Column(db.Integer, db.ForeignKey('blob.id', name='fk_galeria_skupina_blob'), nullable=True, index=True)
+    # metadáta pre šablóny (rozmery, dominantná farba, LQIP) – utils/images.compute_meta
+    sirka = db.Column(db.Integer, nullable=True)
+    vyska = db.Column(db.Integer, nullable=True)
+    farba = db.Column(db.String(7), nullable=True)
+    lqip = db.Column(db.Text, nullable=True)
     skupina_id = db.Column(db.Integer, db.ForeignKey('skupina.id'), nullable=False)
 
     skupina = db.relationship('Skupina', back_populates='galeria')
 
+    @property
+    def meta(self) -> ImageMeta:
+        return ImageMeta(self.sirka, self.vyska, self.farba, self.lqip)
+
 
 class VideoSkupina(db.Model):
     __tablename__ = 'video_skupina'
@@ -608,6 +663,8 @@ class Mesto(db.Model):
     nazov = db.Column(db.String(100), nullable=False)
     okres = db.Column(db.String(100), nullable=True)
     kraj = db.Column(db.String(100), nullable=True)
+    # podpis pre cache v ostatných procesoch (utils/mesta_cache.py) – úprava názvu nemení count/max(id)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
 
     def __repr__(self):
         return f"{self.nazov} ({self.okres}, {self.kraj})"
@@ -771,9 +828,12 @@ class ForumNotification(db.Model):
     reason    = db.Column(db.String(32))         # 'reply', 'watch', 'mention'
     created_at= db.Column(db.DateTime, default=datetime.utcnow)
     read_at   = db.Column(db.DateTime)
+    emailed_at = db.Column(db.DateTime)          # zahrnuté v e-mailovom súhrne (modules/forum_digest.py)
 
     __table_args__ = (
         db.UniqueConstraint('user_id', 'post_id', name='uq_forumnotif_user_post'),  # žiadne duplikáty
+        Index('ix_forumnotif_digest', 'emailed_at', 'read_at'),
+        Index('ix_forumnotif_user_emailed', 'user_id', 'emailed_at'),
     )
 
     def __repr__(self):
@@ -792,13 +852,24 @@ class Podujatie(db.Model):
     # POZOR: u teba 'miesto' slúži často ako mesto (kým nepridáme mesto_id)
     miesto = db.Column(db.String(120), nullable=True)
 
+    # hľadacie kľúče bez diakritiky (utils/search_keys.py)
+    nazov_key = db.Column(db.String(120))
+    organizator_key = db.Column(db.String(120))
+    miesto_key = db.Column(db.String(120), index=True)   # rovnosť pri filtri mesta
+
     # dátum + čas začiatku
     start_dt = db.Column(db.DateTime, nullable=False)
 
     popis = db.Column(db.Text, nullable=True)
 
-    # 1 bulletin fotka
+    # 1 bulletin fotka (+ veľkosti, viď utils/images.py; blob = utils/blobs.py)
     foto_nazov = db.Column(db.String(255), nullable=True)
+    foto_varianty = db.Column(db.Text, nullable=True)
+    foto_blob_id = db.Column(db.Integer, db.ForeignKey('blob.id', name='fk_podujatie_blob'), nullable=True, index=True)
+    foto_sirka = db.Column(db.Integer, nullable=True)
+    foto_vyska = db.Column(db.Integer, nullable=True)
+    foto_farba = db.Column(db.String(7), nullable=True)
+    foto_lqip = db.Column(db.Text, nullable=True)
 
     created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
 
@@ -813,9 +884,13 @@ class Podujatie(db.Model):
     def foto_url(self):
         from flask import url_for
         if self.foto_nazov:
-            return url_for('static', filename=f'podujatia/{self.foto_nazov}')
+            return image_url('podujatia', self.foto_nazov, self.foto_varianty)
         return url_for('static', filename='podujatia/event-default.svg')
 
+    @property
+    def foto_meta(self) -> ImageMeta:
+        return ImageMeta(self.foto_sirka, self.foto_vyska, self.foto_farba, self.foto_lqip)
+
     @property
     def visible_until(self):
         # fallback, ak delete_at nie je nastavené
@@ -845,6 +920,12 @@ class Reklama(db.Model):
     url = db.Column(db.String(255), nullable=True)
 
     foto_nazov = db.Column(db.String(255), nullable=True)
+    foto_varianty = db.Column(db.Text, nullable=True)
+    foto_blob_id = db.Column(db.Integer, db.ForeignKey('blob.id', name='fk_reklama_blob'), nullable=True, index=True)
+    foto_sirka = db.Column(db.Integer, nullable=True)
+    foto_vyska = db.Column(db.Integer, nullable=True)
+    foto_farba = db.Column(db.String(7), nullable=True)
+    foto_lqip = db.Column(db.Text, nullable=True)
 
     start_dt = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
     end_dt = db.Column(db.DateTime, nullable=True)           # ak None → berme 7 dní od startu (nižšie v property)
@@ -859,9 +940,13 @@ class Reklama(db.Model):
     def foto_url(self):
         from flask import url_for
         if self.foto_nazov:
-            return url_for('static', filename=f'reklamy/{self.foto_nazov}')
+            return image_url('reklamy', self.foto_nazov, self.foto_varianty)
         return url_for('static', filename='podujatia/event-default.svg')  # použijeme jemnú defaultku
 
+    @property
+    def foto_meta(self) -> ImageMeta:
+        return ImageMeta(self.foto_sirka, self.foto_vyska, self.foto_farba, self.foto_lqip)
+
     def is_active_now(self):
         now = datetime.utcnow()
         if self.end_dt:
@@ -892,8 +977,8 @@ class UserRating(db.Model):
     __tablename__ = "user_rating"
 
     id         = db.Column(db.Integer, primary_key=True)
-    ratee_id   = db.Column(db.Integer, db.ForeignKey("pouzivatel.id"), nullable=False, index=True)  # koho hodnotím
-    rater_id   = db.Column(db.Integer, db.ForeignKey("pouzivatel.id"), nullable=False, index=True)  # kto hodnotí
+    ratee_id   = db.Column(db.Integer, db.ForeignKey("pouzivatel.id"), nullable=False)  # koho hodnotím
+    rater_id   = db.Column(db.Integer, db.ForeignKey("pouzivatel.id"), nullable=False)  # kto hodnotí
 
     # palec hore/dole (doplnkové odporúčanie)
     recommend  = db.Column(db.Boolean, nullable=False, default=False)
@@ -918,3 +1003,130 @@ class UserRating(db.Model):
         return self.status == "active"
 
 
+
+
+class HousekeepJob(db.Model):
+    """Stav periodickej úlohy (modules/housekeep.py): lease + posledný beh + metriky."""
+    __tablename__ = "housekeep_job"
+
+    name         = db.Column(db.String(64), primary_key=True)
+    interval_s   = db.Column(db.Integer, nullable=False, default=600)
+    next_run_at  = db.Column(db.DateTime, index=True)
+
+    # lease – kto úlohu práve drží (host:pid:thread) a dokedy
+    lease_owner  = db.Column(db.String(128))
+    lease_until  = db.Column(db.DateTime)
+
+    # posledný beh
+    last_started_at  = db.Column(db.DateTime)
+    last_finished_at = db.Column(db.DateTime)
+    last_ok          = db.Column(db.Boolean)
+    last_result      = db.Column(db.String(255))
+    last_error       = db.Column(db.Text)
+    last_duration_ms = db.Column(db.Integer)
+
+    # kumulatívne metriky
+    run_count   = db.Column(db.Integer, nullable=False, default=0)
+    fail_count  = db.Column(db.Integer, nullable=False, default=0)
+    total_ms    = db.Column(db.BigInteger, nullable=False, default=0)
+    max_ms      = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<HousekeepJob {self.name} next={self.next_run_at} ok={self.last_ok}>"
+
+
+class Blob(db.Model):
+    """
+    Obsahovo adresovaný obrázok (utils/blobs.py): jeden riadok na SHA-256 originálu.
+    Varianty ležia v static/blobs/ab/cd/<sha>_<veľkosť>.(webp|jpg), riadky galérií
+    a fotiek na blob ukazujú (blob_id / foto_blob_id). ref_count držia ORM eventy,
+    súbory maže až GC, keď počet odkazov klesne na 0.
+    """
+    __tablename__ = "blob"
+
+    id        = db.Column(db.Integer, primary_key=True)
+    sha256    = db.Column(db.String(64), nullable=False, unique=True)
+    size      = db.Column(db.BigInteger, nullable=False)           # bajty originálu
+
+    # pending (čaká vo fronte) | ready | failed (nie je obrázok)
+    stav      = db.Column(db.String(12), nullable=False, default="pending")
+    nazov     = db.Column(db.String(255))                          # kľúč najväčšieho JPEG
+    varianty  = db.Column(db.Text)                                 # JSON s kľúčmi, viď utils/images.py
+    sirka     = db.Column(db.Integer)                              # metadáta (utils/images.compute_meta)
+    vyska     = db.Column(db.Integer)
+    farba     = db.Column(db.String(7))
+    lqip      = db.Column(db.Text)
+
+    ref_count   = db.Column(db.Integer, nullable=False, default=0)
+    released_at = db.Column(db.DateTime)                           # kedy ref_count klesol na 0
+    created_at  = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        Index("ix_blob_ref_count_released", "ref_count", "released_at"),
+    )
+
+    def __repr__(self):
+        return f"<Blob {self.sha256[:12]} refs={self.ref_count} {self.stav}>"
+
+
+class ImageJob(db.Model):
+    """Spracovanie nahraného obrázka mimo requestu (modules/image_jobs.py)."""
+    __tablename__ = "image_job"
+
+    id         = db.Column(db.Integer, primary_key=True)
+    kind       = db.Column(db.String(32), nullable=False)   # "blob" (viď image_jobs.py)
+    target_id  = db.Column(db.Integer, nullable=False)      # id riadku v `blob`
+    src_path   = db.Column(db.String(255), nullable=False)  # originál v IMAGE_INCOMING_DIR (relatívne)
+    stem       = db.Column(db.String(120), nullable=False)  # základ mien variantov
+    host       = db.Column(db.String(255))                  # stroj s originálom (berú ju len jeho workery)
+
+    # pending | running | done | failed
+    stav       = db.Column(db.String(12), nullable=False, default="pending")
+    attempts   = db.Column(db.Integer, nullable=False, default=0)
+    error      = db.Column(db.Text)
+
+    lease_owner = db.Column(db.String(128))
+    lease_until = db.Column(db.DateTime)
+
+    created_at  = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    finished_at = db.Column(db.DateTime)
+    duration_ms = db.Column(db.Integer)
+
+    __table_args__ = (
+        Index("ix_image_job_stav_id", "stav", "id"),
+    )
+
+    def __repr__(self):
+        return f"<ImageJob {self.id} {self.kind}:{self.target_id} {self.stav}>"
+
+
+class EmailOutbox(db.Model):
+    """E-mail na odoslanie – zapisuje sa v transakcii requestu, posiela modules/outbox.py."""
+    __tablename__ = "email_outbox"
+
+    id         = db.Column(db.Integer, primary_key=True)
+    kind       = db.Column(db.String(32))                     # odkiaľ: "registracia", "dopyt", "sprava" …
+    to_email   = db.Column(db.String(255), nullable=False)
+    sender     = db.Column(db.String(255))                    # None = SMTP_SENDER
+    subject    = db.Column(db.String(255), nullable=False)
+    body_text  = db.Column(db.Text)
+    body_html  = db.Column(db.Text)
+
+    # pending | sending | sent | failed
+    stav       = db.Column(db.String(12), nullable=False, default="pending")
+    attempts   = db.Column(db.Integer, nullable=False, default=0)
+    error      = db.Column(db.Text)
+    next_attempt_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    lease_owner = db.Column(db.String(128))
+    lease_until = db.Column(db.DateTime)
+
+    created_at  = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    sent_at     = db.Column(db.DateTime)
+
+    __table_args__ = (
+        Index("ix_email_outbox_stav_next", "stav", "next_attempt_at"),
+    )
+
+    def __repr__(self):
+        return f"<EmailOutbox {self.id} {self.kind} → {self.to_email} {self.stav}>"
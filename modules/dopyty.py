@@ -1,12 +1,11 @@
 # modules/dopyty.py
 from flask import Blueprint, render_template, request, redirect, url_for, flash, current_app, abort
 from flask_login import current_user, login_required
-from models import db, Dopyt, Mesto
+from models import db, Dopyt
+from modules.outbox import enqueue
 from datetime import datetime, timedelta, time, date
 from itsdangerous import URLSafeTimedSerializer, BadSignature
-import smtplib
-from email.message import EmailMessage
-from sqlalchemy import or_
+from sqlalchemy import or_, event
 import re
 
 _BADWORD_PATTERNS = [
@@ -119,25 +118,34 @@ dopyty = Blueprint('dopyty', __name__)
 # Pomocné funkcie
 # =========================
 
+def dopyt_end_at(datum, cas_od=None, cas_do=None) -> datetime | None:
+    """Koniec akcie: cas_do, inak cas_od + 4 h, inak 23:59 v daný deň; bez dátumu None."""
+    if not datum:
+        return None
+    if cas_do:
+        return datetime.combine(datum, cas_do)
+    if cas_od:
+        return datetime.combine(datum, cas_od) + timedelta(hours=4)
+    return datetime.combine(datum, time(23, 59))
+
 def _dopyt_end_dt(d: Dopyt) -> datetime:
-    if not d.datum:
-        return datetime.max
-    if d.cas_do:
-        return datetime.combine(d.datum, d.cas_do)
-    if d.cas_od:
-        return datetime.combine(d.datum, d.cas_od) + timedelta(hours=4)
-    return datetime.combine(d.datum, time(23, 59))
-
-def _housekeep_expired():
+    return dopyt_end_at(d.datum, d.cas_od, d.cas_do) or datetime.max
+
+# end_at držíme v DB, aby expirácia aj filter v zozname bežali v SQL
+@event.listens_for(Dopyt, "before_insert")
+@event.listens_for(Dopyt, "before_update")
+def _dopyt_set_end_at(mapper, conn, target):
+    target.end_at = dopyt_end_at(target.datum, target.cas_od, target.cas_do)
+
+def _housekeep_expired() -> int:
+    """Deaktivuje dopyty po skončení akcie jedným UPDATE-om; vráti počet."""
     now = datetime.utcnow()
-    zmenene = False
-    for d in Dopyt.query.filter_by(aktivny=True).all():
-        if now > _dopyt_end_dt(d):
-            d.aktivny = False
-            d.zmazany_at = now
-            zmenene = True
-    if zmenene:
+    n = (Dopyt.query
+         .filter(Dopyt.aktivny.is_(True), Dopyt.end_at < now)
+         .update({"aktivny": False, "zmazany_at": now}, synchronize_session=False))
+    if n:
         db.session.commit()
+    return n
 
 def _ts() -> URLSafeTimedSerializer:
     return URLSafeTimedSerializer(current_app.config["SECRET_KEY"], salt="dopyt-delete")
@@ -151,30 +159,6 @@ def load_dopyt_token_noage(token: str):
     except BadSignature:
         return None
 
-def _send_email(to_email: str, subject: str, body_text: str) -> bool:
-    cfg = current_app.config
-    server = cfg.get("SMTP_SERVER")
-    port = int(cfg.get("SMTP_PORT", 587))
-    username = cfg.get("SMTP_USERNAME")
-    password = cfg.get("SMTP_PASSWORD")
-    sender   = cfg.get("SMTP_SENDER", username)
-
-    if not (server and username and password and sender and to_email):
-        current_app.logger.warning("SMTP not configured properly; skipping email send.")
-        return False
-
-    msg = EmailMessage()
-    msg["From"] = sender
-    msg["To"] = to_email
-    msg["Subject"] = subject
-    msg.set_content(body_text)
-
-    with smtplib.SMTP(server, port) as s:
-        s.starttls()
-        s.login(username, password)
-        s.send_message(msg)
-    return True
-
 
 # =========================
 # Zoznam dopytov (len prihlásený)
@@ -182,9 +166,10 @@ def _send_email(to_email: str, subject: str, body_text: str) -> bool:
 @dopyty.route('/dopyty', methods=['GET'])
 @login_required
 def zobraz_dopyty():
-    _housekeep_expired()
-
-    q = Dopyt.query.filter_by(aktivny=True)
+    # expiráciu robí modules/housekeep; tu len skryjeme už skončené
+    now = datetime.utcnow()
+    q = Dopyt.query.filter(Dopyt.aktivny.is_(True),
+                           or_(Dopyt.end_at.is_(None), Dopyt.end_at >= now))
 
     typ_akcie = (request.args.get('typ_akcie') or '').strip()
     datum_s   = (request.args.get('datum') or '').strip()
@@ -203,15 +188,9 @@ def zobraz_dopyty():
 
     dopyty_zoznam = q.order_by(Dopyt.created_at.desc(), Dopyt.id.desc()).all()
 
-    try:
-        mesta = Mesto.query.order_by(Mesto.kraj, Mesto.okres, Mesto.nazov).all()
-    except Exception:
-        mesta = []
-
     return render_template(
         'dopyty.html',
         dopyty=dopyty_zoznam,
-        mesta=mesta,
         kategorie=KATEGORIE,
         typy=TYPY
     )
@@ -342,7 +321,8 @@ def pridaj_dopyt():
             f"Po termíne udalosti sa dopyt automaticky deaktivuje.\n\n"
             f"Pekný deň,\nmuzikuj\n"
         )
-        sent = _send_email(novy.email, subject, body)
+        sent = enqueue(novy.email, subject, body, kind="dopyt") is not None  # odíde po commite (modules/outbox.py)
+        db.session.commit()
 
     # --- hlášky pre užívateľa
     if not novy.aktivny:
@@ -474,7 +454,7 @@ def kontaktovat(dopyt_id):
         f"Ak ste sa NEDOHODLI a chcete nechať dopyt aktívny, kliknite sem:\n{nodeal_url}\n\n"
         f"Pekný deň,\nMuzikuj\n"
     )
-    _send_email(d.email, subject, body)
+    enqueue(d.email, subject, body, kind="dopyt_odpoved")
 
     # ✨ označ, že CTA už bolo poslané
     if not d.cta_sent_at:
@@ -510,7 +490,7 @@ def send_dopyt_cta_if_needed(dopyt_id: int) -> None:
         f"Ak ste sa NEDOHODLI a chcete ho nechať aktívny, kliknite sem:\n{nodeal_url}\n\n"
         f"Pekný deň,\nMuzikuj\n"
     )
-    _send_email(d.email, subject, body)
+    enqueue(d.email, subject, body, kind="dopyt_cta")
     d.cta_sent_at = datetime.utcnow()
     db.session.commit()
 
@@ -4,6 +4,7 @@ from flask import Blueprint, request, redirect, url_for, flash, abort
 from flask_login import login_required, current_user
 from werkzeug.routing import BuildError
 from models import db, ForumTopic, ForumPost, TopicWatch, Pouzivatel
+from utils.unread import adjust_unread
 import re
 
 # POZN.: v app.py je blueprint registrovaný s url_prefix="/komunita/forum"
@@ -275,8 +276,9 @@ def create_forum_notifications(post: ForumPost, topic: ForumTopic, author_id: in
 def mark_all_read():
     try:
         from models import ForumNotification
-        ForumNotification.query.filter_by(user_id=current_user.id, read_at=None)\
-                               .update({'read_at': datetime.utcnow()})
+        n = ForumNotification.query.filter_by(user_id=current_user.id, read_at=None)\
+                                   .update({'read_at': datetime.utcnow()})
+        adjust_unread(current_user.id, forum=-n)  # hromadný update obchádza ORM eventy
         db.session.commit()
         flash("Všetko označené ako prečítané.", "success")
     except Exception:
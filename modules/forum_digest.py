@@ -0,0 +1,158 @@
+# modules/forum_digest.py
+"""
+E-mailové súhrny notifikácií z fóra (housekeep úloha `forum_digest`).
+
+create_forum_notifications zapíše riadok na príjemcu a príspevok – e-mail
+ku každému by bol záplava. Úloha namiesto toho pre každého používateľa
+zoskupí neprečítané a ešte neposlané notifikácie podľa tém a pošle jeden
+e-mail (témy + počet nových príspevkov, či ho niekto spomenul). Zahrnuté
+notifikácie dostanú emailed_at, takže sa nepošlú znova; prečítané medzitým
+v súhrne nebudú.
+
+Kedy: najviac raz za okno používateľa (hodinový / denný súhrn) a až keď
+najstaršia čakajúca notifikácia je staršia ako FORUM_DIGEST_SETTLE_SECONDS –
+rýchla výmena v jednej téme skončí v jednom e-maile.
+
+Preferencia sa ukladá do polí sledovania (nastavenia.sledovanie) ako token
+"forum_digest:<off|hourly|daily>" vo follow_entities. Bez tokenu: pri
+follow_mode 'all' FORUM_DIGEST_DEFAULT, pri 'custom' nič.
+
+E-maily idú cez outbox (modules/outbox.py) – worker ich pošle cez
+trvalé SMTP spojenia, nie jedno spojenie na e-mail.
+"""
+from datetime import datetime, timedelta
+
+from flask import current_app, has_request_context, url_for
+from sqlalchemy import case, func, update
+
+from models import db, ForumNotification, ForumTopic, Pouzivatel
+from modules.outbox import enqueue
+
+DIGEST_WINDOWS = {"hourly": 3600, "daily": 24 * 3600}
+DIGEST_CHOICES = ("off", "hourly", "daily")
+TOKEN = "forum_digest:"
+
+_fn = ForumNotification.__table__
+
+
+def digest_choice(user) -> str:
+    """off | hourly | daily podľa polí sledovania používateľa."""
+    for tok in (user.follow_entities or "").split(","):
+        if tok.startswith(TOKEN) and tok[len(TOKEN):] in DIGEST_CHOICES:
+            return tok[len(TOKEN):]
+    if (user.follow_mode or "all") == "all":
+        return current_app.config.get("FORUM_DIGEST_DEFAULT", "daily")
+    return "off"
+
+
+def with_digest_choice(entities: list[str], choice: str | None) -> list[str]:
+    """Zoznam pre follow_entities s (novou) voľbou súhrnu; None = voľbu nemeň."""
+    out = [e for e in entities if not e.startswith(TOKEN)]
+    if choice in DIGEST_CHOICES:
+        out.append(TOKEN + choice)
+    return out
+
+
+def _pending(now: datetime, cutoff: datetime) -> list:
+    """(user_id, počet, najstaršia) pre čakajúce notifikácie."""
+    return (db.session.query(ForumNotification.user_id, func.count(ForumNotification.id),
+                             func.min(ForumNotification.created_at))
+            .filter(ForumNotification.read_at.is_(None), ForumNotification.emailed_at.is_(None),
+                    ForumNotification.created_at >= cutoff, ForumNotification.created_at <= now)
+            .group_by(ForumNotification.user_id).all())
+
+
+def _due_users(now: datetime, cutoff: datetime) -> list:
+    cfg = current_app.config
+    settle = timedelta(seconds=int(cfg.get("FORUM_DIGEST_SETTLE_SECONDS", 600)))
+    pending = {uid: oldest for uid, _, oldest in _pending(now, cutoff) if oldest <= now - settle}
+    if not pending:
+        return []
+
+    ids = list(pending)
+    users = (Pouzivatel.query
+             .filter(Pouzivatel.id.in_(ids), Pouzivatel.aktivny.is_(True), Pouzivatel.is_deleted.is_(False),
+                     Pouzivatel.email.isnot(None))
+             .all())
+    last = dict(db.session.query(ForumNotification.user_id, func.max(ForumNotification.emailed_at))
+                .filter(ForumNotification.user_id.in_(ids), ForumNotification.emailed_at.isnot(None))
+                .group_by(ForumNotification.user_id).all())
+    due = []
+    for u in users:
+        window = DIGEST_WINDOWS.get(digest_choice(u))
+        if window is None:
+            continue
+        sent = last.get(u.id)
+        if sent is None or sent <= now - timedelta(seconds=window):
+            due.append(u)
+    return due
+
+
+def _topics(user_ids: list[int], now: datetime, cutoff: datetime) -> dict:
+    """{user_id: [(topic_id, názov, počet, spomenutý), ...]} zoradené podľa poslednej aktivity."""
+    rows = (db.session.query(ForumNotification.user_id, ForumNotification.topic_id, ForumTopic.nazov,
+                             func.count(ForumNotification.id),
+                             func.sum(case((ForumNotification.reason == "mention", 1), else_=0)),
+                             func.max(ForumNotification.created_at))
+            .join(ForumTopic, ForumTopic.id == ForumNotification.topic_id)
+            .filter(ForumNotification.user_id.in_(user_ids), ForumNotification.read_at.is_(None),
+                    ForumNotification.emailed_at.is_(None),
+                    ForumNotification.created_at >= cutoff, ForumNotification.created_at <= now)
+            .group_by(ForumNotification.user_id, ForumNotification.topic_id, ForumTopic.nazov)
+            .order_by(func.max(ForumNotification.created_at).desc())
+            .all())
+    out = {}
+    for uid, tid, nazov, n, mentions, _ in rows:
+        out.setdefault(uid, []).append((tid, nazov, n, bool(mentions)))
+    return out
+
+
+def _posts(n: int) -> str:
+    return f"{n} {'nový príspevok' if n == 1 else 'nové príspevky' if n < 5 else 'nových príspevkov'}"
+
+
+def _body(user, topics: list) -> tuple[str, str]:
+    total = sum(n for _, _, n, _ in topics)
+    lines = [f"Ahoj {user.prezyvka or ''},", "",
+             f"vo fóre máte {_posts(total)} v témach, ktoré sledujete:", ""]
+    for tid, nazov, n, mentioned in topics:
+        lines.append(f"• {nazov} – {_posts(n)}" + (" (spomenuli vás)" if mentioned else ""))
+        lines.append(f"  {url_for('komunita.hub', tab='forum', t=tid, _external=True)}")
+    lines += ["", "Súhrny môžete zmeniť alebo vypnúť v nastaveniach:",
+              url_for("nastavenia.prehlad", _external=True) + "#sledovanie", "", "muzikuj"]
+    subject = (f"Fórum: {_posts(total)} v {len(topics)} "
+               f"{'téme' if len(topics) == 1 else 'témach'} – muzikuj")
+    return subject, "\n".join(lines)
+
+
+def send_digests(now: datetime | None = None, dry_run: bool = False, batch: int = 200) -> tuple[int, int]:
+    """Pošli súhrny, ktoré sú na rade. Vráti (e-mailov, notifikácií)."""
+    if not has_request_context():
+        # url_for(_external=True) mimo requestu (housekeep, CLI) potrebuje adresu webu
+        with current_app.test_request_context(base_url=current_app.config.get("SITE_URL", "http://localhost")):
+            return send_digests(now, dry_run, batch)
+
+    now = now or datetime.utcnow()
+    cutoff = now - timedelta(days=int(current_app.config.get("FORUM_DIGEST_MAX_AGE_DAYS", 7)))
+    due = _due_users(now, cutoff)
+    mails = notifs = 0
+    for i in range(0, len(due), batch):
+        chunk = due[i:i + batch]
+        topics = _topics([u.id for u in chunk], now, cutoff)
+        for u in chunk:
+            if not topics.get(u.id):
+                continue
+            count = sum(n for _, _, n, _ in topics[u.id])
+            if not dry_run:
+                subject, body = _body(u, topics[u.id])
+                if enqueue(u.email, subject, body, kind="forum_digest") is None:
+                    continue  # SMTP nie je nastavené – notifikácie ostanú na ďalší beh
+                db.session.execute(
+                    update(_fn).where(_fn.c.user_id == u.id, _fn.c.read_at.is_(None), _fn.c.emailed_at.is_(None),
+                                      _fn.c.created_at >= cutoff, _fn.c.created_at <= now)
+                    .values(emailed_at=now))
+            mails += 1
+            notifs += count
+        if not dry_run:
+            db.session.commit()  # outbox riadky a emailed_at v jednej transakcii
+    return mails, notifs
@@ -0,0 +1,265 @@
+# modules/housekeep.py
+"""
+Plánovač periodických úloh (expirované dopyty, rýchle dopyty, vymazanie účtov, údržba SQLite,
+čistenie fronty obrázkov).
+
+Úlohy nebežia v requeste. Spúšťa ich buď:
+- `flask housekeep` (samostatný proces, slučka; `--once` pre cron), alebo
+- vlákno v každom workeri (HOUSEKEEP_MODE=thread, default).
+
+Koordinácia cez tabuľku `housekeep_job` (jeden riadok na úlohu): úlohu spustí
+len ten, komu prejde atómový UPDATE, ktorý si zoberie lease a zároveň overí,
+že je úloha na rade (next_run_at <= now). Pri viacerých workeroch / procesoch
+tak každá úloha beží práve raz za interval. Do toho istého riadku sa zapíše
+výsledok, trvanie a kumulatívne metriky (flask housekeep --status).
+"""
+import os
+import socket
+import threading
+import time
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import case, func, or_, update
+from sqlalchemy.exc import IntegrityError
+
+from models import db, HousekeepJob
+
+Job = namedtuple("Job", "name func interval_s")
+
+_DEFAULT_POLL_SECONDS = 30
+_DEFAULT_LEASE_SECONDS = 900
+
+_tbl = HousekeepJob.__table__
+
+
+# -----------------------------
+# Úlohy
+# -----------------------------
+def _job_dopyty_expired():
+    from modules.dopyty import _housekeep_expired
+    return _housekeep_expired()
+
+
+def _job_rychle_dopyty():
+    from modules.komunita import _housekeep_rychle_dopyty
+    return _housekeep_rychle_dopyty()
+
+
+def _job_erase_due():
+    from modules.erase_job import run_erase_due
+    cnt = run_erase_due()
+    if cnt:
+        current_app.logger.info("Anonymized %s users due to erase deadline", cnt)
+    return cnt
+
+
+def _job_sqlite_optimize():
+    from utils.db_engine import sqlite_optimize
+    return sqlite_optimize(db)
+
+
+def _job_image_jobs_cleanup():
+    from modules.image_jobs import cleanup_jobs
+    return cleanup_jobs()
+
+
+def _job_outbox_cleanup():
+    from modules.outbox import cleanup_outbox
+    return cleanup_outbox()
+
+
+def _job_forum_digest():
+    from modules.forum_digest import send_digests
+    mails, notifs = send_digests()
+    return f"{mails} súhrnov ({notifs} notifikácií)"
+
+
+def _job_blobs_gc():
+    from utils.blobs import collect_garbage
+    count, freed = collect_garbage()
+    return f"{count} blobov, {freed} B"
+
+
+def _job_orphans_gc():
+    from utils.orphans import collect_orphans
+    report = collect_orphans()
+    runs, purged = report.pop("purged")
+    moved = sum(c for c, _ in report.values())
+    return f"karanténa {moved} súborov, zmazané {runs} behov ({purged} B)"
+
+
+# názov -> (funkcia, predvolený interval v sekundách)
+JOBS = {
+    "dopyty_expired":  (_job_dopyty_expired, 600),
+    "rychle_dopyty":   (_job_rychle_dopyty, 600),
+    "erase_due":       (_job_erase_due, 600),
+    "sqlite_optimize": (_job_sqlite_optimize, 6 * 3600),
+    "image_jobs_cleanup": (_job_image_jobs_cleanup, 24 * 3600),
+    "outbox_cleanup":  (_job_outbox_cleanup, 24 * 3600),
+    "forum_digest":    (_job_forum_digest, 900),
+    "blobs_gc":        (_job_blobs_gc, 900),
+    "orphans_gc":      (_job_orphans_gc, 24 * 3600),
+}
+
+
+def parse_intervals(raw: str) -> dict:
+    """'erase_due=3600,dopyty_expired=300' -> {'erase_due': 3600, ...}"""
+    out = {}
+    for part in (raw or "").split(","):
+        name, _, val = part.partition("=")
+        name, val = name.strip(), val.strip()
+        if name and val.isdigit():
+            out[name] = int(val)
+    return out
+
+
+def get_jobs() -> list:
+    overrides = current_app.config.get("HOUSEKEEP_INTERVALS") or {}
+    return [Job(name, fn, int(overrides.get(name, default)))
+            for name, (fn, default) in JOBS.items()]
+
+
+# -----------------------------
+# Lease a záznam behu
+# -----------------------------
+def _owner() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}"
+
+
+def _lease_seconds() -> int:
+    return int(current_app.config.get("HOUSEKEEP_LEASE_SECONDS", _DEFAULT_LEASE_SECONDS))
+
+
+def _ensure_rows(jobs, now):
+    """Založí chýbajúce riadky (prvý beh hneď) a zosúladí interval s konfiguráciou."""
+    existing = dict(db.session.query(HousekeepJob.name, HousekeepJob.interval_s).all())
+    for job in jobs:
+        if job.name not in existing:
+            db.session.add(HousekeepJob(name=job.name, interval_s=job.interval_s, next_run_at=now))
+            try:
+                db.session.commit()
+            except IntegrityError:  # iný worker bol rýchlejší
+                db.session.rollback()
+        elif existing[job.name] != job.interval_s:
+            db.session.execute(update(_tbl).where(_tbl.c.name == job.name)
+                               .values(interval_s=job.interval_s))
+            db.session.commit()
+
+
+def _try_acquire(job, owner, now, force=False) -> bool:
+    cond = [_tbl.c.name == job.name,
+            or_(_tbl.c.lease_until.is_(None), _tbl.c.lease_until < now)]
+    if not force:
+        cond.append(or_(_tbl.c.next_run_at.is_(None), _tbl.c.next_run_at <= now))
+    res = db.session.execute(
+        update(_tbl).where(*cond)
+        .values(lease_owner=owner,
+                lease_until=now + timedelta(seconds=_lease_seconds()),
+                last_started_at=now)
+    )
+    db.session.commit()
+    return res.rowcount == 1
+
+
+def _finish(job, owner, ok, result, error, ms):
+    now = datetime.utcnow()
+    db.session.execute(
+        update(_tbl).where(_tbl.c.name == job.name, _tbl.c.lease_owner == owner)
+        .values(next_run_at=now + timedelta(seconds=job.interval_s),
+                lease_owner=None, lease_until=None,
+                last_finished_at=now, last_ok=ok,
+                last_result=(None if result is None else str(result)[:255]),
+                last_error=error, last_duration_ms=ms,
+                run_count=_tbl.c.run_count + 1,
+                fail_count=_tbl.c.fail_count + (0 if ok else 1),
+                total_ms=_tbl.c.total_ms + ms,
+                max_ms=case((_tbl.c.max_ms < ms, ms), else_=_tbl.c.max_ms))
+    )
+    db.session.commit()
+
+
+def run_job(job, owner=None, force=False):
+    """
+    Spusti jednu úlohu, ak sa podarí získať lease.
+    Vráti (ok, trvanie_ms) alebo None, ak úlohu drží niekto iný / nie je na rade.
+    """
+    owner = owner or _owner()
+    if not _try_acquire(job, owner, datetime.utcnow(), force=force):
+        return None
+
+    t0 = time.perf_counter()
+    ok, result, error = True, None, None
+    try:
+        result = job.func()
+    except Exception as e:
+        db.session.rollback()
+        ok, error = False, f"{type(e).__name__}: {e}"[:2000]
+        current_app.logger.warning("Housekeep job %s failed: %s", job.name, error)
+    ms = int((time.perf_counter() - t0) * 1000)
+
+    _finish(job, owner, ok, result, error, ms)
+    return ok, ms
+
+
+def run_due_jobs(owner=None, only=None, force=False) -> dict:
+    """Prejde úlohy a spustí tie, ktoré sú na rade. Vráti {názov: (ok, ms)}."""
+    jobs = [j for j in get_jobs() if not only or j.name in only]
+    _ensure_rows(jobs, datetime.utcnow())
+    owner = owner or _owner()
+
+    done = {}
+    for job in jobs:
+        res = run_job(job, owner=owner, force=force)
+        if res is not None:
+            done[job.name] = res
+    return done
+
+
+def seconds_until_next(poll: int) -> float:
+    """Koľko spať do najbližšej úlohy (max. `poll`, min. 1 s)."""
+    nxt = db.session.query(func.min(HousekeepJob.next_run_at)).scalar()
+    if nxt is None:
+        return poll
+    return max(1.0, min(float(poll), (nxt - datetime.utcnow()).total_seconds()))
+
+
+def job_status() -> list:
+    return HousekeepJob.query.order_by(HousekeepJob.name).all()
+
+
+# -----------------------------
+# Vlákno vo workeri
+# -----------------------------
+_thread = None
+_thread_lock = threading.Lock()
+
+
+def _loop(app):
+    poll = int(app.config.get("HOUSEKEEP_POLL_SECONDS", _DEFAULT_POLL_SECONDS))
+    while True:
+        wait = poll
+        try:
+            with app.app_context():
+                try:
+                    run_due_jobs()
+                    wait = seconds_until_next(poll)
+                finally:
+                    db.session.remove()
+        except Exception as e:
+            app.logger.debug(f"Housekeep loop error: {e}")
+        time.sleep(wait)
+
+
+def start_housekeep_thread(app) -> bool:
+    """Spusti démonické vlákno (raz na proces). Vráti True, ak sa práve spustilo."""
+    global _thread
+    if _thread is not None:
+        return False
+    with _thread_lock:
+        if _thread is not None:
+            return False
+        _thread = threading.Thread(target=_loop, args=(app,), name="housekeep", daemon=True)
+        _thread.start()
+        return True
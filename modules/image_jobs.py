@@ -0,0 +1,379 @@
+# modules/image_jobs.py
+"""
+Fronta na spracovanie obrázkov z galérií mimo requestu.
+
+Upload (nahraj_fotku, nahraj_fotku_skupina, fotky inzerátu) len prúdovo uloží
+originál do IMAGE_INCOMING_DIR a zahashuje ho (utils/blobs.py). Ak blob s tým
+istým SHA-256 už existuje, riadok naň len ukáže – žiadne spracovanie. Nový blob
+dostane varianty=PENDING (šablóna ukáže zástupný obrázok) a riadok v `image_job`.
+
+IMAGE_INCOMING_DIR je lokálny adresár servera, preto úloha nesie `host`
+a berú si ju len workery na tom istom stroji (pri viacerých app serveroch so
+S3 by ju inak vzal iný stroj, ktorý originál nemá). Chýbajúci originál sa
+skúša znova a po MAX_ATTEMPTS ostane `failed` na kontrolu – položky galérií
+sa mažú len pri nevalidnom súbore (ImageError).
+
+Worker si úlohy berie atómovým UPDATE (lease ako v modules/housekeep), samotné
+Pillow spracovanie (validácia, zmenšenie, WebP/JPEG – utils/blobs.render)
+beží v ProcessPoolExecutor, takže neblokuje GIL ani request. Výsledok zapíše
+do blobu a všetkých riadkov, ktoré naň ukazujú; nevalidný súbor tieto položky
+galérií zmaže. Originál sa potom odstráni.
+
+IMAGE_QUEUE_MODE:
+  thread  – vlákno + process pool v každom web workeri (default)
+  cli     – samostatný proces `flask images-worker`
+  inline  – bez fronty, spracuje sa hneď v requeste (ako predtým)
+"""
+import os
+import socket
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timedelta
+import multiprocessing
+
+from flask import current_app
+from sqlalchemy import func, or_, and_, update
+
+from models import db, ImageJob, Blob
+from utils.images import ImageError, image_meta, largest_file, META_FIELDS, PENDING
+from utils import blobs
+from utils.storage import get_storage, resolve_key
+
+_tbl = ImageJob.__table__
+
+_DEFAULT_POLL_SECONDS = 2
+_LEASE_SECONDS = 300
+MAX_ATTEMPTS = 3
+
+
+def _incoming_dir() -> str:
+    d = current_app.config.get("IMAGE_INCOMING_DIR") or os.path.join(current_app.instance_path, "uploads_incoming")
+    os.makedirs(d, exist_ok=True)
+    return d
+
+
+def _host() -> str:
+    return socket.gethostname()[:255]
+
+
+def _owner() -> str:
+    return f"{_host()}:{os.getpid()}:{threading.get_ident()}"
+
+
+def _remove_incoming(name: str):
+    try:
+        os.remove(os.path.join(_incoming_dir(), name))
+    except OSError:
+        pass
+
+
+# -----------------------------
+# Strana requestu
+# -----------------------------
+def store_upload(file_storage, row, inline: bool = False) -> bool:
+    """
+    Ulož upload pre `row` (model z utils/blobs.REFS) a nastav mu odkaz na blob.
+    Duplicitný obsah = len odkaz. Nový obsah: vo fronte ImageJob, pri inline
+    (alebo IMAGE_QUEUE_MODE=inline) hneď spracovanie v requeste.
+    Riadok pridá do session. Vráti False, ak súbor nejde uložiť / nie je obrázok.
+    """
+    inline = inline or current_app.config.get("IMAGE_QUEUE_MODE") == "inline"
+    try:
+        tmp, sha, size = blobs.ingest(file_storage, _incoming_dir(),
+                                      max_bytes=current_app.config.get("UPLOAD_MAX_FILE_BYTES"))
+    except ImageError as e:  # UploadRejected – typ / veľkosť
+        current_app.logger.info(f"Upload odmietnutý: {e}")
+        return False
+    except OSError as e:
+        current_app.logger.warning(f"Upload sa nepodarilo uložiť: {e}")
+        return False
+
+    blob, created = blobs.get_or_create(sha, size)
+    if not created:
+        _remove_incoming(tmp)  # rovnaký obsah už máme
+        if blob.stav == "failed":
+            return False
+        blobs.attach(row, blob)
+        db.session.add(row)
+        return True
+
+    if inline:
+        root = blobs.blob_root()
+        try:
+            result = blobs.render(os.path.join(_incoming_dir(), tmp), root, sha)
+            blobs.publish(result, root)
+        except ImageError:
+            db.session.delete(blob)
+            return False
+        finally:
+            _remove_incoming(tmp)
+        blobs.set_rendered(blob, result)
+        blobs.attach(row, blob)
+        db.session.add(row)
+        return True
+
+    blobs.attach(row, blob)
+    db.session.add(row)
+    db.session.add(ImageJob(kind="blob", target_id=blob.id, src_path=tmp, stem=sha, host=_host()))
+    return True
+
+
+# -----------------------------
+# Worker
+# -----------------------------
+def _claim(owner: str, limit: int) -> list:
+    """Zober si až `limit` úloh tohto stroja (pending alebo running s prepadnutým lease)."""
+    now = datetime.utcnow()
+    free = and_(_tbl.c.kind == "blob",
+                or_(_tbl.c.host == _host(), _tbl.c.host.is_(None)),  # originál je na disku tohto stroja
+                or_(_tbl.c.stav == "pending",
+                    and_(_tbl.c.stav == "running", _tbl.c.lease_until < now)))
+    ids = [r[0] for r in db.session.query(ImageJob.id).filter(free)
+           .order_by(ImageJob.id).limit(limit * 2).all()]
+    got = []
+    for job_id in ids:
+        if len(got) >= limit:
+            break
+        res = db.session.execute(
+            update(_tbl).where(_tbl.c.id == job_id, free)
+            .values(stav="running", lease_owner=owner,
+                    lease_until=now + timedelta(seconds=_LEASE_SECONDS),
+                    attempts=_tbl.c.attempts + 1)
+        )
+        db.session.commit()
+        if res.rowcount == 1:
+            got.append(db.session.get(ImageJob, job_id))
+    return got
+
+
+def _finish(job: ImageJob, ok: bool, result=None, error: str | None = None, ms: int = 0,
+            invalid: bool = False):
+    """Zapíš výsledok úlohy; `invalid` = súbor nie je obrázok (len vtedy sa položky galérií mažú)."""
+    blob = db.session.get(Blob, job.target_id)
+    if blob is not None and blob.sha256 != job.stem:
+        blob = None  # pôvodný blob zmazal GC a id dostal iný
+
+    if ok:
+        orphan = None
+        if blob is None:  # blob medzitým zmazal GC (nikto naň neukazuje)
+            orphan = Blob(sha256=job.stem, size=0, nazov=result[0], varianty=result[1])
+        else:
+            blobs.set_rendered(blob, result)
+            blobs.propagate(blob)
+        job.stav, job.error = "done", None
+    elif job.attempts < MAX_ATTEMPTS and error and error.startswith("retry:"):
+        job.stav, job.error = "pending", error
+    else:
+        job.stav, job.error = "failed", (error or "")[:2000]
+        if invalid and blob is not None:
+            # nevalidný súbor – nech v galérii nevisí zástupný obrázok;
+            # blob ostane ako "failed" (rovnaký súbor odmietneme hneď), zmaže ho GC
+            blob.stav = "failed"
+            blobs.drop_refs(blob)
+        elif not invalid:
+            # chýbajúci originál / opakovaná chyba – nič nemažeme, úloha ostane na kontrolu
+            current_app.logger.warning("image job %s failed: %s", job.id, job.error)
+
+    job.lease_owner = job.lease_until = None
+    job.finished_at = datetime.utcnow()
+    job.duration_ms = ms
+    db.session.commit()
+
+    if ok and orphan is not None:
+        st = get_storage()
+        for key in blobs.blob_keys(orphan):
+            st.delete(key)
+    if job.stav == "done" or (job.stav == "failed" and invalid):
+        _remove_incoming(job.src_path)
+
+
+def process_batch(pool, owner: str | None = None, limit: int = 8) -> int:
+    """Spracuj jednu dávku cez `pool`. Vráti počet spracovaných úloh."""
+    owner = owner or _owner()
+    jobs = _claim(owner, limit)
+    if not jobs:
+        return 0
+
+    incoming = _incoming_dir()
+    root = blobs.blob_root()
+    started = time.perf_counter()
+    futures = []
+    for i, job in enumerate(jobs):
+        src = os.path.join(incoming, job.src_path)
+        if not os.path.isfile(src):
+            # save_image by chýbajúci súbor ohlásil ako ImageError (= nevalidný) a zmazal položky
+            _finish(job, False, error=f"retry: missing original {src} on {_host()}")
+            continue
+        try:
+            fut = pool.submit(blobs.render, src, root, job.stem)
+        except Exception as e:
+            # pool nefunguje – zvyšok dávky vrátime do fronty, nech nečaká na lease
+            for j in jobs[i:]:
+                _finish(j, False, error=f"retry: {type(e).__name__}: {e}")
+            if isinstance(e, BrokenProcessPool):
+                raise
+            break
+        futures.append((job, fut))
+
+    broken = False
+    for job, fut in futures:
+        try:
+            result = fut.result()
+            blobs.publish(result, root)  # pri S3 nahrá varianty, pri local sú už na mieste
+            _finish(job, True, result=result, ms=int((time.perf_counter() - started) * 1000))
+        except ImageError as e:
+            _finish(job, False, error=f"{type(e).__name__}: {e}", invalid=True)
+        except FileNotFoundError as e:
+            _finish(job, False, error=f"retry: missing original: {e}")
+        except BrokenProcessPool:
+            broken = True  # ostatné futures padnú tiež – všetky vrátime do fronty
+            _finish(job, False, error="retry: worker process died")
+        except Exception as e:
+            _finish(job, False, error=f"retry: {type(e).__name__}: {e}")
+    if broken:
+        raise BrokenProcessPool("image worker pool died")
+    return len(jobs)
+
+
+def make_pool(processes: int | None = None) -> ProcessPoolExecutor:
+    n = processes or int(current_app.config.get("IMAGE_WORKER_PROCESSES", 2))
+    # spawn: čisté procesy bez zdedených vlákien / DB spojení webového workera
+    return ProcessPoolExecutor(max_workers=n, mp_context=multiprocessing.get_context("spawn"))
+
+
+def run_worker(app, once: bool = False, processes: int | None = None, on_batch=None):
+    """Slučka workera (CLI aj vlákno). `once` = spracuj, čo je vo fronte, a skonči."""
+    with app.app_context():
+        poll = float(app.config.get("IMAGE_WORKER_POLL_SECONDS", _DEFAULT_POLL_SECONDS))
+        pool = make_pool(processes)
+        limit = pool._max_workers * 2
+    owner = _owner()
+    try:
+        while True:
+            done = 0
+            try:
+                with app.app_context():
+                    try:
+                        done = process_batch(pool, owner=owner, limit=limit)
+                    finally:
+                        db.session.remove()
+            except BrokenProcessPool:
+                pool.shutdown(cancel_futures=True)
+                with app.app_context():
+                    pool = make_pool(processes)
+            if done and on_batch:
+                on_batch(done)
+            if once and not done:
+                return
+            if not done:
+                time.sleep(poll)
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+# -----------------------------
+# Doplnenie metadát (rozmery, farba, LQIP) pre staršie záznamy
+# -----------------------------
+def _meta_batch(pool, paths: list[str]) -> list:
+    return list(pool.map(image_meta, paths, chunksize=8))
+
+
+def backfill_meta(pool, batch: int = 200, on_progress=None) -> int:
+    """
+    Dopočítaj metadáta pre hotové bloby a staré (ploché) fotky bez blobu.
+    Súbory sa čítajú v `pool` (process pool) priamo z disku – len pre local
+    úložisko (spusti pred prechodom na S3; nové uploady metadáta už majú).
+    DB sa zapisuje po dávkach. Vráti počet aktualizovaných blobov + riadkov.
+    """
+    st = get_storage()
+    if st.local_dir("") is None:
+        raise RuntimeError("backfill metadát potrebuje lokálne úložisko (STORAGE_BACKEND=local)")
+    done = 0
+
+    last_id = 0
+    while True:
+        chunk = (Blob.query.filter(Blob.id > last_id, Blob.stav == "ready", Blob.sirka.is_(None))
+                 .order_by(Blob.id).limit(batch).all())
+        if not chunk:
+            break
+        last_id = chunk[-1].id
+        paths = [st.local_path(largest_file(b.nazov, b.varianty) or "") for b in chunk]
+        for blob, meta in zip(chunk, _meta_batch(pool, paths)):
+            if meta:
+                for f in META_FIELDS:
+                    setattr(blob, f, meta[f])
+                blobs.propagate(blob)
+                done += 1
+        db.session.commit()
+        if on_progress:
+            on_progress(done)
+
+    for model, (col, name, var, prefix, _) in blobs.REFS.items():
+        folder = blobs.LEGACY_FOLDERS[model]
+        last_id = 0
+        while True:
+            chunk = (model.query.filter(model.id > last_id,
+                                        getattr(model, col).is_(None),
+                                        getattr(model, name).isnot(None),
+                                        getattr(model, prefix + "sirka").is_(None),
+                                        or_(getattr(model, var).is_(None), getattr(model, var) != PENDING))
+                     .order_by(model.id).limit(batch).all())
+            if not chunk:
+                break
+            last_id = chunk[-1].id
+            paths = [st.local_path(resolve_key(folder, largest_file(getattr(r, name), getattr(r, var)) or ""))
+                     for r in chunk]
+            for row, meta in zip(chunk, _meta_batch(pool, paths)):
+                if meta:
+                    for f in META_FIELDS:
+                        setattr(row, prefix + f, meta[f])
+                    done += 1
+            db.session.commit()
+            if on_progress:
+                on_progress(done)
+    return done
+
+
+def queue_status() -> dict:
+    rows = db.session.query(ImageJob.stav, func.count(ImageJob.id)).group_by(ImageJob.stav).all()
+    return dict(rows)
+
+
+def cleanup_jobs(days: int = 7) -> int:
+    """Zmaž hotové úlohy staršie ako `days` (neúspešné ostávajú na kontrolu)."""
+    cutoff = datetime.utcnow() - timedelta(days=days)
+    n = (ImageJob.query.filter(ImageJob.stav == "done", ImageJob.finished_at < cutoff)
+         .delete(synchronize_session=False))
+    db.session.commit()
+    return n
+
+
+# -----------------------------
+# Vlákno vo workeri
+# -----------------------------
+_thread = None
+_thread_lock = threading.Lock()
+
+
+def _loop(app):
+    while True:
+        try:
+            run_worker(app)
+        except Exception as e:
+            app.logger.warning(f"Image worker error: {e}")
+            time.sleep(5)
+
+
+def start_image_thread(app) -> bool:
+    """Spusti démonické vlákno s process poolom (raz na proces)."""
+    global _thread
+    if _thread is not None:
+        return False
+    with _thread_lock:
+        if _thread is not None:
+            return False
+        _thread = threading.Thread(target=_loop, args=(app,), name="image-jobs", daemon=True)
+        _thread.start()
+        return True
@@ -1,15 +1,17 @@
 # modules/inzerat.py
 
 import os
-import uuid
 from datetime import datetime
 
-from flask import Blueprint, render_template, request, redirect, url_for, flash, current_app, abort
+from flask import Blueprint, render_template, request, redirect, url_for, flash, abort
 from flask_login import current_user, login_required
 from werkzeug.utils import secure_filename
-from PIL import Image, ImageOps
 
-from models import db, Inzerat, FotoInzerat, Mesto, Report
+from models import db, Inzerat, FotoInzerat, Report
+from utils.images import delete_image
+from modules.image_jobs import store_upload
+from utils.uploads import upload_limit
+from utils.mesta_cache import get_mesto
 try:
     # ak utils/moderation nemáš, nevadí – len preskočíme
     from utils.moderation import auto_moderate_text
@@ -26,36 +28,20 @@ inzerat = Blueprint('inzerat', __name__)
 
 ALLOWED_EXT = {'.jpg', '.jpeg', '.png', '.webp'}
 
-def _upload_dir() -> str:
-    """Cesta z configu + istota, že priečinok existuje."""
-    folder = current_app.config.get('UPLOAD_FOLDER_INZERAT') or os.path.join(current_app.root_path, 'static', 'galeria_inzerat')
-    os.makedirs(folder, exist_ok=True)
-    return folder
+UPLOAD_FOLDER = 'galeria_inzerat'  # prefix v úložisku (utils/storage.py)
 
-def _save_image(file_storage) -> str | None:
-    """Ulož fotku, vráť názov súboru alebo None."""
+def _save_image(file_storage, inzerat_id: int) -> bool:
+    """Ulož fotku k inzerátu (blob + fronta, viď modules/image_jobs.py). True = pridaná."""
     if not file_storage or not file_storage.filename:
-        return None
+        return False
     base = secure_filename(file_storage.filename)
     _, ext = os.path.splitext(base)
     ext = ext.lower()
     if ext not in ALLOWED_EXT:
-        return None
-
-    filename = f"{uuid.uuid4().hex}{ext}"
-    path = os.path.join(_upload_dir(), filename)
+        return False
 
-    try:
-        img = Image.open(file_storage)
-        # oprav orientáciu, zmenši náhľad (max 800 px dlhšia strana)
-        img = ImageOps.exif_transpose(img)
-        img.thumbnail((800, 800))
-        # webp/jpg/png zachováme podľa prípony
-        img.save(path)
-        return filename
-    except Exception as e:
-        current_app.logger.warning(f"Chyba pri ukladaní fotky: {e}")
-        return None
+    row = FotoInzerat(inzerat_id=inzerat_id)
+    return store_upload(file_storage, row)
 
 def _parse_float(val: str | None) -> float | None:
     if not val:
@@ -68,6 +54,7 @@ def _parse_float(val: str | None) -> float | None:
 # 💾 MÔJ BAZÁR – zobrazenie + pridanie cez POST
 @inzerat.route('/moj-bazar', methods=['GET', 'POST'])
 @login_required
+@upload_limit("UPLOAD_GALLERY_MAX_BYTES")
 def moj_bazar():
     if request.method == 'POST':
         # texty
@@ -79,6 +66,10 @@ def moj_bazar():
         # čísla
         cena     = _parse_float(request.form.get('cena'))
         mesto_id = request.form.get('mesto_id', type=int)
+        # našepkávač posiela id v skrytom poli – napísaný text bez výberu = prázdne id
+        if get_mesto(mesto_id) is None:
+            flash("Vyber mesto zo zoznamu návrhov.", "warning")
+            return redirect(url_for('inzerat.moj_bazar'))
 
         novy = Inzerat(
             typ=typ,
@@ -98,9 +89,7 @@ def moj_bazar():
         for fs in request.files.getlist('fotky'):
             if ulozene >= 5:
                 break
-            filename = _save_image(fs)
-            if filename:
-                db.session.add(FotoInzerat(nazov_suboru=filename, inzerat_id=novy.id))
+            if _save_image(fs, novy.id):
                 ulozene += 1
         if ulozene:
             db.session.commit()
@@ -134,8 +123,7 @@ def moj_bazar():
                      .filter_by(pouzivatel_id=current_user.id)
                      .order_by(Inzerat.datum.desc(), Inzerat.id.desc())
                      .all())
-    mesta = Mesto.query.order_by(Mesto.nazov.asc()).all()
-    return render_template('moj_bazar.html', inzeraty=moje_inzeraty, mesta=mesta, kategorie=KATEGORIE)
+    return render_template('moj_bazar.html', inzeraty=moje_inzeraty, kategorie=KATEGORIE)
 
 # 🗑️ ZMAZANIE INZERÁTU – POST (ponechávam aj tvoju pôv. URL kvôli kompatibilite)
 @inzerat.route('/zmaz-inzerat/<int:inzerat_id>', methods=['POST'], endpoint='zmaz_inzerat')
@@ -146,15 +134,9 @@ def zmaz_moj(inzerat_id):
     if inz.pouzivatel_id != current_user.id and not (current_user.is_admin or current_user.is_moderator):
         abort(403)
 
-    # zmaž fyzické súbory
-    folder = _upload_dir()
+    # zmaž fyzické súbory (staré ploché; bloby uvoľní GC podľa ref_count)
     for f in list(inz.fotky):
-        path = os.path.join(folder, f.nazov_suboru)
-        if os.path.exists(path):
-            try:
-                os.remove(path)
-            except Exception:
-                pass
+        delete_image(UPLOAD_FOLDER, f.nazov_suboru, f.varianty)
 
     db.session.delete(inz)  # cascade odstráni FotoInzerat
     db.session.commit()
@@ -164,6 +146,7 @@ def zmaz_moj(inzerat_id):
 # ✏️ UPRAVA INZERÁTU
 @inzerat.route('/uprav-inzerat/<int:inzerat_id>', methods=['GET', 'POST'])
 @login_required
+@upload_limit("UPLOAD_GALLERY_MAX_BYTES")
 def uprav_inzerat(inzerat_id):
     inz = Inzerat.query.get_or_404(inzerat_id)
     if inz.pouzivatel_id != current_user.id and not (current_user.is_admin or current_user.is_moderator):
@@ -177,6 +160,10 @@ def uprav_inzerat(inzerat_id):
         inz.cena      = _parse_float(request.form.get('cena'))
 
         mesto_id = request.form.get('mesto_id', type=int)
+        if get_mesto(mesto_id) is None:
+            db.session.rollback()
+            flash("Vyber mesto zo zoznamu návrhov.", "warning")
+            return redirect(url_for('inzerat.uprav_inzerat', inzerat_id=inz.id))
         inz.mesto_id = mesto_id
 
         # nové fotky (doplníme do limitu 5)
@@ -184,17 +171,14 @@ def uprav_inzerat(inzerat_id):
         for fs in request.files.getlist('fotky'):
             if ulozene >= 5:
                 break
-            filename = _save_image(fs)
-            if filename:
-                db.session.add(FotoInzerat(nazov_suboru=filename, inzerat_id=inz.id))
+            if _save_image(fs, inz.id):
                 ulozene += 1
 
         db.session.commit()
         flash("✅ Inzerát bol úspešne upravený!", "success")
         return redirect(url_for('inzerat.moj_bazar'))
 
-    mesta = Mesto.query.order_by(Mesto.nazov.asc()).all()
-    return render_template('uprav_inzerat.html', inzerat=inz, mesta=mesta, kategorie=KATEGORIE)
+    return render_template('uprav_inzerat.html', inzerat=inz, kategorie=KATEGORIE)
 
 # 🖼️ ZMAZANIE JEDNEJ FOTKY – POST
 @inzerat.route('/zmaz-fotku/<int:foto_id>', methods=['POST'])
@@ -206,12 +190,7 @@ def zmaz_fotku(foto_id):
     if inz.pouzivatel_id != current_user.id and not (current_user.is_admin or current_user.is_moderator):
         abort(403)
 
-    path = os.path.join(_upload_dir(), fotka.nazov_suboru)
-    if os.path.exists(path):
-        try:
-            os.remove(path)
-        except Exception:
-            pass
+    delete_image(UPLOAD_FOLDER, fotka.nazov_suboru, fotka.varianty)
 
     db.session.delete(fotka)
     db.session.commit()
@@ -240,7 +219,6 @@ def bazar_verejny():
 
     typy = [t[0] for t in db.session.query(Inzerat.typ).distinct().all()]
     kategorie = [k[0] for k in db.session.query(Inzerat.kategoria).distinct().all()]
-    mesta = Mesto.query.order_by(Mesto.nazov.asc()).all()
 
     return render_template(
         'bazar.html',
@@ -248,7 +226,6 @@ def bazar_verejny():
         pagination=pagination,
         typy=typy,
         kategorie=kategorie,
-        mesta=mesta,
         vybrany_typ=typ,
         vybrana_kategoria=kategoria,
         vybrane_mesto=mesto_id
@@ -260,7 +237,6 @@ def bazar_detail(inzerat_id):
 
     typy = [t[0] for t in db.session.query(Inzerat.typ).distinct().all()]
     kategorie = [k[0] for k in db.session.query(Inzerat.kategoria).distinct().all()]
-    mesta = Mesto.query.order_by(Mesto.nazov.asc()).all()
 
     return render_template(
         'bazar.html',
@@ -268,7 +244,6 @@ def bazar_detail(inzerat_id):
         pagination=None,
         typy=typy,
         kategorie=kategorie,
-        mesta=mesta,
         vybrany_typ=None,
         vybrana_kategoria=None,
         vybrane_mesto=None,
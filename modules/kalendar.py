@@ -124,7 +124,7 @@ def udalosti_v_dni(datum):
 
     if current_user.is_authenticated:
         udalosti = Udalost.query.filter(
-            db.func.date(Udalost.datum) == datum_obj,
+            Udalost.datum == datum_obj,  # stĺpec je Date – bez func.date (nie je všade, a zabíja index)
             ((Udalost.pouzivatel_id == current_user.id) |
              (Udalost.skupina_id.in_([s.id for s in current_user.skupina_clen])))
         ).all()
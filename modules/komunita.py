@@ -1,10 +1,13 @@
 # modules/komunita.py
 from datetime import datetime, timedelta
-from flask import Blueprint, render_template, request, redirect, url_for, flash, abort
+from flask import Blueprint, render_template, request, redirect, url_for, flash, abort, current_app
 from flask_login import current_user, login_required
 from sqlalchemy import or_, func, and_
-from models import db, Pouzivatel, ForumTopic, TopicWatch, RychlyDopyt, Mesto, ForumPost
+from models import db, Pouzivatel, ForumTopic, TopicWatch, RychlyDopyt, ForumPost
 from models import ForumPost
+from utils.unread import adjust_unread
+from utils.fulltext import people_hits, with_snippets, forum_hits, forum_rank, with_forum_hits
+from utils.search_keys import key_contains
 
 komunita_bp = Blueprint("komunita", __name__, template_folder="../templates")
 
@@ -22,14 +25,15 @@ def hub():
         # ⬇️ LEN FYZICKÉ OSOBY
         qry = Pouzivatel.query.filter(Pouzivatel.typ_subjektu != 'ico')
 
-        # fulltext-lite len cez FO polia
-        if q_text:
-            like = f"%{q_text}%"
+        # fulltext (utils/fulltext.py); bez FTS5 kľúče bez diakritiky cez FO polia
+        hits = people_hits(q_text) if q_text else None
+        if hits is not None:
+            qry = qry.join(hits, hits.c.id == Pouzivatel.id).add_columns(hits.c.snippet)
+        elif q_text:
             qry = qry.filter(or_(
-                Pouzivatel.prezyvka.ilike(like),
-                Pouzivatel.meno.ilike(like),
-                Pouzivatel.priezvisko.ilike(like),
-                Pouzivatel.email.ilike(like),
+                key_contains(Pouzivatel.prezyvka_key, q_text),
+                key_contains(Pouzivatel.meno_key, q_text),
+                Pouzivatel.email.ilike(f"%{q_text}%"),
             ))
 
         # mesto: FO používa 'obec'
@@ -44,10 +48,10 @@ def hub():
         if vip_only and getattr(current_user, "is_authenticated", False) and getattr(current_user, "is_admin", False):
             qry = qry.filter(Pouzivatel.is_vip.is_(True))
 
-        users = qry.order_by(func.lower(Pouzivatel.prezyvka)).all()
-
-        # mestá do selectu vo filtre
-        mesta_all = Mesto.query.order_by(Mesto.nazov.asc()).all()
+        if hits is not None:
+            users = with_snippets(qry.order_by(hits.c.rank, func.lower(Pouzivatel.prezyvka)).all())
+        else:
+            users = qry.order_by(func.lower(Pouzivatel.prezyvka)).all()
 
         ctx.update(
             users=users,
@@ -55,7 +59,6 @@ def hub():
             mesto=mesto,
             zaner=zaner,
             vip_only=vip_only,
-            mesta_all=mesta_all,
         )
 
     elif tab == "organizacie":
@@ -65,12 +68,14 @@ def hub():
 
         qry = Pouzivatel.query.filter(Pouzivatel.typ_subjektu == 'ico')
 
-        if q_text:
-            like = f"%{q_text}%"
+        hits = people_hits(q_text) if q_text else None
+        if hits is not None:
+            qry = qry.join(hits, hits.c.id == Pouzivatel.id).add_columns(hits.c.snippet)
+        elif q_text:
             qry = qry.filter(or_(
-                Pouzivatel.organizacia_nazov.ilike(like),
-                Pouzivatel.prezyvka.ilike(like),
-                Pouzivatel.email.ilike(like),
+                key_contains(Pouzivatel.organizacia_key, q_text),
+                key_contains(Pouzivatel.prezyvka_key, q_text),
+                Pouzivatel.email.ilike(f"%{q_text}%"),
             ))
 
         if mesto:
@@ -79,15 +84,17 @@ def hub():
         if zaner:
             qry = qry.filter(Pouzivatel.org_zaradenie == zaner)
 
-        orgs = qry.order_by(
+        order = [
             (Pouzivatel.organizacia_nazov.is_(None)).asc(),  # nech None ide dole
             Pouzivatel.organizacia_nazov.asc(),
             Pouzivatel.prezyvka.asc()
-        ).all()
-
-        mesta_all = Mesto.query.order_by(Mesto.nazov.asc()).all()
+        ]
+        if hits is not None:
+            orgs = with_snippets(qry.order_by(hits.c.rank, *order).all())
+        else:
+            orgs = qry.order_by(*order).all()
 
-        ctx.update(orgs=orgs, mesta_all=mesta_all, q=q_text, mesto=mesto, zaner=zaner)
+        ctx.update(orgs=orgs, q=q_text, mesto=mesto, zaner=zaner)
 
 
     elif tab == "rychly-dopyt":
@@ -111,12 +118,19 @@ def hub():
 
     elif tab == "forum":
         q_text = (request.args.get("q") or "").strip()
-        sort = request.args.get("sort", "activity")
+        sort = request.args.get("sort") or ("relevance" if q_text else "activity")
         view = request.args.get("view")
+        page = max(request.args.get("page", 1, type=int), 1)
+        per_page = current_app.config.get("FORUM_PAGE_SIZE", 50)
 
         q = ForumTopic.query
 
-        if q_text:
+        # fulltext cez témy aj odpovede (utils/fulltext.py); bez FTS5 ilike na tému
+        hits = forum_hits(q_text) if q_text else None
+        if hits is not None:
+            q = q.join(hits, hits.c.topic_id == ForumTopic.id) \
+                 .add_columns(hits.c.post_id, hits.c.snippet, hits.c.hits)
+        elif q_text:
             like = f"%{q_text}%"
             q = q.filter(or_(ForumTopic.nazov.ilike(like),
                              ForumTopic.body.ilike(like)))
@@ -125,14 +139,15 @@ def hub():
             if view == "mine":
                 q = q.filter(ForumTopic.autor_id == current_user.id)
             elif view == "replied":
-                q = q.join(ForumPost, ForumPost.topic_id == ForumTopic.id) \
-                     .filter(ForumPost.autor_id == current_user.id) \
-                     .distinct(ForumTopic.id)
+                # EXISTS namiesto JOIN + DISTINCT ON (to vie len PostgreSQL)
+                q = q.filter(ForumTopic.posts.any(ForumPost.autor_id == current_user.id))
             elif view == "watching":
                 q = q.join(TopicWatch, TopicWatch.topic_id == ForumTopic.id) \
                      .filter(TopicWatch.user_id == current_user.id)
 
-        if sort == "newest":
+        if sort == "relevance" and hits is not None:
+            q = q.order_by(forum_rank(hits, ForumTopic.aktivita_at), ForumTopic.aktivita_at.desc())
+        elif sort == "newest":
             q = q.order_by(ForumTopic.vytvorene_at.desc())
         elif sort == "answers":
             answers_sq = db.session.query(
@@ -146,18 +161,24 @@ def hub():
         else:
             q = q.order_by(ForumTopic.aktivita_at.desc())
 
-        topics = q.limit(50).all()
+        # o jeden navyše → vieme, či existuje ďalšia strana, bez COUNT(*)
+        topics = q.limit(per_page + 1).offset((page - 1) * per_page).all()
+        has_next = len(topics) > per_page
+        topics = topics[:per_page]
+        if hits is not None:
+            topics = with_forum_hits(topics)
         selected_id = request.args.get("t", type=int)
         selected_topic = ForumTopic.query.get(selected_id) if selected_id else None
 
         if selected_topic and getattr(current_user, "is_authenticated", False):
             try:
                 from models import ForumNotification
-                (ForumNotification.query
+                n = (ForumNotification.query
                     .filter_by(user_id=current_user.id,
                                topic_id=selected_topic.id,
                                read_at=None)
                     .update({"read_at": datetime.utcnow()}, synchronize_session=False))
+                adjust_unread(current_user.id, forum=-n)
                 db.session.commit()
             except Exception:
                 pass
@@ -168,7 +189,8 @@ def hub():
                 r.topic_id for r in TopicWatch.query.filter_by(user_id=current_user.id).all()
             }
 
-        ctx.update(topics=topics, selected_topic=selected_topic, watched_ids=watched_ids)
+        ctx.update(topics=topics, selected_topic=selected_topic, watched_ids=watched_ids,
+                   q=q_text, sort=sort, page=page, has_next=has_next)
 
     return render_template("komunita.html", **ctx)
 
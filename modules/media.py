@@ -0,0 +1,157 @@
+# modules/media.py
+"""
+Servovanie nahratých súborov cez /media/<kľúč> (UPLOAD_SERVE_MODE != static).
+
+Flask overí prístup (súkromné galérie podľa `verejny_ucet`) a nastaví hlavičky,
+bajty pošle front proxy:
+- x-accel    – nginx, hlavička X-Accel-Redirect: UPLOAD_ACCEL_PREFIX/<kľúč>
+- x-sendfile – Apache mod_xsendfile / lighttpd, X-Sendfile: <absolútna cesta>
+- flask      – send_file priamo z workera (vývoj, bez proxy)
+- static     – (default) odkazy idú na /static, tento blueprint sa nepoužíva
+
+Súbory s hashom obsahu (blobs/ab/cd/<sha>_480.webp) sa nikdy nemenia:
+Cache-Control immutable na rok + ETag z názvu, If-None-Match = 304 bez
+čítania disku. Ostatné dostanú krátku cache (UPLOAD_CACHE_SECONDS).
+
+nginx (static/ aplikácie ako internal location, priamy prístup na upload
+adresáre zakázaný, nech sa nedá obísť kontrola):
+
+    location /_uploads/ {
+        internal;
+        alias /srv/muzikuj/static/;
+    }
+    location ~ ^/static/(blobs|galeria_pouzivatel)/ { return 404; }
+"""
+import mimetypes
+import os
+import re
+
+from flask import Blueprint, Response, abort, current_app, request, send_file
+from flask_login import current_user
+from sqlalchemy import or_
+
+from models import db, Blob, GaleriaPouzivatel, Pouzivatel
+from utils.blobs import BLOB_PREFIX
+from utils.storage import get_storage
+
+media_bp = Blueprint("media", __name__)
+
+SERVE_MODES = ("static", "flask", "x-accel", "x-sendfile")
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+# adresáre len s uploadmi, ktoré môžu byť súkromné – /static/ ich pri media režime nevydá
+PRIVATE_PREFIXES = (BLOB_PREFIX, "galeria_pouzivatel")
+
+_HASHED = re.compile(rf"^{BLOB_PREFIX}/[0-9a-f]{{2}}/[0-9a-f]{{2}}/([0-9a-f]{{64}})_\d+\.(?:webp|jpg)$")
+_SIZED = re.compile(r"^(.+)_\d+\.(?:webp|jpg)$")
+
+
+def _like_prefix(s: str) -> str:
+    return s.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "\\_%"
+
+
+def _gallery_owners(key: str) -> set[int] | None:
+    """
+    Vlastníci galérií, cez ktoré je súbor viditeľný, ak je viditeľný LEN cez
+    súkromné galérie; None = súbor je verejný (alebo nepatrí galérii používateľa).
+    """
+    q = (db.session.query(GaleriaPouzivatel.pouzivatel_id, Pouzivatel.verejny_ucet)
+         .join(Pouzivatel, Pouzivatel.id == GaleriaPouzivatel.pouzivatel_id))
+    m = _HASHED.match(key)
+    if m:
+        blob = db.session.query(Blob.id, Blob.ref_count).filter(Blob.sha256 == m.group(1)).first()
+        if blob is None:
+            return None
+        rows = q.filter(GaleriaPouzivatel.blob_id == blob.id).all()
+        if len(rows) < blob.ref_count:
+            return None  # rovnaký obsah aj inde (inzerát, podujatie …) => verejný
+    elif key.startswith("galeria_pouzivatel/"):
+        name = key.split("/", 1)[1]
+        if "/" in name:
+            name = key  # po `flask uploads-shard` je v DB celý kľúč
+        m = _SIZED.match(name)
+        cond = GaleriaPouzivatel.nazov_suboru == name
+        if m:
+            cond = or_(cond, GaleriaPouzivatel.nazov_suboru.like(_like_prefix(m.group(1)), escape="\\"))
+        rows = q.filter(cond).all()
+    else:
+        return None
+
+    if not rows or any(public for _, public in rows):
+        return None
+    return {uid for uid, _ in rows}
+
+
+def _can_view(owners: set[int] | None) -> bool:
+    """Súkromnú galériu vidí len vlastník a admin/moderátor (ako profil_view)."""
+    if owners is None:
+        return True
+    if not current_user.is_authenticated:
+        return False
+    return current_user.id in owners or current_user.is_admin or current_user.is_moderator
+
+
+def _cache_headers(resp: Response, key: str, private: bool):
+    m = _HASHED.match(key)
+    scope = "private" if private else "public"
+    if m:
+        resp.set_etag(os.path.basename(key))
+        resp.headers["Cache-Control"] = f"{scope}, max-age={IMMUTABLE_MAX_AGE}, immutable"
+    else:
+        resp.headers["Cache-Control"] = f"{scope}, max-age={current_app.config['UPLOAD_CACHE_SECONDS']}"
+    if private:
+        resp.vary.add("Cookie")
+
+
+@media_bp.route("/media/<path:key>", methods=["GET", "HEAD"])
+def serve(key):
+    mode = current_app.config["UPLOAD_SERVE_MODE"]
+    st = get_storage()
+    if mode == "static" or st.local_dir("") is None:
+        abort(404)
+    try:
+        path = st.local_path(key)
+    except ValueError:
+        abort(404)
+
+    owners = _gallery_owners(key)
+    if not _can_view(owners):
+        abort(404)  # neprezrádzaj, že súbor existuje
+    private = owners is not None
+
+    # ETag hashovaného súboru poznáme bez disku
+    if _HASHED.match(key) and request.if_none_match.contains(os.path.basename(key)):
+        resp = Response(status=304)
+        _cache_headers(resp, key, private)
+        return resp
+
+    if not os.path.isfile(path):
+        abort(404)
+
+    if mode == "flask":
+        resp = send_file(path, conditional=True, etag=not _HASHED.match(key), max_age=None)
+    else:
+        resp = Response(mimetype=mimetypes.guess_type(key)[0] or "application/octet-stream")
+        if mode == "x-accel":
+            resp.headers["X-Accel-Redirect"] = f"{current_app.config['UPLOAD_ACCEL_PREFIX'].rstrip('/')}/{key}"
+        else:
+            resp.headers["X-Sendfile"] = path
+    _cache_headers(resp, key, private)
+    return resp
+
+
+def _block_private_static():
+    """V media režime nevydávaj súkromné adresáre cez /static (obchádzalo by kontrolu)."""
+    if request.endpoint != "static":
+        return
+    filename = (request.view_args or {}).get("filename", "")
+    if filename.split("/", 1)[0] in PRIVATE_PREFIXES:
+        abort(404)
+
+
+def init_media(app):
+    mode = app.config.get("UPLOAD_SERVE_MODE", "static")
+    if mode not in SERVE_MODES:
+        raise RuntimeError(f"neznámy UPLOAD_SERVE_MODE: {mode!r} ({' | '.join(SERVE_MODES)})")
+    app.register_blueprint(media_bp)
+    if mode != "static":
+        app.before_request(_block_private_static)
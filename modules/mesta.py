@@ -0,0 +1,26 @@
+# modules/mesta.py
+from flask import Blueprint, request, jsonify
+
+from utils.mesta_suggest import suggest
+
+mesta_bp = Blueprint("mesta", __name__, url_prefix="/api/mesta")
+
+MAX_LIMIT = 20
+
+
+@mesta_bp.get("/suggest")
+def suggest_api():
+    """
+    Autocomplete miest: ?q=<prefix>&limit=<n>
+    Odpoveď je kompaktná: {"items": [[id, nazov, okres, kraj], ...]}
+    """
+    q = (request.args.get("q") or "").strip()
+    limit = request.args.get("limit", 10, type=int) or 10
+    limit = max(1, min(MAX_LIMIT, limit))
+
+    items = [list(m) for m in suggest(q, limit)] if q else []
+
+    resp = jsonify({"items": items})
+    resp.headers["Cache-Control"] = "public, max-age=300"
+    return resp
+
@@ -1,10 +1,10 @@
 # modules/moderacia.py
-import os
 from flask import Blueprint, render_template, request, redirect, url_for, flash, abort, current_app
 from flask_login import current_user, login_required
 from models import db, Report, ModerationLog, Pouzivatel, Dopyt, Sprava, Inzerat, Reklama, ReklamaReport
 from datetime import datetime, timedelta
 from utils.auth import admin_required, mod_required
+from utils.images import delete_image
 from sqlalchemy.orm import joinedload
 
 moder_bp = Blueprint("moderacia", __name__, url_prefix="/admin")
@@ -124,6 +124,25 @@ def dashboard():
         dopyty_active=dopyty_active,
     )
 
+@moder_bp.route("/perf", methods=["GET", "POST"])
+@admin_required
+def perf():
+    """Klzné okno meraní requestov (utils/perf.py); POST vynuluje."""
+    from utils.perf import snapshot, reset, BUCKETS_MS
+    from utils.nplusone import recent_reports, reset as reset_nplusone
+    if request.method == "POST":
+        reset()
+        reset_nplusone()
+        flash("Merania vynulované.", "success")
+        return redirect(url_for("moderacia.perf"))
+    return render_template(
+        "admin/perf.html",
+        rows=snapshot(),
+        buckets=BUCKETS_MS,
+        nplusone=recent_reports(),
+        window=current_app.config.get("PERF_WINDOW"),
+    )
+
 @moder_bp.post("/moder/akcia")   # /admin/moder/akcia
 @mod_required
 def nejaka_mod_akcia():
@@ -198,15 +217,9 @@ def reklamy_report_action(rid, action):
         rep.action = 'pause'
 
     elif action == 'remove' and ad:
-        # Zmaž súbor aj záznam
-        try:
-            if ad.foto_nazov:
-                p = os.path.join(current_app.root_path, 'static', 'reklamy', ad.foto_nazov)
-                if os.path.exists(p):
-                    os.remove(p)
-            db.session.delete(ad)
-        except Exception:
-            pass
+        # Zmaž súbor aj záznam (blob uvoľní GC podľa ref_count)
+        delete_image('reklamy', ad.foto_nazov, ad.foto_varianty)
+        db.session.delete(ad)
         rep.action = 'remove'
 
     else:
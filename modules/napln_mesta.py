@@ -4,6 +4,7 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from app import app
 from models import db, Mesto
+from utils.mesta_cache import invalidate_mesta_cache
 
 DATA_DIR = os.path.join(os.path.dirname(__file__), '..', 'data')
 
@@ -139,6 +140,8 @@ def napln_mesta():
         if to_add:
             db.session.bulk_save_objects(to_add)
             db.session.commit()
+            # bulk_save_objects obchádza ORM eventy → invaliduj cache ručne
+            invalidate_mesta_cache()
 
         after = Mesto.query.count()
         print(f"✅ Hotovo. Teraz {after} záznamov (pridaných {after - before}).")
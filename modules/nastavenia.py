@@ -4,9 +4,10 @@ from flask_login import login_required, current_user, logout_user
 from werkzeug.security import check_password_hash, generate_password_hash
 from werkzeug.exceptions import NotFound
 from models import db, Pouzivatel   # ← dôležité: importujem aj Pouzivatel
+from modules.outbox import enqueue
+from modules.forum_digest import digest_choice, with_digest_choice
 from datetime import datetime, timedelta
-import secrets, smtplib, ssl
-from email.mime.text import MIMEText
+import secrets
 from email.utils import formataddr
 from urllib.parse import urljoin
 from sqlalchemy import or_
@@ -23,20 +24,13 @@ ALLOWED_THEMES = set(getattr(Pouzivatel, "THEMES",
 @nastavenia_bp.get("")
 @login_required
 def prehlad():
-    return render_template("nastavenia.html")
+    return render_template("nastavenia.html", forum_digest=digest_choice(current_user))
 
 def _send_delete_email(to_email, subject, html_body):
+    """Zaraď potvrdzovací e-mail do outboxu (modules/outbox.py); commit robí volajúci."""
     cfg = current_app.config
-    msg = MIMEText(html_body, "html", "utf-8")
-    msg["Subject"] = subject
-    msg["From"] = formataddr(("muzikuj.sk", cfg.get("SMTP_SENDER", "noreply@muzikuj.sk")))
-    msg["To"] = to_email
-
-    context = ssl.create_default_context()
-    with smtplib.SMTP(cfg["SMTP_SERVER"], cfg["SMTP_PORT"]) as server:
-        server.starttls(context=context)
-        server.login(cfg["SMTP_USERNAME"], cfg["SMTP_PASSWORD"])
-        server.send_message(msg)
+    sender = formataddr(("muzikuj.sk", cfg.get("SMTP_SENDER", "noreply@muzikuj.sk")))
+    return enqueue(to_email, subject, html=html_body, kind="vymazanie_uctu", sender=sender)
 
 @nastavenia_bp.post("/ucet")
 @login_required
@@ -57,7 +51,6 @@ def ucet():
         current_user.erase_token = token
         current_user.erase_requested_at = datetime.utcnow()
         current_user.erase_deadline_at = datetime.utcnow() + timedelta(hours=24)
-        db.session.commit()
 
         # linky
         base = request.host_url
@@ -78,13 +71,13 @@ def ucet():
         </div>
         """
 
-        try:
-            _send_delete_email(current_user.email, "Potvrdenie vymazania účtu – muzikuj.sk", html)
-            flash("Verifikácia vymazania účtu vám bola poslaná na e-mail.", "info")
-        except Exception as e:
-            current_app.logger.error(f"Send delete email failed: {e}")
+        # token aj e-mail v jednej transakcii – bez e-mailu žiadosť neplatí
+        if _send_delete_email(current_user.email, "Potvrdenie vymazania účtu – muzikuj.sk", html) is None:
+            db.session.rollback()
             flash("Nepodarilo sa odoslať potvrdzovací e-mail. Skúste neskôr.", "danger")
             return redirect(url_for(".prehlad")+"#ucet")
+        db.session.commit()
+        flash("Verifikácia vymazania účtu vám bola poslaná na e-mail.", "info")
 
         # okamžitý logout + blokovanie ďalšieho loginu kým je pending
         logout_user()
@@ -140,6 +133,7 @@ def sledovanie():
     mode = request.form.get("follow_mode","all")
     zanre = request.form.getlist("zanre")            # ['folklor','rock',...]
     entities = request.form.getlist("entities")      # ['kapely','hudobnici',...]
+    entities = with_digest_choice(entities, request.form.get("forum_digest"))  # 'off' | 'hourly' | 'daily'
 
     current_user.follow_mode = mode
     current_user.follow_zanre = ",".join(sorted(set(zanre)))
@@ -0,0 +1,409 @@
+# modules/outbox.py
+"""
+Odchádzajúce e-maily cez tabuľku `email_outbox` (transakčný outbox).
+
+Request len zavolá enqueue() – riadok sa uloží v tej istej transakcii ako
+zmena, ku ktorej e-mail patrí (dopyt, správa, žiadosť o vymazanie …), takže
+request nečaká na SMTP a pri rollbacku sa nič neodošle.
+
+Worker si dávku berie atómovým UPDATE (lease ako v modules/image_jobs).
+Lease pokryje celú dávku aj pri pomalom serveri (lease_seconds: ⌈dávka /
+spojenia⌉ × 2 × SMTP_TIMEOUT + rezerva) a výsledok sa zapíše len do riadkov,
+ktoré worker stále drží (lease_owner) – prebraný riadok sa nepošle dvakrát
+tým istým workerom ani neprepíše. Posiela sa cez SmtpPool: OUTBOX_SMTP_CONNECTIONS trvalých spojení (STARTTLS +
+login raz, nie pri každej správe), každé vo vlastnom vlákne. Spojenie sa po
+nečinnosti overí NOOP, po páde sa raz obnoví, po OUTBOX_SMTP_IDLE_SECONDS
+bez práce sa zavrie.
+
+Výsledok sa zapíše do riadku: sent, alebo pending s ďalším pokusom o
+OUTBOX_BACKOFF_SECONDS × 2^(pokus-1) (max 6 h), alebo failed – trvalá chyba
+(5xx, odmietnutý príjemca) alebo vyčerpané pokusy.
+
+OUTBOX_MODE:
+  thread – vlákno v každom web workeri (default)
+  cli    – samostatný proces `flask outbox-worker`
+
+Smoke test proti lokálnemu aiosmtpd: python outbox_smoke.py.
+Lokálne bez skutočného SMTP: python -m aiosmtpd -n -l 127.0.0.1:1025 a
+SMTP_SERVER=127.0.0.1 SMTP_PORT=1025 SMTP_STARTTLS=0 SMTP_AUTH=0.
+"""
+import math
+import os
+import queue
+import random
+import smtplib
+import socket
+import ssl
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from email.message import EmailMessage
+from email.utils import formatdate, make_msgid, parseaddr
+
+from flask import current_app
+from sqlalchemy import and_, event, func, or_, update
+from sqlalchemy.orm import Session
+
+from models import db, EmailOutbox
+
+_tbl = EmailOutbox.__table__
+
+_LEASE_MIN_SECONDS = 300
+_LEASE_MARGIN_SECONDS = 60
+_MAX_BACKOFF = 6 * 3600
+_wake = threading.Event()
+
+
+def _owner() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}"
+
+
+# -----------------------------
+# Strana requestu
+# -----------------------------
+def mail_configured(cfg=None) -> bool:
+    cfg = cfg or current_app.config
+    if not cfg.get("SMTP_SERVER") or not (cfg.get("SMTP_SENDER") or cfg.get("SMTP_USERNAME")):
+        return False
+    return not cfg.get("SMTP_AUTH", True) or bool(cfg.get("SMTP_USERNAME") and cfg.get("SMTP_PASSWORD"))
+
+
+def enqueue(to_email: str | None, subject: str, text: str | None = None, html: str | None = None,
+            kind: str | None = None, sender: str | None = None) -> EmailOutbox | None:
+    """
+    Pridaj e-mail do session; odošle ho worker po commite volajúceho.
+    Vráti None, ak nie je komu poslať alebo SMTP nie je nastavené.
+    """
+    to_email = (to_email or "").strip()
+    if not to_email:
+        return None
+    if not mail_configured():
+        current_app.logger.warning("SMTP not configured properly; skipping email send.")
+        return None
+    row = EmailOutbox(kind=kind, to_email=to_email, sender=sender, subject=(subject or "")[:255],
+                      body_text=text, body_html=html)
+    db.session.add(row)
+    db.session.info["outbox_wake"] = True
+    return row
+
+
+@event.listens_for(Session, "after_commit")
+def _wake_after_commit(session):
+    # vlákno workera nemusí čakať na ďalší poll
+    if session.info.pop("outbox_wake", False):
+        _wake.set()
+
+
+# -----------------------------
+# SMTP spojenia
+# -----------------------------
+class SmtpConnection:
+    """Jedno trvalé SMTP spojenie; pripojí sa pri prvom odoslaní."""
+
+    def __init__(self, cfg: dict):
+        self.host = cfg["SMTP_SERVER"]
+        self.port = int(cfg.get("SMTP_PORT", 587))
+        self.username = cfg.get("SMTP_USERNAME")
+        self.password = cfg.get("SMTP_PASSWORD")
+        self.starttls = cfg.get("SMTP_STARTTLS", True)
+        self.auth = cfg.get("SMTP_AUTH", True)
+        self.timeout = float(cfg.get("SMTP_TIMEOUT", 30))
+        self.max_per_conn = int(cfg.get("OUTBOX_SMTP_MAX_PER_CONNECTION", 100))
+        self.smtp = None
+        self.used_at = 0.0
+        self.sent = 0
+
+    def _connect(self):
+        s = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        try:
+            s.ehlo()
+            if self.starttls:
+                s.starttls(context=ssl.create_default_context())
+                s.ehlo()
+            if self.auth and self.username and self.password:
+                s.login(self.username, self.password)
+        except BaseException:
+            s.close()
+            raise
+        self.smtp, self.sent = s, 0
+
+    def _alive(self) -> bool:
+        if time.monotonic() - self.used_at < 10:
+            return True
+        try:
+            return self.smtp.noop()[0] == 250
+        except (smtplib.SMTPException, OSError):
+            return False
+
+    def send(self, msg: EmailMessage):
+        if self.smtp is not None and (self.sent >= self.max_per_conn or not self._alive()):
+            self.close()
+        if self.smtp is None:
+            self._connect()
+        try:
+            self.smtp.send_message(msg)
+        except (smtplib.SMTPServerDisconnected, ConnectionError):
+            # server zavrel nečinné spojenie – raz skús nové
+            self.close()
+            self._connect()
+            self.smtp.send_message(msg)
+        self.sent += 1
+        self.used_at = time.monotonic()
+
+    def close(self):
+        if self.smtp is None:
+            return
+        try:
+            self.smtp.quit()
+        except (smtplib.SMTPException, OSError):
+            self.smtp.close()
+        self.smtp = None
+
+    @property
+    def idle(self) -> float:
+        return time.monotonic() - self.used_at if self.smtp is not None else 0.0
+
+
+class SmtpPool:
+    """`size` spojení, každé používa naraz len jedno vlákno."""
+
+    def __init__(self, cfg: dict, size: int | None = None):
+        size = max(1, size or int(cfg.get("OUTBOX_SMTP_CONNECTIONS", 2)))
+        self.conns = [SmtpConnection(cfg) for _ in range(size)]
+        self.free = queue.Queue()
+        for c in self.conns:
+            self.free.put(c)
+        self.executor = ThreadPoolExecutor(max_workers=size, thread_name_prefix="smtp")
+
+    def _send(self, msg: EmailMessage) -> Exception | None:
+        conn = self.free.get()
+        try:
+            conn.send(msg)
+            return None
+        except (smtplib.SMTPRecipientsRefused, smtplib.SMTPResponseException) as e:
+            return e  # odmietnutá správa – smtplib spravil RSET, spojenie ostáva
+        except Exception as e:
+            conn.close()  # stav SMTP session nepoznáme – ďalšia správa pôjde cez nové spojenie
+            return e
+        finally:
+            self.free.put(conn)
+
+    def send_many(self, msgs: list[EmailMessage]) -> list[Exception | None]:
+        return list(self.executor.map(self._send, msgs))
+
+    def close_idle(self, seconds: float):
+        for _ in range(len(self.conns)):
+            conn = self.free.get()
+            if conn.idle > seconds:
+                conn.close()
+            self.free.put(conn)
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+        for c in self.conns:
+            c.close()
+
+
+# -----------------------------
+# Worker
+# -----------------------------
+def lease_seconds(cfg, limit: int, connections: int) -> int:
+    """
+    Ako dlho môže dávka trvať: každé spojenie pošle ⌈limit / connections⌉ správ,
+    jedna správa až 2 × SMTP_TIMEOUT (NOOP / nové spojenie + odoslanie).
+    Kratší lease by iný worker prebral ešte počas posielania → dvojité e-maily.
+    """
+    per_conn = math.ceil(limit / max(1, connections))
+    timeout = float(cfg.get("SMTP_TIMEOUT", 30))
+    return max(_LEASE_MIN_SECONDS, int(per_conn * 2 * timeout) + _LEASE_MARGIN_SECONDS)
+
+
+def _claim(owner: str, limit: int, lease: int = _LEASE_MIN_SECONDS) -> list:
+    """Zober si až `limit` e-mailov na rade (pending po termíne alebo sending s prepadnutým lease)."""
+    now = datetime.utcnow()
+    free = or_(and_(_tbl.c.stav == "pending", _tbl.c.next_attempt_at <= now),
+               and_(_tbl.c.stav == "sending", _tbl.c.lease_until < now))
+    ids = [r[0] for r in db.session.query(EmailOutbox.id).filter(free)
+           .order_by(EmailOutbox.next_attempt_at, EmailOutbox.id).limit(limit).all()]
+    if not ids:
+        return []
+    db.session.execute(
+        update(_tbl).where(_tbl.c.id.in_(ids), free)
+        .values(stav="sending", lease_owner=owner,
+                lease_until=now + timedelta(seconds=lease),
+                attempts=_tbl.c.attempts + 1)
+    )
+    db.session.commit()
+    return (EmailOutbox.query.filter(EmailOutbox.id.in_(ids), EmailOutbox.lease_owner == owner,
+                                     EmailOutbox.stav == "sending")
+            .order_by(EmailOutbox.id).all())
+
+
+def build_message(row: EmailOutbox, cfg=None) -> EmailMessage:
+    cfg = cfg or current_app.config
+    msg = EmailMessage()
+    msg["From"] = row.sender or cfg.get("SMTP_SENDER") or cfg.get("SMTP_USERNAME")
+    msg["To"] = row.to_email
+    msg["Subject"] = row.subject
+    msg["Date"] = formatdate(localtime=True)
+    domain = parseaddr(msg["From"])[1].rpartition("@")[2] or None  # bez domény by make_msgid volal DNS
+    msg["Message-ID"] = make_msgid(idstring=f"outbox{row.id}", domain=domain)
+    if row.body_text is not None or not row.body_html:
+        msg.set_content(row.body_text or "")
+        if row.body_html:
+            msg.add_alternative(row.body_html, subtype="html")
+    else:
+        msg.set_content(row.body_html, subtype="html")
+    return msg
+
+
+def _permanent(e: Exception) -> bool:
+    """Chyba, ktorú opakovanie nevyrieši (zlá adresa, 5xx na správu)."""
+    if isinstance(e, smtplib.SMTPAuthenticationError):
+        return False  # chyba konfigurácie, nie správy – skúšame ďalej
+    if isinstance(e, smtplib.SMTPRecipientsRefused):
+        return all(code >= 500 for code, _ in e.recipients.values())
+    if isinstance(e, smtplib.SMTPResponseException):
+        return e.smtp_code >= 500
+    return isinstance(e, (ValueError, UnicodeError))  # správu nejde ani zostaviť
+
+
+def backoff_seconds(attempts: int, base: int) -> int:
+    delay = min(base * 2 ** max(0, attempts - 1), _MAX_BACKOFF)
+    return int(delay * random.uniform(0.9, 1.1))
+
+
+def _result(attempts: int, error: Exception | None, cfg) -> dict:
+    """Hodnoty stĺpcov po pokuse o odoslanie."""
+    now = datetime.utcnow()
+    values = dict(lease_owner=None, lease_until=None)
+    if error is None:
+        return dict(values, stav="sent", sent_at=now, error=None)
+    values["error"] = f"{type(error).__name__}: {error}"[:2000]
+    if _permanent(error) or attempts >= int(cfg.get("OUTBOX_MAX_ATTEMPTS", 8)):
+        return dict(values, stav="failed")
+    delay = backoff_seconds(attempts, int(cfg.get("OUTBOX_BACKOFF_SECONDS", 60)))
+    return dict(values, stav="pending", next_attempt_at=now + timedelta(seconds=delay))
+
+
+def _finish(row_id: int, owner: str, values: dict) -> bool:
+    """Zapíš výsledok, len ak riadok stále držíme; False = lease prebral iný worker."""
+    res = db.session.execute(
+        update(_tbl).where(_tbl.c.id == row_id, _tbl.c.lease_owner == owner, _tbl.c.stav == "sending")
+        .values(**values))
+    return res.rowcount == 1
+
+
+def process_batch(pool: SmtpPool, owner: str | None = None, limit: int = 50) -> int:
+    """Odošli jednu dávku cez `pool`. Vráti počet spracovaných e-mailov."""
+    cfg = current_app.config
+    owner = owner or _owner()
+    rows = _claim(owner, limit, lease_seconds(cfg, limit, len(pool.conns)))
+    if not rows:
+        return 0
+    claimed = [(row.id, row.to_email, row.attempts) for row in rows]
+    msgs, errors = [], {}
+    for row in rows:
+        try:
+            msgs.append((row.id, build_message(row, cfg)))
+        except Exception as e:
+            errors[row.id] = e
+    db.session.rollback()  # nedrž transakciu (SQLite zámok) počas SMTP
+
+    results = pool.send_many([m for _, m in msgs])
+    for (row_id, _), err in zip(msgs, results):
+        errors[row_id] = err
+    for row_id, to_email, attempts in claimed:
+        values = _result(attempts, errors.get(row_id), cfg)
+        if not _finish(row_id, owner, values):
+            current_app.logger.warning("outbox: %s → %s: lease stratený, výsledok nezapisujem", row_id, to_email)
+            continue
+        if values.get("error"):
+            current_app.logger.warning("outbox: %s → %s: %s", row_id, to_email, values["error"])
+    db.session.commit()
+    return len(rows)
+
+
+def run_sender(app, once: bool = False, on_batch=None):
+    """Slučka workera (CLI aj vlákno). `once` = odošli, čo je na rade, a skonči."""
+    with app.app_context():
+        cfg = app.config
+        if not mail_configured(cfg):
+            app.logger.warning("outbox: SMTP nie je nastavené, worker nebeží")
+            return
+        poll = float(cfg.get("OUTBOX_POLL_SECONDS", 5))
+        idle = float(cfg.get("OUTBOX_SMTP_IDLE_SECONDS", 60))
+        limit = int(cfg.get("OUTBOX_BATCH", 50))
+        pool = SmtpPool(cfg)
+    owner = _owner()
+    try:
+        while True:
+            with app.app_context():
+                try:
+                    done = process_batch(pool, owner=owner, limit=limit)
+                finally:
+                    db.session.remove()
+            if done and on_batch:
+                on_batch(done)
+            if once and not done:
+                return
+            if not done:
+                pool.close_idle(idle)
+                _wake.wait(poll)
+                _wake.clear()
+    finally:
+        pool.close()
+
+
+def outbox_status() -> dict:
+    rows = db.session.query(EmailOutbox.stav, func.count(EmailOutbox.id)).group_by(EmailOutbox.stav).all()
+    return dict(rows)
+
+
+def retry_failed() -> int:
+    """Vráť neúspešné e-maily do fronty (po oprave konfigurácie)."""
+    n = (EmailOutbox.query.filter(EmailOutbox.stav == "failed")
+         .update({"stav": "pending", "attempts": 0, "next_attempt_at": datetime.utcnow()},
+                 synchronize_session=False))
+    db.session.commit()
+    return n
+
+
+def cleanup_outbox(days: int = 30) -> int:
+    """Zmaž odoslané e-maily staršie ako `days` (neúspešné ostávajú na kontrolu)."""
+    cutoff = datetime.utcnow() - timedelta(days=days)
+    n = (EmailOutbox.query.filter(EmailOutbox.stav == "sent", EmailOutbox.sent_at < cutoff)
+         .delete(synchronize_session=False))
+    db.session.commit()
+    return n
+
+
+# -----------------------------
+# Vlákno vo workeri
+# -----------------------------
+_thread = None
+_thread_lock = threading.Lock()
+
+
+def _loop(app):
+    while True:
+        try:
+            run_sender(app)
+            return  # SMTP nie je nastavené
+        except Exception as e:
+            app.logger.warning(f"Outbox worker error: {e}")
+            time.sleep(5)
+
+
+def start_outbox_thread(app) -> bool:
+    """Spusti démonické vlákno odosielania (raz na proces)."""
+    global _thread
+    if _thread is not None:
+        return False
+    with _thread_lock:
+        if _thread is not None:
+            return False
+        _thread = threading.Thread(target=_loop, args=(app,), name="email-outbox", daemon=True)
+        _thread.start()
+        return True
@@ -1,12 +1,15 @@
 # modules/podujatie.py
-import os, time
-from uuid import uuid4
 from datetime import datetime, timedelta
 from flask import Blueprint, render_template, request, redirect, url_for, flash, current_app, abort
 from flask_login import login_required, current_user
 from werkzeug.utils import secure_filename
 
 from models import db, Podujatie
+from utils.mesta_cache import get_mesto
+from utils.images import delete_image
+from utils.blobs import detach
+from utils.search_keys import key_contains, search_key
+from modules.image_jobs import store_upload
 
 ALLOWED_EXT = {'png', 'jpg', 'jpeg', 'webp', 'gif'}  # SVG radšej nie (bezpečnosť)
 
@@ -31,22 +34,20 @@ def can_create_events(user) -> bool:
 
 
 # ====== P O M O C N Í C I ======
-def _upload_dir():
-    p = os.path.join(current_app.root_path, 'static', 'podujatia')
-    os.makedirs(p, exist_ok=True)
-    return p
+UPLOAD_FOLDER = 'podujatia'  # prefix v úložisku (utils/storage.py)
 
-def _save_one_photo(file, prefix='evt'):
+def _save_one_photo(file, evt) -> bool:
+    """Nastav podujatiu fotku (blob podľa obsahu, hneď spracovaný – utils/blobs.py)."""
     if not file or file.filename == '':
-        return None
+        return False
     name = secure_filename(file.filename)
     ext = name.rsplit('.', 1)[-1].lower() if '.' in name else ''
     if ext not in ALLOWED_EXT:
-        return None
-    fname = f"{prefix}_{int(time.time())}_{uuid4().hex[:6]}.{ext}"
-    dest = os.path.join(_upload_dir(), fname)
-    file.save(dest)
-    return fname
+        return False
+    if not store_upload(file, evt, inline=True):
+        current_app.logger.warning("Chyba pri ukladaní fotky podujatia (nie je obrázok)")
+        return False
+    return True
 
 def _parse_dt(d_str: str, t_str: str) -> datetime | None:
     """Očakáva d='YYYY-MM-DD', t='HH:MM'. Vráti datetime alebo None."""
@@ -169,11 +170,8 @@ def vytvor():
     # voliteľná fotka
     file = request.files.get('foto')
     if file:
-        fname = _save_one_photo(file, prefix='evt')
-        if not fname:
+        if not _save_one_photo(file, evt):
             flash("Nepovolený formát fotky. Povolené: png, jpg, jpeg, webp, gif.", "warning")
-        else:
-            evt.foto_nazov = fname
 
     # voliteľné: vstupné (uložíme len ak model má taký stĺpec)
     vst = (request.form.get('vstupne') or '').replace(',', '.').strip()
@@ -250,20 +248,12 @@ def upload_foto(id):
         flash("Nevybral si žiadny súbor.", "warning")
         return redirect(url_for('podujatie.edit', id=e.id))
 
-    # zmaž starú (ak bola)
-    if e.foto_nazov:
-        old = os.path.join(_upload_dir(), e.foto_nazov)
-        if os.path.exists(old):
-            try:
-                os.remove(old)
-            except Exception:
-                pass
-
-    fname = _save_one_photo(file, prefix=f"evt{e.id}")
-    if not fname:
+    old = (e.foto_nazov, e.foto_varianty)
+    if not _save_one_photo(file, e):
         flash("Nepovolený formát fotky.", "warning")
     else:
-        e.foto_nazov = fname
+        # starú zmažeme až keď je nová uložená (starý blob uvoľní GC)
+        delete_image(UPLOAD_FOLDER, *old)
         db.session.commit()
         flash("Fotka podujatia aktualizovaná.", "success")
 
@@ -278,13 +268,7 @@ def zmaz_foto(id):
         abort(403)
 
     if e.foto_nazov:
-        path = os.path.join(_upload_dir(), e.foto_nazov)
-        if os.path.exists(path):
-            try:
-                os.remove(path)
-            except Exception:
-                pass
-        e.foto_nazov = None
+        detach(e)
         db.session.commit()
         flash("Fotka podujatia odstránená.", "info")
 
@@ -301,12 +285,7 @@ def zmaz(id):
 
     # zmaž fotku (ak existuje)
     if e.foto_nazov:
-        path = os.path.join(_upload_dir(), e.foto_nazov)
-        if os.path.exists(path):
-            try:
-                os.remove(path)
-            except Exception:
-                pass
+        delete_image(UPLOAD_FOLDER, e.foto_nazov, e.foto_varianty)
 
     db.session.delete(e)
     db.session.commit()
@@ -336,19 +315,18 @@ def index():
 
     qry = Podujatie.query
 
-    # fulltext light
+    # fulltext light – krátke polia cez kľúče bez diakritiky (utils/search_keys.py)
     if q:
-        like = f"%{q}%"
         from sqlalchemy import or_
         qry = qry.filter(or_(
-            Podujatie.nazov.ilike(like),
-            Podujatie.popis.ilike(like),
-            Podujatie.miesto.ilike(like),
-            Podujatie.organizator.ilike(like),
+            key_contains(Podujatie.nazov_key, q),
+            Podujatie.popis.ilike(f"%{q}%"),
+            key_contains(Podujatie.miesto_key, q),
+            key_contains(Podujatie.organizator_key, q),
         ))
 
     if organiz:
-        qry = qry.filter(Podujatie.organizator.ilike(f"%{organiz}%"))
+        qry = qry.filter(key_contains(Podujatie.organizator_key, organiz))
 
     # dátumy
     if d_od_raw:
@@ -368,10 +346,10 @@ def index():
     if HAS_MESTO and mesto_id:
         try:
             mid = int(mesto_id)
-            m = Mesto.query.get(mid)
+            m = get_mesto(mid)
             if m:
-                # kým nemáme FK, porovnávame textové pole s názvom mesta
-                qry = qry.filter(Podujatie.miesto.ilike(m.nazov))
+                # kým nemáme FK, porovnávame textové pole s názvom mesta (kľúč → index, bez diakritiky)
+                qry = qry.filter(Podujatie.miesto_key == search_key(m.nazov))
         except ValueError:
             pass
 
@@ -397,15 +375,11 @@ def index():
         archiv_po_mesiacoch.setdefault(key, []).append(e)
     mesiace = sorted(archiv_po_mesiacoch.keys(), reverse=True)
 
-    # select na mestá (ak je tabuľka)
-    mesta = Mesto.query.order_by(Mesto.nazov.asc()).all() if HAS_MESTO else []
-
     return render_template(
         "podujatia.html",
         aktualne=aktualne,
         archiv_po_mesiacoch=archiv_po_mesiacoch,
         mesiace=mesiace,
-        mesta=mesta
     )
 
 
@@ -463,12 +437,7 @@ def admin_force_delete(id):
 
     # zmaž súbor (ak je)
     if e.foto_nazov:
-        path = os.path.join(_upload_dir(), e.foto_nazov)
-        if os.path.exists(path):
-            try:
-                os.remove(path)
-            except Exception:
-                pass
+        delete_image(UPLOAD_FOLDER, e.foto_nazov, e.foto_varianty)
 
     db.session.delete(e)
     db.session.commit()
@@ -1,11 +1,13 @@
 # modules/reklama.py
-import os, time
-from uuid import uuid4
 from datetime import datetime
 from flask import Blueprint, render_template, request, redirect, url_for, flash, current_app, abort
 from flask_login import login_required, current_user
 from werkzeug.utils import secure_filename
 from models import db, Reklama, ReklamaReport, Pouzivatel
+from utils.images import delete_image
+from utils.blobs import detach
+from modules.image_jobs import store_upload
+from modules.outbox import enqueue
 
 reklama_bp = Blueprint('reklama', __name__, url_prefix='/reklamy')
 
@@ -14,18 +16,15 @@ ALLOWED = {'png','jpg','jpeg','webp','gif'}
 def can_ads(user):
     return bool(user.is_authenticated and (user.typ_subjektu == 'ico' or user.is_admin))
 
-def _dir():
-    p = os.path.join(current_app.root_path, 'static', 'reklamy')
-    os.makedirs(p, exist_ok=True); return p
+UPLOAD_FOLDER = 'reklamy'  # prefix v úložisku (utils/storage.py)
 
-def _save(file, prefix='ad'):
-    if not file or file.filename == '': return None
+def _save(file, ad):
+    if not file or file.filename == '': return False
     name = secure_filename(file.filename)
     ext = name.rsplit('.',1)[-1].lower() if '.' in name else ''
-    if ext not in ALLOWED: return None
-    fname = f"{prefix}_{int(time.time())}_{uuid4().hex[:6]}.{ext}"
-    file.save(os.path.join(_dir(), fname))
-    return fname
+    if ext not in ALLOWED: return False
+    # blob podľa obsahu (rovnaký banner = tie isté súbory), viď utils/blobs.py
+    return store_upload(file, ad, inline=True)
 
 @reklama_bp.route('/moje', methods=['GET'])
 @login_required
@@ -70,9 +69,7 @@ def vytvor():
 
     f = request.files.get('foto')
     if f:
-        fname = _save(f, prefix='ad')
-        if not fname: flash("Nepovolený formát obrázka.", "warning")
-        else: ad.foto_nazov = fname
+        if not _save(f, ad): flash("Nepovolený formát obrázka.", "warning")
 
     db.session.add(ad); db.session.commit()
     flash("Reklama vytvorená.", "success")
@@ -116,16 +113,11 @@ def upload_foto(id):
     f = request.files.get('foto')
     if not f: flash("Nevybraný súbor.", "warning"); return redirect(url_for('reklama.moje'))
 
-    if ad.foto_nazov:
-        old = os.path.join(_dir(), ad.foto_nazov)
-        if os.path.exists(old):
-            try: os.remove(old)
-            except Exception: pass
-
-    fname = _save(f, prefix=f"ad{ad.id}")
-    if not fname: flash("Nepovolený formát.", "warning")
+    old = (ad.foto_nazov, ad.foto_varianty)
+    if not _save(f, ad): flash("Nepovolený formát.", "warning")
     else:
-        ad.foto_nazov = fname; db.session.commit(); flash("Obrázok aktualizovaný.", "success")
+        delete_image(UPLOAD_FOLDER, *old)  # starý až po uložení nového (starý blob uvoľní GC)
+        db.session.commit(); flash("Obrázok aktualizovaný.", "success")
     return redirect(url_for('reklama.moje'))
 
 @reklama_bp.route('/<int:id>/zmaz_foto', methods=['POST'])
@@ -134,11 +126,7 @@ def zmaz_foto(id):
     ad = Reklama.query.get_or_404(id)
     if ad.pouzivatel_id != current_user.id and not current_user.is_admin: abort(403)
     if ad.foto_nazov:
-        p = os.path.join(_dir(), ad.foto_nazov)
-        if os.path.exists(p):
-            try: os.remove(p)
-            except Exception: pass
-        ad.foto_nazov = None; db.session.commit()
+        detach(ad); db.session.commit()
         flash("Obrázok odstránený.", "info")
     return redirect(url_for('reklama.moje'))
 
@@ -148,10 +136,7 @@ def zmaz(id):
     ad = Reklama.query.get_or_404(id)
     if ad.pouzivatel_id != current_user.id and not current_user.is_admin: abort(403)
     if ad.foto_nazov:
-        p = os.path.join(_dir(), ad.foto_nazov)
-        if os.path.exists(p):
-            try: os.remove(p)
-            except Exception: pass
+        delete_image(UPLOAD_FOLDER, ad.foto_nazov, ad.foto_varianty)
     db.session.delete(ad); db.session.commit()
     flash("Reklama zmazaná.", "info")
     return redirect(url_for('reklama.moje'))
@@ -183,31 +168,23 @@ def report(id):
         details=details
     )
     db.session.add(rep)
-    db.session.commit()
-
     try:
-        _notify_admins_new_ad_report(rep, ad)
+        _notify_admins_new_ad_report(rep, ad)  # outbox – odíde spolu s reportom
     except Exception:
         current_app.logger.warning("Nepodarilo sa odoslať admin notifikáciu o reporte reklamy.", exc_info=True)
+    db.session.commit()
 
     flash('Ďakujeme za nahlásenie. Moderátor to skontroluje.', 'success')
     return redirect(request.referrer or url_for('uzivatel.index'))
 
 
 def _notify_admins_new_ad_report(rep, ad):
-    import smtplib
-    from email.message import EmailMessage
-
     admins = Pouzivatel.query.filter_by(is_admin=True).all()
     to_list = [a.email for a in admins if a.email]
     if not to_list:
         return
 
-    msg = EmailMessage()
-    msg['Subject'] = f"[Muzikuj] Nahlásená reklama #{ad.id}"
-    msg['From'] = current_app.config.get('SMTP_SENDER', 'noreply@muzikuj.sk')
-    msg['To'] = ', '.join(to_list)
-
+    subject = f"[Muzikuj] Nahlásená reklama #{ad.id}"
     body = (
         f"Reklama ID: {ad.id}\n"
         f"Inzerent: {(ad.autor.prezyvka or ad.autor.email) if ad.autor else '-'}\n"
@@ -215,17 +192,7 @@ def _notify_admins_new_ad_report(rep, ad):
         f"Detail: {rep.details or '-'}\n"
         f"Link: {url_for('moderacia.reklamy_reports', _external=True)}\n"
     )
-    msg.set_content(body)
-
-    server = current_app.config.get('SMTP_SERVER', 'smtp.gmail.com')
-    port = int(current_app.config.get('SMTP_PORT', 587))
-    user = current_app.config.get('SMTP_USERNAME')
-    pwd  = current_app.config.get('SMTP_PASSWORD')
-
-    with smtplib.SMTP(server, port) as s:
-        s.starttls()
-        if user and pwd:
-            s.login(user, pwd)
-        s.send_message(msg)
+    for email in to_list:
+        enqueue(email, subject, body, kind="reklama_report")
 
 
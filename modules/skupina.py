@@ -1,16 +1,20 @@
 # modules/skupina.py
 
-import os, secrets, time
+import secrets, time
 from uuid import uuid4
 from datetime import datetime, timedelta
 from utils.genres import join_csv, normalize_genre, GENRE_CHOICES
-from flask import Blueprint, render_template, request, redirect, url_for, flash, current_app, abort
+from flask import Blueprint, render_template, request, redirect, url_for, flash, abort, Response, stream_with_context
 from flask_login import current_user, login_required
 from werkzeug.utils import secure_filename
 from sqlalchemy import or_, func
 from sqlalchemy.orm import joinedload
 
 from models import db, Skupina, Pouzivatel, GaleriaSkupina, VideoSkupina, SkupinaPozvanka
+from utils.images import store_image, delete_image, ImageError
+from modules.image_jobs import store_upload
+from utils.uploads import upload_limit
+from utils.gallery_zip import gallery_entries, stream_zip
 
 
 # Povolené prípony (zjednotené a doplnené o webp)
@@ -139,26 +143,21 @@ def upload_fotka_skupina():
         flash("Používateľ nemá žiadnu skupinu.", "danger")
         return redirect(url_for('skupina.skupina'))
 
-    upload_folder = os.path.join(current_app.root_path, 'static', 'profilovky_skupina')
-    os.makedirs(upload_folder, exist_ok=True)
+    upload_folder = 'profilovky_skupina'
 
-    # unikátne meno súboru
-    orig = secure_filename(file.filename)
-    ext  = orig.rsplit('.', 1)[1].lower()
-    filename = f"{skupina.id}_{int(time.time())}_{uuid4().hex[:6]}.{ext}"
-    filepath = os.path.join(upload_folder, filename)
+    # unikátne meno súboru (veľkosti WebP/JPEG, viď utils/images.py)
+    try:
+        filename, varianty, _ = store_image(file, upload_folder,
+                                         f"{skupina.id}_{int(time.time())}_{uuid4().hex[:6]}")
+    except ImageError:
+        flash("Súbor sa nepodarilo spracovať ako obrázok.", "danger")
+        return redirect(url_for('skupina.skupina'))
 
     # zmaž starú, ak bola
-    if skupina.profil_fotka_skupina:
-        predosla = os.path.join(upload_folder, skupina.profil_fotka_skupina)
-        if os.path.exists(predosla):
-            try:
-                os.remove(predosla)
-            except Exception:
-                pass
-
-    file.save(filepath)
+    delete_image(upload_folder, skupina.profil_fotka_skupina, skupina.profil_fotka_skupina_varianty)
+
     skupina.profil_fotka_skupina = filename
+    skupina.profil_fotka_skupina_varianty = varianty
     db.session.commit()
     flash("Fotka kapely bola aktualizovaná.", "success")
     return redirect(url_for('skupina.skupina'))
@@ -173,15 +172,10 @@ def odstranit_fotku_skupina():
     skupina = current_user.skupina_clen[0] if current_user.skupina_clen else None
 
     if skupina and skupina.profil_fotka_skupina:
-        upload_folder = os.path.join(current_app.root_path, 'static', 'profilovky_skupina')
-        filepath = os.path.join(upload_folder, skupina.profil_fotka_skupina)
-        if os.path.exists(filepath):
-            try:
-                os.remove(filepath)
-            except Exception:
-                pass
+        delete_image('profilovky_skupina', skupina.profil_fotka_skupina, skupina.profil_fotka_skupina_varianty)
 
         skupina.profil_fotka_skupina = None
+        skupina.profil_fotka_skupina_varianty = None
         db.session.commit()
         flash("Fotka kapely bola odstránená.", "info")
 
@@ -193,6 +187,7 @@ def odstranit_fotku_skupina():
 # ===================================
 @skupina_bp.route('/skupina/galeria', methods=['POST'])
 @login_required
+@upload_limit("UPLOAD_GALLERY_MAX_BYTES")
 def nahraj_fotku_skupina():
     skupina = current_user.skupina_clen[0] if current_user.skupina_clen else None
     if not skupina:
@@ -211,9 +206,6 @@ def nahraj_fotku_skupina():
         flash(f"Dosiahnutý limit {MAX_FOTO} fotiek v galérii skupiny.", "warning")
         return redirect(url_for('skupina.skupina'))
 
-    upload_dir = os.path.join(current_app.root_path, 'static', 'galeria_skupina')
-    os.makedirs(upload_dir, exist_ok=True)
-
     ulozene = 0
     preskocene = 0
 
@@ -227,16 +219,11 @@ def nahraj_fotku_skupina():
             preskocene += 1
             continue
 
-        orig = secure_filename(file.filename)
-        ext  = orig.rsplit('.', 1)[1].lower()
-        unique = f"{skupina.id}_{int(time.time())}_{uuid4().hex[:8]}.{ext}"
-        dest_path = os.path.join(upload_dir, unique)
-
-        try:
-            file.save(dest_path)
-            db.session.add(GaleriaSkupina(nazov_suboru=unique, skupina_id=skupina.id))
+        # blob podľa obsahu + fronta (modules/image_jobs.py); veľkosti dorobí worker
+        row = GaleriaSkupina(skupina_id=skupina.id)
+        if store_upload(file, row):
             ulozene += 1
-        except Exception:
+        else:
             preskocene += 1
 
     if ulozene:
@@ -408,6 +395,7 @@ def prijmi_pozvanku(token):
 
 from sqlalchemy import or_, func
 from utils.genres import join_csv  # už máš
+from utils.search_keys import key_contains
 
 @skupina_bp.route('/skupiny', methods=['GET'])
 def prehlad_skupin():
@@ -420,9 +408,9 @@ def prehlad_skupin():
            .order_by(Skupina.nazov.asc()))
 
     if q:
-        like = f"%{q}%"
-        qry = qry.filter(or_(Skupina.nazov.ilike(like),
-                             Skupina.popis.ilike(like)))
+        # názov cez kľúč bez diakritiky (utils/search_keys.py), popis ostáva ilike
+        qry = qry.filter(or_(key_contains(Skupina.nazov_key, q),
+                             Skupina.popis.ilike(f"%{q}%")))
     if mesto:
         qry = qry.filter(Skupina.mesto == mesto)
     if selected_genres:
@@ -471,6 +459,26 @@ def skupina_detail(id):
     return render_template('skupina_detail.html', skupina=s, is_owner_group=is_owner_group)
 
 
+@skupina_bp.route('/skupina/<int:id>/galeria.zip', methods=['GET'])
+@login_required
+def galeria_zip(id):
+    """Celá galéria skupiny ako ZIP (prúdovo, utils/gallery_zip.py) – pre členov a adminov."""
+    s = Skupina.query.get_or_404(id)
+    if current_user not in s.clenovia and not current_user.is_admin:
+        abort(403)
+    rows = GaleriaSkupina.query.filter_by(skupina_id=s.id).order_by(GaleriaSkupina.id).all()
+    entries = gallery_entries(rows, 'galeria_skupina', secure_filename(s.nazov) or f"skupina_{s.id}")
+    if not entries:
+        flash("Galéria je prázdna.", "info")
+        return redirect(request.referrer or url_for('skupina.skupina_detail', id=s.id))
+
+    resp = Response(stream_with_context(stream_zip(entries)), mimetype='application/zip', direct_passthrough=True)
+    resp.headers['Content-Disposition'] = f'attachment; filename="galeria_skupina_{s.id}.zip"'
+    resp.headers['Cache-Control'] = 'private, no-store'
+    resp.headers['X-Accel-Buffering'] = 'no'  # nginx nech neodkladá celý archív do bufferu
+    return resp
+
+
 @skupina_bp.route('/skupina/fotka/zmaz/<int:id>', methods=['GET', 'POST'])
 @login_required
 def zmaz_fotku_skupina(id):
@@ -482,15 +490,8 @@ def zmaz_fotku_skupina(id):
     if not skupina or (current_user not in skupina.clenovia):
         abort(403)
 
-    # 3) Zmažeme fyzický súbor z /static/galeria_skupina
-    upload_dir = os.path.join(current_app.root_path, 'static', 'galeria_skupina')
-    filepath = os.path.join(upload_dir, foto.nazov_suboru)
-    if os.path.exists(filepath):
-        try:
-            os.remove(filepath)
-        except Exception:
-            # nech to nepadne na OS chybe
-            pass
+    # 3) Zmažeme súbor z úložiska (galeria_skupina; blob uvoľní GC, keď naň nič neukazuje)
+    delete_image('galeria_skupina', foto.nazov_suboru, foto.varianty)
 
     # 4) Zmažeme DB záznam
     db.session.delete(foto)
@@ -2,10 +2,11 @@ from flask import Blueprint, render_template, request, redirect, url_for, flash,
 from flask_login import login_required, current_user
 from models import db, Pouzivatel, Sprava, Report, Dopyt
 from modules.dopyty import generate_dopyt_token, _dopyt_end_dt
+from modules.outbox import enqueue
+from utils.unread import unread_counts
+from utils.search_keys import key_contains, key_prefix
 from datetime import datetime
-import smtplib
-from email.message import EmailMessage
-from sqlalchemy import func, or_, and_
+from sqlalchemy import or_, and_
 
 # bezpečný import – ak utils/moderation neexistuje, app beží ďalej bez auto-flagovania
 try:
@@ -46,9 +47,7 @@ def inbox():
             db.session.commit()
 
     # pre badge v taboch
-    unread_prijate = Sprava.query.filter_by(
-        komu_id=uid, precitane=False, deleted_by_recipient=False
-    ).count()
+    unread_prijate, _ = unread_counts(current_user)
 
     active_tab = tab if tab in ("prijate","odoslane","nova") else "prijate"
     return render_template("spravy.html",
@@ -98,30 +97,6 @@ def napisat():
         predmet=predmet,                 # ⬅️ pošli do templatu
     )
 
-def _send_email(to_email: str, subject: str, body: str) -> bool:
-    cfg = current_app.config
-    server = cfg.get("SMTP_SERVER")
-    port = int(cfg.get("SMTP_PORT", 587))
-    username = cfg.get("SMTP_USERNAME")
-    password = cfg.get("SMTP_PASSWORD")
-    sender   = cfg.get("SMTP_SENDER", username)
-
-    if not (server and username and password and sender and to_email):
-        current_app.logger.warning("SMTP not configured properly; skipping email send.")
-        return False
-
-    msg = EmailMessage()
-    msg["From"] = sender
-    msg["To"] = to_email
-    msg["Subject"] = subject
-    msg.set_content(body)
-
-    with smtplib.SMTP(server, port) as s:
-        s.starttls()
-        s.login(username, password)
-        s.send_message(msg)
-    return True
-
 
 @spravy_bp.route("/odoslat", methods=["POST"], endpoint="odoslat")
 @login_required
@@ -204,11 +179,11 @@ def odoslat():
         )
 
         try:
-            ok = _send_email(d.email, subj, body)
+            ok = enqueue(d.email, subj, body, kind="dopyt_odpoved") is not None  # modules/outbox.py
             if ok:
                 if not d.cta_sent_at:
                     d.cta_sent_at = datetime.utcnow()
-                    db.session.commit()
+                db.session.commit()
                 flash("Správa odoslaná zadávateľovi e-mailom. 👍", "success")
             else:
                 flash("Správa uložená, ale e-mail sa nepodarilo odoslať (SMTP).", "warning")
@@ -222,8 +197,9 @@ def odoslat():
     if komu_email:
         subj = predmet or "Správa z muzikuj.sk"
         try:
-            ok = _send_email(komu_email, subj, text)
+            ok = enqueue(komu_email, subj, text, kind="sprava") is not None
             if ok:
+                db.session.commit()
                 flash("Správa odoslaná aj na e-mail.", "success")
             else:
                 flash("Správa uložená, ale e-mail sa nepodarilo odoslať (SMTP).", "warning")
@@ -287,12 +263,20 @@ def find_user():
     if len(q) < 2:
         return jsonify([])
 
-    users = (Pouzivatel.query
-             .filter(Pouzivatel.id != current_user.id)
-             .filter(func.lower(Pouzivatel.prezyvka).like(f"%{q.lower()}%"))
-             .order_by(Pouzivatel.prezyvka.asc())
+    # kľúč bez diakritiky (utils/search_keys.py): „jan“ nájde aj „Ján“.
+    # Začiatok prezývky = rozsah na ix_pouzivatel_prezyvka_key; výskyt v strede
+    # (LIKE '%q%', prechod celou tabuľkou) len ak prefix nenaplní zoznam.
+    base = Pouzivatel.query.filter(Pouzivatel.id != current_user.id)
+    users = (base.filter(key_prefix(Pouzivatel.prezyvka_key, q))
+             .order_by(Pouzivatel.prezyvka_key.asc())
              .limit(8)
              .all())
+    if len(users) < 8:
+        users += (base.filter(key_contains(Pouzivatel.prezyvka_key, q),
+                              ~key_prefix(Pouzivatel.prezyvka_key, q))
+                  .order_by(Pouzivatel.prezyvka_key.asc())
+                  .limit(8 - len(users))
+                  .all())
 
     return jsonify([{
         "id": u.id,
@@ -1,16 +1,22 @@
-import os
 from flask import Blueprint, render_template, request, redirect, url_for, session, flash, current_app, abort, jsonify
 from flask_login import login_user, logout_user, login_required, current_user
 from werkzeug.utils import secure_filename
 from werkzeug.security import generate_password_hash
 from sqlalchemy.orm import joinedload
 from jinja2 import TemplateNotFound
-from models import Pouzivatel, db, GaleriaPouzivatel, VideoPouzivatel, Skupina, Podujatie, Reklama, Mesto
-from flask import request, redirect, url_for, flash, abort
+from models import Pouzivatel, db, GaleriaPouzivatel, VideoPouzivatel, Skupina, Podujatie, Reklama
+from utils.images import store_image, delete_image, allowed_ext, ImageError
+from modules.image_jobs import store_upload
+from modules.outbox import enqueue, mail_configured
+from utils.uploads import upload_limit
+from utils.gallery_zip import gallery_entries, stream_zip
+from utils.fulltext import people_hits, with_snippets
+from utils.search_keys import key_contains
+from utils.mesta_suggest import canonical_nazov
+from flask import request, redirect, url_for, flash, abort, Response, stream_with_context
 from datetime import datetime, timedelta
 from sqlalchemy import or_
-import re, smtplib
-from email.message import EmailMessage
+import re
 from itsdangerous import URLSafeTimedSerializer, BadSignature, SignatureExpired
 
 uzivatel = Blueprint('uzivatel', __name__)
@@ -28,10 +34,6 @@ def render_profile_template(**ctx):
 def test():
     return "Blueprint uzivatel funguje!"
 
-# 🔹 Mesta
-def get_mesta_all():
-    return Mesto.query.order_by(Mesto.nazov.asc()).all()
-
 # 🔹 Domovská stránka
 @uzivatel.route('/')
 def index():
@@ -107,12 +109,8 @@ def _make_serializer() -> URLSafeTimedSerializer:
     return URLSafeTimedSerializer(current_app.config['SECRET_KEY'], salt='regv1')
 
 def _send_verif_email(to_email: str, link: str):
-    cfg = current_app.config
-    user = cfg.get('SMTP_USERNAME')
-    pwd  = cfg.get('SMTP_PASSWORD')
-
     # DEV fallback: keď nemáš SMTP, ukáž link vo flashi + zaloguj
-    if not user or not pwd:
+    if not mail_configured():
         current_app.logger.info(f"[DEV] Overovací odkaz: {link}")
         try:
             # zobrazí sa po redirekte na stránke (pozri bod 2 nižšie pre |safe)
@@ -122,22 +120,15 @@ def _send_verif_email(to_email: str, link: str):
             pass
         return  # necháme vonkajší try/except považovať to za úspech
 
-    # produkčné odoslanie e-mailu cez SMTP
-    msg = EmailMessage()
-    msg['Subject'] = 'Potvrď registráciu na Muzikuj'
-    msg['From'] = cfg.get('SMTP_SENDER', user or 'noreply@muzikuj.sk')
-    msg['To'] = to_email
-    msg.set_content(
+    # produkčné odoslanie – cez outbox (modules/outbox.py), request nečaká na SMTP
+    enqueue(
+        to_email,
+        'Potvrď registráciu na Muzikuj',
         f"Ahoj!\n\nKlikni na tento odkaz a dokonči registráciu:\n{link}\n\n"
-        "Odkaz je platný 48 hodín.\nAk si o registráciu nežiadas, správu ignoruj."
+        "Odkaz je platný 48 hodín.\nAk si o registráciu nežiadas, správu ignoruj.",
+        kind='registracia',
     )
-
-    with smtplib.SMTP(cfg.get('SMTP_SERVER', 'smtp.gmail.com'), int(cfg.get('SMTP_PORT', 587))) as s:
-        s.ehlo()
-        s.starttls()
-        s.ehlo()
-        s.login(user, pwd)
-        s.send_message(msg)
+    db.session.commit()
     
 # 🔹 Registrácia
 @uzivatel.route('/registracia', methods=['GET', 'POST'])
@@ -156,6 +147,12 @@ def registracia():
 
         email = (request.form.get('email') or '').strip()
         obec  = (request.form.get('obec') or '').strip()
+        if obec:
+            # pole s našepkávačom – len mesto z tabuľky (predtým <select>)
+            obec = canonical_nazov(obec)
+            if obec is None:
+                flash("Obec vyber zo zoznamu návrhov.", "warning")
+                return redirect(url_for('uzivatel.registracia'))
 
         # malá pomôcka
         def dedup_list(lst):
@@ -335,7 +332,7 @@ def registracia():
         return redirect(url_for('main.index'))
 
     # GET
-    return render_template('modals/registracia.html', mesta_all=get_mesta_all())
+    return render_template('modals/registracia.html')
 
 
 # 🔒 Overenie registrácie – vytvorenie účtu z tokenu
@@ -513,9 +510,16 @@ def moje_konto():
         pouzivatel.typ_subjektu = typ
         ico_keys = ("organizacia_nazov","ico","org_zaradenie","org_zaradenie_ine","dic","ic_dph","sidlo_ulica","sidlo_psc","sidlo_mesto")
         if typ == 'ico':
+            sidlo = val('sidlo_mesto')
+            if sidlo and canonical_nazov(sidlo) is None:
+                db.session.rollback()
+                flash("Sídlo – mesto vyber zo zoznamu návrhov.", "warning")
+                return redirect(url_for('uzivatel.profil'))
             for k in ico_keys:
                 if hasattr(pouzivatel, k):
                     setattr(pouzivatel, k, val(k))
+            if sidlo:
+                pouzivatel.sidlo_mesto = canonical_nazov(sidlo)
         else:
             for k in ico_keys:
                 if hasattr(pouzivatel, k):
@@ -547,7 +551,6 @@ def moje_konto():
         simple_roles=simple_roles,
         public_view=False,
         show_edit=(request.args.get('edit') == '1'),
-        mesta_all=get_mesta_all(),
     )
 
 # 🔹 Upload profilovej fotky
@@ -564,12 +567,26 @@ def upload_fotka():
         return redirect(url_for('uzivatel.profil'))
 
     if file:
-        filename = secure_filename(file.filename)
-        filepath = os.path.join(current_app.root_path, 'static', 'profilovky', filename)
-        file.save(filepath)
+        from uuid import uuid4
+        import time
 
+        if not allowed_ext(secure_filename(file.filename)):
+            flash("Nepovolený formát súboru.", "danger")
+            return redirect(url_for('uzivatel.profil'))
+
+        folder = 'profilovky'
         pouzivatel = current_user
+        try:
+            filename, varianty, _ = store_image(file, folder, f"{pouzivatel.id}_{int(time.time())}_{uuid4().hex[:6]}")
+        except ImageError:
+            flash("Súbor sa nepodarilo spracovať ako obrázok.", "danger")
+            return redirect(url_for('uzivatel.profil'))
+
+        # staré súbory mažeme len ak mali varianty (= vznikli cez utils/images, nie zdieľaný default)
+        if pouzivatel.profil_fotka_varianty:
+            delete_image(folder, pouzivatel.profil_fotka, pouzivatel.profil_fotka_varianty)
         pouzivatel.profil_fotka = filename
+        pouzivatel.profil_fotka_varianty = varianty
         db.session.commit()
 
         flash("Profilová fotka bola úspešne nahraná.", "success")
@@ -582,10 +599,9 @@ def odstranit_fotku():
     pouzivatel = current_user
 
     if pouzivatel.profil_fotka:
-        filepath = os.path.join(current_app.root_path, 'static', 'profilovky', pouzivatel.profil_fotka)
-        if os.path.exists(filepath):
-            os.remove(filepath)
+        delete_image('profilovky', pouzivatel.profil_fotka, pouzivatel.profil_fotka_varianty)
         pouzivatel.profil_fotka = None
+        pouzivatel.profil_fotka_varianty = None
         db.session.commit()
 
     flash("Profilová fotka bola odstránená.", "success")
@@ -594,10 +610,8 @@ def odstranit_fotku():
 # 🔹 Upload fotky do galérie používateľa
 @profil_blueprint.route('/profil/galeria', methods=['POST'])
 @login_required
+@upload_limit("UPLOAD_GALLERY_MAX_BYTES")
 def nahraj_fotku():
-    from uuid import uuid4
-    import time
-
     files = request.files.getlist('fotos')
     if not files:
         flash("Nevybrali ste žiadne fotky.", "warning")
@@ -612,9 +626,6 @@ def nahraj_fotku():
         return redirect(url_for('uzivatel.profil'))
 
     allowed = {'png', 'jpg', 'jpeg', 'gif', 'webp'}
-    upload_dir = os.path.join(current_app.root_path, 'static', 'galeria_pouzivatel')
-    os.makedirs(upload_dir, exist_ok=True)
-
     ulozene = 0
     preskocene = 0
 
@@ -631,13 +642,11 @@ def nahraj_fotku():
             preskocene += 1
             continue
 
-        unique = f"{uz.id}_{int(time.time())}_{uuid4().hex[:8]}.{ext}"
-        dest_path = os.path.join(upload_dir, unique)
-        try:
-            file.save(dest_path)
-            db.session.add(GaleriaPouzivatel(nazov_suboru=unique, pouzivatel_id=uz.id))
+        # blob podľa obsahu + fronta (modules/image_jobs.py); veľkosti dorobí worker
+        row = GaleriaPouzivatel(pouzivatel_id=uz.id)
+        if store_upload(file, row):
             ulozene += 1
-        except Exception:
+        else:
             preskocene += 1
 
     if ulozene:
@@ -658,13 +667,31 @@ def nahraj_fotku():
 def zmaz_fotku(id):
     fotka = GaleriaPouzivatel.query.get_or_404(id)
     if fotka.pouzivatel_id == current_user.id:
-        cesta = os.path.join(current_app.root_path, 'static', 'galeria_pouzivatel', fotka.nazov_suboru)
-        if os.path.exists(cesta):
-            os.remove(cesta)
+        delete_image('galeria_pouzivatel', fotka.nazov_suboru, fotka.varianty)
         db.session.delete(fotka)
         db.session.commit()
     return redirect(url_for('uzivatel.profil'))
 
+# 🔹 Celá galéria používateľa ako ZIP (vlastník, admin/moderátor)
+@profil_blueprint.route('/profil/galeria.zip', methods=['GET'])
+@profil_blueprint.route('/profil/<int:user_id>/galeria.zip', methods=['GET'])
+@login_required
+def galeria_zip(user_id=None):
+    u = Pouzivatel.query.get_or_404(user_id or current_user.id)
+    if u.id != current_user.id and not (current_user.is_admin or current_user.is_moderator):
+        abort(403)
+    rows = GaleriaPouzivatel.query.filter_by(pouzivatel_id=u.id).order_by(GaleriaPouzivatel.id).all()
+    entries = gallery_entries(rows, 'galeria_pouzivatel', secure_filename(u.prezyvka or '') or f"uzivatel_{u.id}")
+    if not entries:
+        flash("Galéria je prázdna.", "info")
+        return redirect(url_for('uzivatel.profil'))
+
+    resp = Response(stream_with_context(stream_zip(entries)), mimetype='application/zip', direct_passthrough=True)
+    resp.headers['Content-Disposition'] = f'attachment; filename="galeria_{u.id}.zip"'
+    resp.headers['Cache-Control'] = 'private, no-store'
+    resp.headers['X-Accel-Buffering'] = 'no'
+    return resp
+
 @profil_blueprint.route('/pridaj_video', methods=['POST'])
 @login_required
 def pridaj_video():
@@ -714,7 +741,6 @@ def verejny_profil(user_id):
         galeria=galeria,
         youtube_videa=user.videa,
         public_view=True,
-        mesta_all=get_mesta_all(),
     )
 
 
@@ -804,14 +830,18 @@ def prehlad_uzivatelov():
     fo_q  = base.filter(Pouzivatel.typ_subjektu != 'ico')
     ico_q = base.filter(Pouzivatel.typ_subjektu == 'ico')
 
-    if q_text:
+    # fulltext (utils/fulltext.py); bez FTS5 kľúče bez diakritiky (utils/search_keys.py)
+    hits = people_hits(q_text) if q_text else None
+    if hits is not None:
+        fo_q  = fo_q.join(hits, hits.c.id == Pouzivatel.id).add_columns(hits.c.snippet)
+        ico_q = ico_q.join(hits, hits.c.id == Pouzivatel.id).add_columns(hits.c.snippet)
+    elif q_text:
         like = f"%{q_text}%"
-        fo_q  = fo_q.filter(or_(Pouzivatel.prezyvka.ilike(like),
-                                 Pouzivatel.meno.ilike(like),
-                                 Pouzivatel.priezvisko.ilike(like),
+        fo_q  = fo_q.filter(or_(key_contains(Pouzivatel.prezyvka_key, q_text),
+                                 key_contains(Pouzivatel.meno_key, q_text),
                                  Pouzivatel.email.ilike(like)))
-        ico_q = ico_q.filter(or_(Pouzivatel.organizacia_nazov.ilike(like),
-                                 Pouzivatel.prezyvka.ilike(like),
+        ico_q = ico_q.filter(or_(key_contains(Pouzivatel.organizacia_key, q_text),
+                                 key_contains(Pouzivatel.prezyvka_key, q_text),
                                  Pouzivatel.email.ilike(like)))
 
     if mesto:
@@ -822,11 +852,14 @@ def prehlad_uzivatelov():
         fo_q  = fo_q.filter(Pouzivatel.rola == zaner)
         ico_q = ico_q.filter(Pouzivatel.org_zaradenie == zaner)
 
-    users = fo_q.order_by(Pouzivatel.prezyvka.asc()).limit(200).all() \
+    rank = [hits.c.rank] if hits is not None else []
+    users = fo_q.order_by(*rank, Pouzivatel.prezyvka.asc()).limit(200).all() \
             if typ in ('vsetci','ludia') else []
-    orgs  = ico_q.order_by(Pouzivatel.organizacia_nazov.asc(),
+    orgs  = ico_q.order_by(*rank, Pouzivatel.organizacia_nazov.asc(),
                            Pouzivatel.prezyvka.asc()).limit(200).all() \
             if typ in ('vsetci','organizacie') else []
+    if hits is not None:
+        users, orgs = with_snippets(users), with_snippets(orgs)
 
     return render_template('uzivatelia.html',
                            users=users, orgs=orgs,
@@ -0,0 +1,165 @@
+# outbox_smoke.py
+"""
+Smoke test e-mailového outboxu (modules/outbox.py) proti lokálnemu SMTP.
+
+Spustí aiosmtpd Controller na voľnom porte na 127.0.0.1, nasmeruje naň
+SMTP_SERVER / SMTP_PORT (SMTP_STARTTLS=0, SMTP_AUTH=0) a nad dočasnou SQLite
+DB (create_all) prejde enqueue() → commit → run_sender(app, once=True).
+
+Overí:
+  - bežné správy prídu (počet a adresáti),
+  - adresát s 550 skončí `failed`,
+  - adresát s 451 je späť `pending` s next_attempt_at v budúcnosti,
+  - viac správ ide jedným spojením (pri --connections 1 presne jedno),
+  - lease pokryje pomalú dávku a výsledok sa nezapíše, keď lease prebral iný worker.
+
+Použitie:
+  pip install aiosmtpd
+  python outbox_smoke.py
+  python outbox_smoke.py --messages 20 --connections 2
+"""
+import argparse
+import os
+import socket
+import sys
+import tempfile
+import threading
+from datetime import datetime
+
+BASE = os.path.dirname(os.path.abspath(__file__))
+
+REJECT = "zla-adresa@outbox.test"      # 550 – trvalá chyba
+DEFER = "plna-schranka@outbox.test"    # 451 – dočasná chyba
+
+
+class SinkHandler:
+    """aiosmtpd handler: prijme všetko okrem REJECT / DEFER, počíta spojenia a správy."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.sessions = []
+        self.delivered = []
+
+    async def handle_RCPT(self, server, session, envelope, address, rcpt_options):
+        if address == REJECT:
+            return "550 5.1.1 No such user"
+        if address == DEFER:
+            return "451 4.2.2 Mailbox full, try later"
+        envelope.rcpt_tos.append(address)
+        return "250 OK"
+
+    async def handle_DATA(self, server, session, envelope):
+        with self.lock:
+            if not any(s is session for s in self.sessions):
+                self.sessions.append(session)
+            self.delivered.extend(envelope.rcpt_tos)
+        return "250 OK"
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _check(results: list, ok: bool, label: str) -> None:
+    results.append(ok)
+    print(f"  {'✅' if ok else '❌'} {label}")
+
+
+def _lease_checks(app, results: list) -> None:
+    from models import db, EmailOutbox
+    from modules.outbox import _claim, _finish, _result, enqueue, lease_seconds
+
+    lease = lease_seconds({"SMTP_TIMEOUT": 30}, 50, 2)
+    _check(results, lease >= 25 * 30, f"lease pre 50 správ / 2 spojenia × 30 s: {lease} s")
+
+    with app.app_context():
+        row = enqueue("lease@outbox.test", "Lease", "text", kind="smoke")
+        db.session.commit()
+        rows = _claim("worker-a", 10, lease)
+        row_id = rows[0].id if rows else row.id
+        db.session.execute(EmailOutbox.__table__.update()
+                           .where(EmailOutbox.__table__.c.id == row_id)
+                           .values(lease_owner="worker-b"))  # lease prebral iný worker
+        db.session.commit()
+        written = _finish(row_id, "worker-a", _result(1, None, app.config))
+        db.session.commit()
+        stav = db.session.get(EmailOutbox, row_id).stav
+        _check(results, not written and stav == "sending",
+               f"stratený lease: výsledok nezapísaný (stav={stav})")
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Smoke test outboxu proti lokálnemu aiosmtpd.")
+    ap.add_argument("--messages", type=int, default=10, help="počet bežných správ")
+    ap.add_argument("--connections", type=int, default=1, help="OUTBOX_SMTP_CONNECTIONS")
+    args = ap.parse_args()
+
+    try:
+        from aiosmtpd.controller import Controller
+    except ModuleNotFoundError:
+        sys.exit("❌ chýba aiosmtpd (pip install aiosmtpd)")
+
+    handler = SinkHandler()
+    port = _free_port()
+    controller = Controller(handler, hostname="127.0.0.1", port=port)
+    controller.start()
+
+    tmp = tempfile.TemporaryDirectory()
+    os.environ.update(
+        DATABASE_URL="sqlite:///" + os.path.join(tmp.name, "outbox.db").replace("\\", "/"),
+        SMTP_SERVER="127.0.0.1", SMTP_PORT=str(port), SMTP_STARTTLS="0", SMTP_AUTH="0",
+        SMTP_TIMEOUT="5", OUTBOX_MODE="cli", OUTBOX_SMTP_CONNECTIONS=str(args.connections),
+        OUTBOX_BATCH=str(args.messages + 5), HOUSEKEEP_MODE="off", IMAGE_QUEUE_MODE="cli",
+        PERF_ENABLED="0", NPLUSONE_ENABLED="0", SQLITE_READONLY_ENGINE="0",
+    )
+    sys.path.insert(0, BASE)
+    from app import app
+    from models import db, EmailOutbox
+    from modules.outbox import enqueue, run_sender
+
+    results = []
+    try:
+        with app.app_context():
+            db.create_all()
+            good = [f"user{i}@outbox.test" for i in range(args.messages)]
+            for addr in good + [REJECT, DEFER]:
+                if enqueue(addr, f"Smoke {addr}", f"Ahoj {addr}", kind="smoke") is None:
+                    sys.exit("❌ enqueue() vrátil None – SMTP konfigurácia sa nenačítala")
+            db.session.commit()
+            started = datetime.utcnow()
+
+        print(f"📮 {len(good) + 2} správ → 127.0.0.1:{port} ({args.connections} spojení)")
+        run_sender(app, once=True)
+
+        with app.app_context():
+            rows = {r.to_email: r for r in EmailOutbox.query.filter_by(kind="smoke")}
+            sent = [a for a in good if rows[a].stav == "sent"]
+            _check(results, sorted(handler.delivered) == sorted(good) and len(sent) == len(good),
+                   f"doručené {len(handler.delivered)}/{len(good)}, stav sent {len(sent)}/{len(good)}")
+            r550 = rows[REJECT]
+            _check(results, r550.stav == "failed", f"550 → {r550.stav} ({r550.error})")
+            r451 = rows[DEFER]
+            _check(results, r451.stav == "pending" and r451.next_attempt_at > started,
+                   f"451 → {r451.stav}, ďalší pokus o {(r451.next_attempt_at - started).total_seconds():.0f} s")
+            conns = len(handler.sessions)
+            expected = conns == 1 if args.connections == 1 else 0 < conns <= args.connections
+            _check(results, expected and conns < len(good),
+                   f"spojenia: {conns} na {len(good)} doručených správ")
+
+        _lease_checks(app, results)
+    finally:
+        controller.stop()
+        with app.app_context():
+            db.session.remove()
+            db.engine.dispose()
+        tmp.cleanup()
+
+    print(f"\n{sum(results)}/{len(results)} OK")
+    if not all(results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
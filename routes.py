@@ -1,12 +1,11 @@
-from flask import Blueprint, render_template, request, redirect, url_for, flash, session, current_app
+from flask import Blueprint, render_template, request, redirect, url_for, flash, session
 from flask_login import login_user, logout_user, login_required, current_user
-from models import db, Pouzivatel, Skupina, Mesto
+from models import db, Pouzivatel, Skupina
 from werkzeug.security import check_password_hash
 from werkzeug.utils import secure_filename
+from utils.storage import get_storage, shard_prefix
 from importlib import import_module
 
-import os
-
 bp = Blueprint('main', __name__)
 
 import re
@@ -29,11 +28,6 @@ def allowed_file(filename):
 def index():
     zobraz_formular = request.args.get('zobraz_formular')
 
-    try:
-        mesta = Mesto.query.order_by(Mesto.nazov.asc()).all()
-    except Exception:
-        mesta = []
-
     try:
         dopyty_mod = import_module('modules.dopyty')
         kategorie = getattr(dopyty_mod, 'KATEGORIE', [])
@@ -46,7 +40,6 @@ def index():
         zobraz_formular=zobraz_formular,
         kategorie=kategorie,
         typy=typy,
-        mesta=mesta,
         skupina=None
     )
 
@@ -92,9 +85,9 @@ def logout():
 def upload_fotka():
     file = request.files.get('profil_fotka')
     if file and allowed_file(file.filename):
-        filename = secure_filename(file.filename)
-        filepath = os.path.join(current_app.config['UPLOAD_FOLDER'], filename)
-        file.save(filepath)
+        name = secure_filename(file.filename)
+        filename = f"{shard_prefix('profilovky', name)}/{name}"
+        get_storage().save(filename, file.stream)
 
         current_user.profil_fotka = filename
         db.session.commit()
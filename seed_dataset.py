@@ -0,0 +1,342 @@
+# seed_dataset.py
+"""
+Syntetický dataset pre meranie škálovania (nikdy nie do produkčnej DB).
+
+Objemy pri --scale 1:
+  100k Pouzivatel (s role_data JSON), 1M Sprava, 10k ForumTopic / 200k ForumPost,
+  50k Inzerat + FotoInzerat, 20k Podujatie, 5k Dopyt.
+
+Použitie:
+  python seed_dataset.py                          # instance/bench.db, plný objem
+  python seed_dataset.py --scale 0.05 --reset     # malý dataset na rýchle skúšky
+  python seed_dataset.py --db /tmp/x.db --seed 7
+
+Vkladá sa cez Core `insert()` v dávkach (ORM eventy sa nespúšťajú), preto sa
+Dopyt.end_at dopočíta tu a počítadlá neprečítaných sa na konci zrekonštruujú.
+Mestá sa skopírujú z instance/muzikuj.db, ak tam sú; inak sa vygenerujú.
+Prihlásenie do benchmarku: admin / bench@muzikuj.sk, heslo `heslo123`.
+"""
+import argparse
+import json
+import os
+import random
+import sqlite3
+import sys
+import time
+from datetime import datetime, timedelta, time as dtime
+
+BASE = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_DB = os.path.join(BASE, "instance", "bench.db")
+SOURCE_DB = os.path.join(BASE, "instance", "muzikuj.db")
+
+BATCH = 20_000
+
+VOLUMES = {
+    "pouzivatel": 100_000,
+    "sprava": 1_000_000,
+    "forum_topic": 10_000,
+    "forum_post": 200_000,
+    "inzerat": 50_000,
+    "podujatie": 20_000,
+    "dopyt": 5_000,
+}
+
+MENA = ["Peter", "Jana", "Martin", "Lucia", "Tomáš", "Zuzana", "Michal", "Katarína", "Ján", "Eva",
+        "Marek", "Mária", "Juraj", "Veronika", "Lukáš", "Simona", "Ondrej", "Ivana", "Dávid", "Barbora"]
+PRIEZVISKA = ["Novák", "Horváth", "Kováč", "Varga", "Tóth", "Nagy", "Baláž", "Szabó", "Molnár", "Lukáč",
+              "Kráľ", "Bartoš", "Mikuláš", "Šimko", "Oravec", "Hudák", "Polák", "Kučera", "Sloboda", "Urban"]
+SLOVA = ("hľadám kapelu na svadbu gitarista bubeník spevák skúška koncert zvuk aparatúra mixpult "
+         "predám kúpim zosilňovač klávesy repertoár folk rock jazz pop ľudovky termín cena dohodou "
+         "ďakujem ahoj pozdravujem áno nie možno zajtra víkend sobota piatok hotel sála obec mesto").split()
+
+HUD_OBLASTI = ["spev", "klavesy", "gitara", "bicie", "slacikove", "dychove", "dj", "elektronika", "folklorne"]
+HUD_SPEC = {
+    "spev": ["solo", "vokal", "zbor"], "klavesy": ["klavir", "keyboard", "synth"],
+    "gitara": ["elektricka", "akusticka", "basgitara"], "bicie": ["bicie_suprava", "perkusie", "cajon"],
+    "slacikove": ["husle", "viola"], "dychove": ["saxofon", "trumpeta"], "dj": ["svadobny", "house"],
+    "elektronika": ["sampler", "live_perf"], "folklorne": ["cimbal", "akordeon", "heligonka"],
+}
+SIMPLE_ROLES = ["fotograf", "videograf", "zvukar", "osvetlovac", "technik_podia", "producent", "skladatel"]
+ROLY = ["hudobnik"] * 6 + ["tanecnik", "moderator", "ucitel_hudby", "fotograf", "zvukar", "ine"]
+
+
+def _text(rnd, lo, hi):
+    return " ".join(rnd.choice(SLOVA) for _ in range(rnd.randint(lo, hi))).capitalize() + "."
+
+
+def _skewed(rnd, n):
+    """Id 1..n so šikmým rozdelením (pár veľmi aktívnych používateľov)."""
+    return min(n, int(rnd.paretovariate(1.2))) if rnd.random() < 0.3 else rnd.randint(1, n)
+
+
+def _role_data(rnd, rola):
+    data = {}
+    if rola == "hudobnik":
+        ob = rnd.choice(HUD_OBLASTI)
+        data["hudobnik"] = {"hud_oblast": ob, "hud_spec": rnd.sample(HUD_SPEC[ob], k=rnd.randint(1, 2))}
+    elif rola == "tanecnik":
+        data["tanecnik"] = {"tanec_spec": [rnd.choice(["street", "latino", "moderne"])], "tanec_ine": None}
+    elif rola == "moderator":
+        data["moderator"] = {"podrola": ["moderator"]}
+    elif rola == "ucitel_hudby":
+        data["ucitel_hudby"] = {"ucitel_predmety": rnd.sample(["klavir", "gitara", "spev", "teoria"], k=2),
+                                "ucitel_ine": None}
+    if rnd.random() < 0.25:
+        data["simple_roles"] = rnd.sample(SIMPLE_ROLES, k=rnd.randint(1, 2))
+    return json.dumps(data, ensure_ascii=False)
+
+
+def _insert(conn, table, rows, label):
+    t0 = time.perf_counter()
+    total = 0
+    buf = []
+    for row in rows:
+        buf.append(row)
+        if len(buf) >= BATCH:
+            conn.execute(table.insert(), buf)
+            total += len(buf)
+            buf.clear()
+    if buf:
+        conn.execute(table.insert(), buf)
+        total += len(buf)
+    print(f"  {label:14} {total:>9,} riadkov  {time.perf_counter() - t0:6.1f}s")
+    return total
+
+
+def _load_mesta(rnd):
+    if os.path.exists(SOURCE_DB):
+        try:
+            con = sqlite3.connect(SOURCE_DB)
+            rows = con.execute("SELECT nazov, okres, kraj FROM mesto ORDER BY id").fetchall()
+            con.close()
+            if rows:
+                return rows
+        except sqlite3.Error:
+            pass
+    kraje = ["Bratislavský", "Trnavský", "Trenčiansky", "Nitriansky", "Žilinský", "Banskobystrický",
+             "Prešovský", "Košický"]
+    return [(f"Obec {i}", f"Okres {i % 79}", kraje[i % 8]) for i in range(1, 2901)]
+
+
+def _create_schema(db, upgrade):
+    """
+    Schéma = schéma hlavnej DB + `flask db upgrade` na head.
+    (Migrácie sa z prázdnej DB postaviť nedajú – baseline predpokladá existujúce tabuľky.)
+    """
+    if not os.path.exists(SOURCE_DB):
+        db.create_all()
+        return
+    src = sqlite3.connect(SOURCE_DB)
+    ddl = src.execute(
+        "SELECT sql FROM sqlite_master WHERE sql IS NOT NULL AND name NOT LIKE 'sqlite_%' "
+        # tieňové tabuľky FTS5 (pouzivatel_fts_data, …) vytvorí samotná CREATE VIRTUAL TABLE
+        "AND name NOT LIKE '%\\_fts\\_%' ESCAPE '\\' "
+        "ORDER BY CASE type WHEN 'table' THEN 0 ELSE 1 END"
+    ).fetchall()
+    version = src.execute("SELECT version_num FROM alembic_version").fetchall()
+    src.close()
+    with db.engine.begin() as conn:
+        for (sql,) in ddl:
+            conn.exec_driver_sql(sql)
+        for (v,) in version:
+            conn.exec_driver_sql("INSERT INTO alembic_version (version_num) VALUES (?)", (v,))
+    upgrade()
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Syntetický dataset pre benchmark.")
+    ap.add_argument("--db", default=DEFAULT_DB, help="cieľový SQLite súbor (default instance/bench.db)")
+    ap.add_argument("--scale", type=float, default=1.0, help="násobok objemov (napr. 0.05)")
+    ap.add_argument("--seed", type=int, default=42)
+    ap.add_argument("--reset", action="store_true", help="zmaž cieľovú DB, ak existuje")
+    args = ap.parse_args()
+
+    db_file = os.path.abspath(args.db)
+    if os.path.abspath(SOURCE_DB) == db_file:
+        sys.exit("❌ Do hlavnej DB (instance/muzikuj.db) syntetické dáta nepatria.")
+    if os.path.exists(db_file):
+        if not args.reset:
+            sys.exit(f"❌ {db_file} už existuje (použi --reset).")
+        os.remove(db_file)
+
+    os.environ["DATABASE_URL"] = "sqlite:///" + db_file.replace("\\", "/")
+    os.environ["HOUSEKEEP_MODE"] = "off"
+    sys.path.insert(0, BASE)
+
+    from werkzeug.security import generate_password_hash
+    from flask_migrate import upgrade
+    from app import app
+    from models import (db, Mesto, Pouzivatel, Sprava, ForumCategory, ForumTopic, ForumPost,
+                        Inzerat, FotoInzerat, Podujatie, Dopyt)
+    from modules.dopyty import dopyt_end_at
+    from utils.unread import reconcile_unread
+    from utils.fulltext import rebuild_people_index
+    from utils.search_keys import backfill_keys
+
+    rnd = random.Random(args.seed)
+    n = {k: max(1, int(v * args.scale)) for k, v in VOLUMES.items()}
+    now = datetime.utcnow().replace(microsecond=0)
+
+    with app.app_context():
+        _create_schema(db, upgrade)
+        print(f"🎲 Seed do {db_file} (scale={args.scale}, seed={args.seed})")
+
+        with db.engine.begin() as conn:
+            conn.exec_driver_sql("PRAGMA synchronous=OFF")
+
+            # --- mestá ---
+            mesta = _load_mesta(rnd)
+            _insert(conn, Mesto.__table__,
+                    ({"id": i, "nazov": nz, "okres": ok, "kraj": kr} for i, (nz, ok, kr) in enumerate(mesta, 1)),
+                    "mesto")
+            n_mesta = len(mesta)
+            # menšie mestá sa používajú menej
+            hot_mesta = list(range(1, min(n_mesta, 80) + 1))
+
+            def mesto_id():
+                return rnd.choice(hot_mesta) if rnd.random() < 0.6 else rnd.randint(1, n_mesta)
+
+            # --- používatelia ---
+            heslo = generate_password_hash("heslo123")
+            n_users = n["pouzivatel"]
+
+            conn.execute(Pouzivatel.__table__.insert(), [{
+                "id": 1, "prezyvka": "admin", "email": "bench@muzikuj.sk", "heslo": heslo,
+                "is_admin": True, "aktivny": True, "verejny_ucet": True, "searchable": True,
+                "datum_registracie": now - timedelta(days=900),
+            }])
+
+            def users():
+                for i in range(2, n_users + 1):
+                    ico = rnd.random() < 0.05
+                    rola = None if ico else rnd.choice(ROLY)
+                    mid = mesto_id()
+                    yield {
+                        "id": i,
+                        "prezyvka": f"user{i}",
+                        "meno": rnd.choice(MENA),
+                        "priezvisko": rnd.choice(PRIEZVISKA),
+                        "email": f"user{i}@example.invalid",
+                        "heslo": heslo,
+                        "bio": _text(rnd, 5, 40) if rnd.random() < 0.5 else None,
+                        "obec": None if ico else mesta[mid - 1][0],
+                        "datum_registracie": now - timedelta(minutes=rnd.randint(0, 3 * 365 * 24 * 60)),
+                        "aktivny": rnd.random() < 0.97,
+                        "typ_subjektu": "ico" if ico else "fyzicka",
+                        "organizacia_nazov": f"{rnd.choice(PRIEZVISKA)} s.r.o. {i}" if ico else None,
+                        "sidlo_mesto": mesta[mid - 1][0] if ico else None,
+                        "rola": rola,
+                        "hud_oblast": None,
+                        "role_data": None if ico else _role_data(rnd, rola),
+                        "verejny_ucet": rnd.random() < 0.6,
+                        "searchable": rnd.random() < 0.6,
+                        "is_vip": rnd.random() < 0.02,
+                    }
+            _insert(conn, Pouzivatel.__table__, users(), "pouzivatel")
+
+            # --- správy ---
+            def spravy():
+                for i in range(1, n["sprava"] + 1):
+                    od = _skewed(rnd, n_users)
+                    komu = _skewed(rnd, n_users)
+                    if komu == od:
+                        komu = od % n_users + 1
+                    yield {
+                        "id": i, "obsah": _text(rnd, 3, 60),
+                        "datum": now - timedelta(seconds=rnd.randint(0, 2 * 365 * 86400)),
+                        "od_id": od, "komu_id": komu,
+                        "deleted_by_sender": rnd.random() < 0.05,
+                        "deleted_by_recipient": rnd.random() < 0.05,
+                        "precitane": rnd.random() < 0.8,
+                    }
+            _insert(conn, Sprava.__table__, spravy(), "spravy")
+
+            # --- fórum ---
+            kategorie = ["Hľadám kapelu", "Technika a aparatúra", "Svadby a akcie", "Výučba", "Off-topic", "Bazár"]
+            _insert(conn, ForumCategory.__table__,
+                    ({"id": i, "nazov": k, "slug": f"kat-{i}"} for i, k in enumerate(kategorie, 1)),
+                    "forum_category")
+            n_topics = n["forum_topic"]
+            topic_times = {}
+
+            def topics():
+                for i in range(1, n_topics + 1):
+                    t = now - timedelta(minutes=rnd.randint(0, 2 * 365 * 24 * 60))
+                    topic_times[i] = t
+                    yield {"id": i, "nazov": _text(rnd, 3, 9)[:200], "body": _text(rnd, 10, 80),
+                           "vytvorene_at": t, "aktivita_at": t,
+                           "autor_id": _skewed(rnd, n_users), "kategoria_id": rnd.randint(1, len(kategorie))}
+            _insert(conn, ForumTopic.__table__, topics(), "forum_topic")
+
+            def posts():
+                for i in range(1, n["forum_post"] + 1):
+                    tid = min(n_topics, int(rnd.paretovariate(0.9))) if rnd.random() < 0.4 else rnd.randint(1, n_topics)
+                    t = topic_times[tid] + timedelta(minutes=rnd.randint(1, 60 * 24 * 30))
+                    yield {"id": i, "body": _text(rnd, 3, 80), "vytvorene_at": t, "is_answer": False,
+                           "autor_id": _skewed(rnd, n_users), "topic_id": tid}
+            _insert(conn, ForumPost.__table__, posts(), "forum_post")
+            conn.exec_driver_sql(
+                "UPDATE forum_topic SET aktivita_at = COALESCE("
+                "(SELECT MAX(p.vytvorene_at) FROM forum_post p WHERE p.topic_id = forum_topic.id), aktivita_at)"
+            )
+
+            # --- bazár ---
+            n_inz = n["inzerat"]
+
+            def inzeraty():
+                for i in range(1, n_inz + 1):
+                    mid = mesto_id()
+                    yield {"id": i, "typ": rnd.choice(["predam", "kupim", "vymenim"]),
+                           "kategoria": rnd.choice(["gitary", "klavesy", "bicie", "zvuk", "dychove", "ine"]),
+                           "mesto": mesta[mid - 1][0], "mesto_id": mid,
+                           "doprava": rnd.choice(["osobne", "posta", "kurier"]),
+                           "cena": round(rnd.uniform(5, 3000), 0), "popis": _text(rnd, 10, 60),
+                           "datum": now - timedelta(minutes=rnd.randint(0, 365 * 24 * 60)),
+                           "pouzivatel_id": _skewed(rnd, n_users)}
+            _insert(conn, Inzerat.__table__, inzeraty(), "inzerat")
+
+            def fotky():
+                fid = 0
+                for iid in range(1, n_inz + 1):
+                    for k in range(rnd.choice((0, 1, 1, 2, 3, 4))):
+                        fid += 1
+                        yield {"id": fid, "nazov_suboru": f"seed_{iid}_{k}.jpg", "inzerat_id": iid}
+            _insert(conn, FotoInzerat.__table__, fotky(), "foto_inzerat")
+
+            # --- podujatia ---
+            def podujatia():
+                for i in range(1, n["podujatie"] + 1):
+                    start = now + timedelta(hours=rnd.randint(-30 * 24, 180 * 24))
+                    yield {"id": i, "pouzivatel_id": _skewed(rnd, n_users), "nazov": _text(rnd, 2, 6)[:120],
+                           "organizator": rnd.choice(PRIEZVISKA), "miesto": mesta[mesto_id() - 1][0],
+                           "start_dt": start, "popis": _text(rnd, 10, 60), "created_at": start - timedelta(days=20),
+                           "stav": rnd.choices(["publikovane", "pending", "zamietnute"], [80, 15, 5])[0],
+                           "delete_at": start + timedelta(days=1)}
+            _insert(conn, Podujatie.__table__, podujatia(), "podujatie")
+
+            # --- dopyty ---
+            def dopyty():
+                for i in range(1, n["dopyt"] + 1):
+                    d = (now + timedelta(days=rnd.randint(-60, 240))).date()
+                    od = dtime(rnd.randint(10, 20), 0) if rnd.random() < 0.7 else None
+                    do = dtime(23, 0) if od and rnd.random() < 0.5 else None
+                    end = dopyt_end_at(d, od, do)
+                    yield {"id": i, "meno": rnd.choice(MENA), "email": f"dopyt{i}@example.invalid",
+                           "typ_akcie": rnd.choice(["svadba", "oslava", "ples", "koncert", "firemny_vecierok"]),
+                           "datum": d, "cas_od": od, "cas_do": do, "popis": _text(rnd, 10, 50),
+                           "rozpocet": rnd.choice([None, 300, 500, 800, 1200]), "mesto_id": mesto_id(),
+                           "aktivny": end > now, "end_at": end,
+                           "created_at": now - timedelta(days=rnd.randint(0, 90)), "updated_at": now}
+            _insert(conn, Dopyt.__table__, dopyty(), "dopyt")
+
+        changed = reconcile_unread()
+        print(f"  počítadlá neprečítaných: {changed:,} používateľov")
+        # hromadný insert obišiel ORM hooky → hľadacie kľúče a fulltext ľudí dopočítaj
+        print(f"  hľadacie kľúče: {backfill_keys():,}, fulltext ľudí: {rebuild_people_index():,}")
+        with db.engine.connect() as conn:
+            conn.exec_driver_sql("ANALYZE")
+    print("✅ Hotovo. Benchmark: python benchmark.py --db", db_file)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+// static/mesta_suggest.js
+// Našepkávač miest pre polia z templates/includes/mesto_input.html.
+// Dáta ťahá z /api/mesta/suggest?q=… (odpoveď: {"items": [[id, nazov, okres, kraj], …]}).
+
+(() => {
+  const API = '/api/mesta/suggest';
+  const DEBOUNCE_MS = 150;
+  let seq = 0;
+
+  const labelFor = (it) => it[2] ? `${it[1]} (${it[2]})` : it[1];
+
+  function init(input){
+    if (input.dataset.msInit) return;
+    input.dataset.msInit = '1';
+
+    const by = input.dataset.mestoSuggest || 'nazov';
+    const hidden = by === 'id' ? input.parentElement.querySelector('input[type=hidden]') : null;
+    const initial = (input.value || '').trim();   // predvyplnené mesto (úprava) – id už je v skrytom poli
+
+    const list = document.createElement('datalist');
+    list.id = `mesta-dl-${++seq}`;
+    input.after(list);
+    input.setAttribute('list', list.id);
+
+    const byLabel = new Map();   // label → položka; drží aj staršie výsledky, aby výber „nezmizol“
+    let timer = null;
+    let ctrl = null;
+
+    function sync(){
+      if (!hidden) return;
+      const text = (input.value || '').trim();
+      const it = byLabel.get(text);
+      if (it) hidden.value = it[0];
+      else if (text !== initial) hidden.value = '';
+      // napísaný text bez výberu by odišiel ako prázdne id – formulár neodošleme
+      input.setCustomValidity(text && !hidden.value ? 'Vyber mesto zo zoznamu návrhov.' : '');
+    }
+
+    async function load(q){
+      if (ctrl) ctrl.abort();
+      ctrl = new AbortController();
+      try {
+        const r = await fetch(`${API}?q=${encodeURIComponent(q)}&limit=12`, { signal: ctrl.signal });
+        if (!r.ok) return;
+        const data = await r.json();
+        list.replaceChildren(...(data.items || []).map(it => {
+          const opt = document.createElement('option');
+          if (by === 'id') {
+            opt.value = labelFor(it);
+            byLabel.set(opt.value, it);
+          } else {
+            opt.value = it[1];
+          }
+          opt.label = [it[2], it[3]].filter(Boolean).join(', ');
+          return opt;
+        }));
+        sync();
+      } catch (_) { /* zrušený alebo zlyhaný request – nevadí */ }
+    }
+
+    input.addEventListener('input', () => {
+      sync();
+      const q = (input.value || '').trim();
+      clearTimeout(timer);
+      if (q.length < 1) { list.replaceChildren(); return; }
+      if (byLabel.has(q)) return;   // vybraná položka zo zoznamu
+      timer = setTimeout(() => load(q), DEBOUNCE_MS);
+    });
+    input.addEventListener('change', sync);
+  }
+
+  function initAll(root=document){
+    root.querySelectorAll('input[data-mesto-suggest]').forEach(init);
+  }
+
+  document.addEventListener('DOMContentLoaded', () => initAll());
+  window.initMestaSuggest = initAll;
+})();
@@ -0,0 +1,187 @@
+# upload_benchmark.py
+"""
+Pamäť servera pri nahratí galérie: peak RSS počas jedného POSTu s N fotkami.
+
+Server beží v samostatnom procese (werkzeug, jeden request naraz), klient mu
+pošle multipart telo prúdovo zo súboru na disku – meria sa len strana servera.
+Peak RSS = VmHWM z /proc/<pid>/status (Linux) pred a po uploade.
+
+Použitie:
+  python seed_dataset.py --scale 0.1 --reset        # najprv dáta (instance/bench.db)
+  python upload_benchmark.py                        # 20 fotiek 3000x2000 do galérie skupiny
+  python upload_benchmark.py --files 20 --width 4000 --height 3000
+  python upload_benchmark.py --queue inline         # aj so spracovaním v requeste
+
+Fotky sú náhodný šum (JPEG sa nedá dobre skomprimovať → realistická veľkosť).
+Benchmark používateľovi (--user-id) založí / vyprázdni skupinu „Upload benchmark“.
+"""
+import argparse
+import http.client
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+
+BASE = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_DB = os.path.join(BASE, "instance", "bench.db")
+BENCH_GROUP = "Upload benchmark"
+
+
+def _env(db_file: str, queue: str) -> dict:
+    return dict(os.environ, DATABASE_URL="sqlite:///" + db_file.replace("\\", "/"),
+                HOUSEKEEP_MODE="off", IMAGE_QUEUE_MODE=queue, PERF_ENABLED="0",
+                NPLUSONE_ENABLED="0", SQLITE_READONLY_ENGINE="0")
+
+
+def _proc_kb(pid: int, field: str) -> int | None:
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1])
+    except OSError:
+        return None
+    return None
+
+
+def _make_photos(folder: str, n: int, width: int, height: int) -> list[str]:
+    from PIL import Image
+    paths = []
+    for i in range(n):
+        img = Image.frombytes("RGB", (width, height), random.randbytes(width * height * 3))
+        p = os.path.join(folder, f"foto_{i:02}.jpg")
+        img.save(p, "JPEG", quality=90)
+        paths.append(p)
+    return paths
+
+
+def _write_body(path: str, photos: list[str], boundary: str) -> int:
+    """Multipart telo do súboru (po blokoch, nech ani klient nedrží všetko v RAM)."""
+    with open(path, "wb") as out:
+        for p in photos:
+            out.write(f"--{boundary}\r\nContent-Disposition: form-data; name=\"fotos\"; "
+                      f"filename=\"{os.path.basename(p)}\"\r\nContent-Type: image/jpeg\r\n\r\n".encode())
+            with open(p, "rb") as f:
+                while chunk := f.read(1024 * 1024):
+                    out.write(chunk)
+            out.write(b"\r\n")
+        out.write(f"--{boundary}--\r\n".encode())
+    return os.path.getsize(path)
+
+
+def _prepare(user_id: int) -> str:
+    """Skupina pre používateľa (prázdna galéria) + session cookie."""
+    from app import app
+    from models import db, Pouzivatel, Skupina
+
+    with app.app_context():
+        user = db.session.get(Pouzivatel, user_id)
+        if user is None:
+            sys.exit(f"❌ používateľ {user_id} neexistuje")
+        grp = user.skupina_clen[0] if user.skupina_clen else None
+        if grp is None:
+            grp = Skupina(nazov=BENCH_GROUP, zakladatel_id=user.id)
+            grp.clenovia.append(user)
+            db.session.add(grp)
+        for foto in list(grp.galeria):
+            db.session.delete(foto)  # ORM delete → počítadlá blobov sedia
+        db.session.commit()
+
+        serializer = app.session_interface.get_signing_serializer(app)
+        cookie = serializer.dumps({"guest_access_granted": True, "_user_id": str(user_id), "_fresh": True})
+        return f"{app.config.get('SESSION_COOKIE_NAME', 'session')}={cookie}"
+
+
+def _serve(port: int):
+    sys.path.insert(0, BASE)
+    from werkzeug.serving import make_server
+    from app import app
+    srv = make_server("127.0.0.1", port, app, threaded=False)
+    print("ready", flush=True)
+    srv.serve_forever()
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Peak RSS servera počas uploadu galérie.")
+    ap.add_argument("--db", default=DEFAULT_DB, help="SQLite DB (default instance/bench.db zo seed_dataset.py)")
+    ap.add_argument("--files", type=int, default=20)
+    ap.add_argument("--width", type=int, default=3000)
+    ap.add_argument("--height", type=int, default=2000)
+    ap.add_argument("--user-id", type=int, default=1)
+    ap.add_argument("--queue", default="cli", choices=("cli", "inline"),
+                    help="cli = len uloženie + fronta (default), inline = aj spracovanie v requeste")
+    ap.add_argument("--serve", type=int, help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args.serve:
+        return _serve(args.serve)
+
+    db_file = os.path.abspath(args.db)
+    if not os.path.exists(db_file):
+        sys.exit(f"❌ {db_file} neexistuje – najprv spusti seed_dataset.py")
+    if not os.path.exists("/proc/self/status"):
+        sys.exit("❌ meranie RSS potrebuje /proc (Linux)")
+
+    os.environ.update(_env(db_file, args.queue))
+    sys.path.insert(0, BASE)
+    cookie = _prepare(args.user_id)
+
+    port = _free_port()
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"🖼️  generujem {args.files} fotiek {args.width}x{args.height} …")
+        photos = _make_photos(tmp, args.files, args.width, args.height)
+        boundary = uuid.uuid4().hex
+        body_path = os.path.join(tmp, "body.bin")
+        body_size = _write_body(body_path, photos, boundary)
+        for p in photos:
+            os.remove(p)
+
+        server = subprocess.Popen([sys.executable, os.path.abspath(__file__), "--serve", str(port)],
+                                  cwd=BASE, env=_env(db_file, args.queue),
+                                  stdout=subprocess.PIPE, text=True)
+        try:
+            server.stdout.readline()  # "ready"
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=600)
+            conn.request("GET", "/moja-skupina", headers={"Cookie": cookie})  # zahriatie (importy, šablóny)
+            conn.getresponse().read()
+
+            rss_before = _proc_kb(server.pid, "VmRSS")
+            hwm_before = _proc_kb(server.pid, "VmHWM")
+            started = time.perf_counter()
+            with open(body_path, "rb") as body:
+                conn.request("POST", "/skupina/galeria", body=body, headers={
+                    "Cookie": cookie,
+                    "Content-Type": f"multipart/form-data; boundary={boundary}",
+                    "Content-Length": str(body_size),
+                })
+                resp = conn.getresponse()
+                resp.read()
+            elapsed = time.perf_counter() - started
+            hwm_after = _proc_kb(server.pid, "VmHWM")
+            rss_after = _proc_kb(server.pid, "VmRSS")
+        finally:
+            server.terminate()
+            server.wait()
+
+    mb = 1024
+    print(f"\nPOST /skupina/galeria  {args.files} súborov, {body_size / 1024 / 1024:.1f} MB, "
+          f"queue={args.queue}  → {resp.status} {resp.getheader('Location', '')}")
+    print(f"  čas             {elapsed * 1000:8.0f} ms")
+    print(f"  RSS pred        {rss_before / mb:8.1f} MB")
+    print(f"  RSS po          {rss_after / mb:8.1f} MB")
+    print(f"  peak RSS        {hwm_after / mb:8.1f} MB  (pred uploadom {hwm_before / mb:.1f} MB)")
+    print(f"  nárast peaku    {(hwm_after - hwm_before) / mb:8.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
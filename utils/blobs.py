@@ -0,0 +1,321 @@
+# utils/blobs.py
+"""
+Obsahovo adresované úložisko obrázkov (tabuľka `blob`).
+
+Originál uploadu sa pri ukladaní prúdovo zahashuje (SHA-256). Rovnaký obsah =
+rovnaký blob: opakovaný upload tej istej fotky (iný účet, iný inzerát, podujatie
+aj reklama) sa nespracúva znova, len dostane odkaz na existujúce varianty.
+
+Súbory: blobs/ab/cd/<sha>_<veľkosť>.(webp|jpg) v úložisku (utils/storage.py) –
+dve úrovne podľa prefixu hashu, nech v jednom adresári nie sú desaťtisíce súborov.
+render() zapisuje lokálne (beží v process poole), publish() výsledok nahrá
+do úložiska (pri local backende sú súbory už na mieste).
+Do riadkov galérií sa kopírujú kľúče s cestou ("blobs/ab/cd/<sha>_1200.jpg"),
+takže šablóny a utils/images.py fungujú bez JOINu na `blob`. Lomka v názve =
+súbor patrí blobu (staré ploché názvy ju nemajú) a delete_image ho nemaže.
+
+Počet odkazov (Blob.ref_count) držia ORM eventy na modeloch z REFS – insert,
+zmena blob stĺpca aj delete (vrátane cascade pri zmazaní inzerátu / účtu)
+upravia počítadlo atómovým UPDATE v tej istej transakcii. Súbory fyzicky maže
+až collect_garbage() (housekeep "blobs_gc") pre bloby s ref_count 0 staršie
+ako ochranná lehota – rollback ani súbežný re-upload tak nestratí dáta.
+`reconcile_blobs()` (CLI `flask blobs --reconcile`) prepočíta počítadlá.
+"""
+import hashlib
+import os
+import uuid
+from datetime import datetime, timedelta
+
+from sqlalchemy import case, delete, event, func, inspect, update
+from sqlalchemy.exc import IntegrityError
+
+from models import db, Blob, GaleriaPouzivatel, GaleriaSkupina, FotoInzerat, Podujatie, Reklama
+from utils.images import save_image, delete_image, image_files, prefix_variants, PENDING, META_FIELDS
+from utils.storage import get_storage, staging_dir, shard, BLOB_PREFIX
+from utils.uploads import sniff_image, UploadRejected, SNIFF_BYTES
+
+CHUNK = 1024 * 1024
+GC_GRACE_SECONDS = 3600
+
+_blob = Blob.__table__
+
+# model -> (stĺpec s blob id, stĺpec s názvom, stĺpec s variantmi, prefix metadát, riadok sa dá zmazať)
+# Položky galérie bez obrázka nemajú zmysel (zmažú sa), podujatie/reklama len stratí fotku.
+REFS = {
+    GaleriaPouzivatel: ("blob_id", "nazov_suboru", "varianty", "", True),
+    GaleriaSkupina:    ("blob_id", "nazov_suboru", "varianty", "", True),
+    FotoInzerat:       ("blob_id", "nazov_suboru", "varianty", "", True),
+    Podujatie:         ("foto_blob_id", "foto_nazov", "foto_varianty", "foto_", False),
+    Reklama:           ("foto_blob_id", "foto_nazov", "foto_varianty", "foto_", False),
+}
+
+# prefixy v úložisku so starými (plochými) súbormi bez blobu
+LEGACY_FOLDERS = {
+    GaleriaPouzivatel: "galeria_pouzivatel",
+    GaleriaSkupina:    "galeria_skupina",
+    FotoInzerat:       "galeria_inzerat",
+    Podujatie:         "podujatia",
+    Reklama:           "reklamy",
+}
+
+
+# -----------------------------
+# Cesty a kľúče
+# -----------------------------
+def blob_root() -> str:
+    """Lokálny adresár, kam render() zapisuje (local = priamo static/blobs)."""
+    return staging_dir(BLOB_PREFIX)
+
+
+def _pending_key(sha: str) -> str:
+    """Zástupný názov, kým blob nie je spracovaný (stĺpce s názvom sú NOT NULL)."""
+    return f"{BLOB_PREFIX}/{shard(sha)}/{sha}"
+
+
+def render(src_path: str, root: str, sha: str) -> tuple[str, str, dict]:
+    """
+    Vyrob varianty blobu (beží aj v process poole – bez app contextu).
+    Vráti (kľúč hlavného súboru, JSON variantov s kľúčmi, metadáta).
+    """
+    prefix = f"{BLOB_PREFIX}/{shard(sha)}"
+    name, raw, meta = save_image(src_path, os.path.join(root, shard(sha)), sha)
+    return f"{prefix}/{name}", prefix_variants(raw, prefix), meta
+
+
+def set_rendered(blob: Blob, result: tuple):
+    """Zapíš výsledok render() do blobu (stav ready)."""
+    blob.nazov, blob.varianty, meta = result
+    for f in META_FIELDS:
+        setattr(blob, f, meta.get(f))
+    blob.stav = "ready"
+
+
+def publish(result: tuple, root: str):
+    """Nahraj súbory z render() do úložiska (`root` = adresár, kam render zapisoval)."""
+    st = get_storage()
+    base = os.path.dirname(root)
+    for key in image_files(result[0], result[1]):
+        st.put_file(key, os.path.join(base, key))
+
+
+def blob_keys(blob: Blob) -> set[str]:
+    """Kľúče všetkých súborov blobu v úložisku."""
+    return image_files(blob.nazov, blob.varianty)
+
+
+# -----------------------------
+# Upload
+# -----------------------------
+def ingest(file_storage, folder: str, max_bytes: int | None = None) -> tuple[str, str, int]:
+    """
+    Prúdovo ulož upload do `folder` a počas zápisu ho zahashuj.
+    Typ sa overí z prvých bajtov, veľkosť po každom bloku (utils/uploads.py).
+    Vráti (názov dočasného súboru, sha256, veľkosť). Pri chybe UploadRejected /
+    OSError – rozpísaný súbor zmaže.
+    """
+    src = getattr(file_storage, "stream", file_storage)
+    head = src.read(SNIFF_BYTES)
+    if sniff_image(head) is None:
+        raise UploadRejected("nepodporovaný typ súboru")
+
+    os.makedirs(folder, exist_ok=True)
+    tmp_name = f"{uuid.uuid4().hex}.part"
+    path = os.path.join(folder, tmp_name)
+    h, size = hashlib.sha256(head), len(head)
+    try:
+        with open(path, "wb") as out:
+            out.write(head)
+            while True:
+                chunk = src.read(CHUNK)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if max_bytes and size > max_bytes:
+                    raise UploadRejected(f"súbor je väčší ako {max_bytes // (1024 * 1024)} MB")
+                h.update(chunk)
+                out.write(chunk)
+    except (OSError, UploadRejected):
+        _remove(path)
+        raise
+    return tmp_name, h.hexdigest(), size
+
+
+def get_or_create(sha: str, size: int) -> tuple[Blob, bool]:
+    """Blob pre hash; (blob, True) ak vznikol teraz. Súbežný insert rieši savepoint."""
+    blob = Blob.query.filter_by(sha256=sha).first()
+    if blob is not None:
+        return blob, False
+    blob = Blob(sha256=sha, size=size, stav="pending", ref_count=0)
+    try:
+        with db.session.begin_nested():
+            db.session.add(blob)
+    except IntegrityError:
+        return Blob.query.filter_by(sha256=sha).one(), False
+    return blob, True
+
+
+def _copy_values(model, blob: Blob | None) -> dict:
+    """Stĺpce riadku `model`, ktoré sa kopírujú z blobu (None = vyčistiť)."""
+    _, name, var, prefix, _ = REFS[model]
+    values = {name: blob and blob.nazov, var: blob and blob.varianty}
+    for f in META_FIELDS:
+        values[prefix + f] = blob and getattr(blob, f)
+    return values
+
+
+def attach(row, blob: Blob):
+    """Nastav riadku odkaz na blob + skopíruj kľúče a metadáta (PENDING, kým sa spracúva)."""
+    col, name, var, _, _ = REFS[type(row)]
+    if blob.id is None:
+        db.session.flush()
+    setattr(row, col, blob.id)
+    for k, v in _copy_values(type(row), blob).items():
+        setattr(row, k, v)
+    if blob.stav != "ready":
+        setattr(row, name, _pending_key(blob.sha256))
+        setattr(row, var, PENDING)
+
+
+def detach(row):
+    """Odober riadku fotku – blob súbor zmaže až GC; starý plochý súbor hneď."""
+    col, name, var, _, _ = REFS[type(row)]
+    delete_image(LEGACY_FOLDERS[type(row)], getattr(row, name), getattr(row, var))
+    setattr(row, col, None)
+    for k in _copy_values(type(row), None):
+        setattr(row, k, None)
+
+
+def propagate(blob: Blob) -> int:
+    """Po spracovaní blobu prepíš kľúče a metadáta vo všetkých riadkoch, ktoré naň ukazujú."""
+    n = 0
+    for model, (col, *_rest) in REFS.items():
+        t = model.__table__
+        res = db.session.execute(update(t).where(t.c[col] == blob.id)
+                                 .values(_copy_values(model, blob)))
+        n += res.rowcount or 0
+    return n
+
+
+def drop_refs(blob: Blob) -> int:
+    """Blob nie je obrázok: položky galérií zmaž, podujatiu/reklame zober fotku."""
+    n = 0
+    for model, (col, _, _, _, deletable) in REFS.items():
+        for row in model.query.filter(getattr(model, col) == blob.id).all():
+            if deletable:
+                db.session.delete(row)  # ORM delete → event zníži ref_count
+            else:
+                detach(row)
+            n += 1
+    return n
+
+
+# -----------------------------
+# Počítadlo odkazov (ORM eventy)
+# -----------------------------
+def _apply(conn, blob_id, delta: int):
+    if not blob_id or not delta:
+        return
+    new = _blob.c.ref_count + delta
+    # released_at ide prvé: MySQL vyhodnocuje SET zľava a videl by už nový ref_count
+    conn.execute(update(_blob).where(_blob.c.id == blob_id).ordered_values(
+        (_blob.c.released_at, case((new <= 0, datetime.utcnow()), else_=None)),
+        (_blob.c.ref_count, new),
+    ))
+
+
+def _before(target, key):
+    hist = inspect(target).attrs[key].history
+    if hist.deleted:
+        return hist.deleted[0]
+    return getattr(target, key)
+
+
+def _register(model, col):
+    # active_history: po commite expirovaný atribút by inak nepoznal starú hodnotu
+    event.listen(getattr(model, col), "set", lambda target, value, oldvalue, initiator: value,
+                 active_history=True, retval=True)
+
+    @event.listens_for(model, "after_insert")
+    def _inserted(mapper, conn, target):
+        _apply(conn, getattr(target, col), 1)
+
+    @event.listens_for(model, "after_update")
+    def _updated(mapper, conn, target):
+        old, new = _before(target, col), getattr(target, col)
+        if old != new:
+            _apply(conn, old, -1)
+            _apply(conn, new, 1)
+
+    @event.listens_for(model, "after_delete")
+    def _deleted(mapper, conn, target):
+        _apply(conn, getattr(target, col), -1)
+
+
+for _model, (_col, *_rest) in REFS.items():
+    _register(_model, _col)
+
+
+# -----------------------------
+# GC a rekonciliácia
+# -----------------------------
+def _remove(path: str):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def collect_garbage(grace_seconds: int = GC_GRACE_SECONDS, dry_run: bool = False) -> tuple[int, int]:
+    """
+    Zmaž bloby bez odkazov (ref_count <= 0 dlhšie ako lehota) aj s ich súbormi.
+    Vráti (počet blobov, uvoľnené bajty v úložisku).
+    """
+    st = get_storage()
+    cutoff = datetime.utcnow() - timedelta(seconds=grace_seconds)
+    cands = (Blob.query.filter(Blob.ref_count <= 0, Blob.released_at.isnot(None),
+                               Blob.released_at < cutoff)
+             .order_by(Blob.id).limit(1000).all())
+    count = freed = 0
+    for blob in cands:
+        keys = blob_keys(blob)
+        size = sum(st.size(k) or 0 for k in keys)
+        if not dry_run:
+            # podmienka znova v DELETE: medzitým ho mohol niekto nahrať odznova
+            res = db.session.execute(delete(_blob).where(_blob.c.id == blob.id, _blob.c.ref_count <= 0))
+            db.session.commit()
+            if res.rowcount != 1:
+                continue
+            for k in keys:
+                st.delete(k)
+        count += 1
+        freed += size
+    if dry_run:
+        db.session.rollback()
+    return count, freed
+
+
+def reconcile_blobs() -> int:
+    """Prepočítaj ref_count zo zdrojových tabuliek. Vráti počet opravených blobov."""
+    want = {}
+    for model, (col, *_rest) in REFS.items():
+        c = getattr(model, col)
+        for blob_id, cnt in db.session.query(c, func.count()).filter(c.isnot(None)).group_by(c).all():
+            want[blob_id] = want.get(blob_id, 0) + int(cnt)
+
+    now = datetime.utcnow()
+    changed = 0
+    for blob_id, cur, released in db.session.query(Blob.id, Blob.ref_count, Blob.released_at).all():
+        n = want.get(blob_id, 0)
+        if cur != n or (n == 0) != (released is not None):
+            db.session.execute(update(_blob).where(_blob.c.id == blob_id)
+                               .values(ref_count=n, released_at=(released or now) if n == 0 else None))
+            changed += 1
+    db.session.commit()
+    return changed
+
+
+def blob_stats() -> dict:
+    row = db.session.query(func.count(Blob.id), func.coalesce(func.sum(Blob.size), 0),
+                           func.coalesce(func.sum(Blob.ref_count), 0)).one()
+    orphans = db.session.query(func.count(Blob.id)).filter(Blob.ref_count <= 0).scalar()
+    return {"blobs": row[0], "original_bytes": int(row[1]), "refs": int(row[2]), "unreferenced": orphans}
@@ -0,0 +1,178 @@
+# utils/db_engine.py
+"""
+Nastavenie DB enginu pre produkciu.
+
+URI a pool (DATABASE_URL, DB_POOL_*): `normalize_database_uri()` doplní driver
+(mysql:// -> mysql+pymysql://, postgres:// -> postgresql://), `engine_options()`
+zostaví SQLALCHEMY_ENGINE_OPTIONS (pool_size, max_overflow, pre_ping, recycle, timeout).
+
+SQLite profil (SQLITE_TUNING) sa aplikuje pri každom novom spojení:
+  journal_mode=WAL         čitatelia neblokujú zapisovateľa a naopak
+  synchronous=NORMAL       pri WAL bezpečné, výrazne menej fsync
+  busy_timeout             namiesto okamžitého „database is locked“ počká
+  mmap_size, cache_size    viac stránok v pamäti
+  temp_store=MEMORY        dočasné tabuľky (ORDER BY, GROUP BY) v RAM
+
+Voliteľný read-only engine (SQLITE_READONLY_ENGINE): GET/HEAD requesty čítajú
+cez samostatné `mode=ro` spojenia, takže nikdy nedržia zápisový zámok.
+Zápisy (flush, UPDATE/DELETE) a všetko po prvom zápise v session idú na hlavný engine.
+
+`sqlite_optimize()` beží periodicky z modules/housekeep (PRAGMA optimize, ANALYZE).
+"""
+import sqlite3
+
+from flask import has_request_context, request
+from flask_sqlalchemy.session import Session as _FsaSession
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.engine.url import make_url
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import Select, CompoundSelect
+
+READONLY_BIND = "readonly"
+
+_pragmas = []  # naplní init_sqlite(); prázdne = tuning vypnutý
+
+
+# -----------------------------
+# URI a pool
+# -----------------------------
+def normalize_database_uri(uri: str) -> str:
+    if uri.startswith("postgres://"):
+        uri = "postgresql://" + uri[len("postgres://"):]
+    elif uri.startswith("mysql://"):
+        uri = "mysql+pymysql://" + uri[len("mysql://"):]
+    if uri.startswith("mysql") and "charset=" not in uri:
+        uri += ("&" if "?" in uri else "?") + "charset=utf8mb4"
+    return uri
+
+
+def engine_options(uri: str, env) -> dict:
+    """SQLALCHEMY_ENGINE_OPTIONS z premenných prostredia (env = os.environ)."""
+    opts = {
+        "pool_pre_ping": env.get("DB_POOL_PRE_PING", "1") == "1",
+        "pool_recycle": int(env.get("DB_POOL_RECYCLE", "1800")),
+    }
+    url = make_url(uri)
+    # in-memory SQLite (sqlite://, sqlite:///:memory:) beží na SingletonThreadPool –
+    # veľkosť poolu tam nemá zmysel a create_engine by ju odmietol
+    if url.get_backend_name() != "sqlite" or url.database not in (None, "", ":memory:"):
+        opts.update(
+            pool_size=int(env.get("DB_POOL_SIZE", "5")),
+            max_overflow=int(env.get("DB_MAX_OVERFLOW", "10")),
+            pool_timeout=int(env.get("DB_POOL_TIMEOUT", "30")),
+        )
+    return opts
+
+
+# -----------------------------
+# PRAGMA pri pripojení
+# -----------------------------
+def sqlite_pragmas(config) -> list:
+    return [
+        ("journal_mode", "WAL"),
+        ("synchronous", "NORMAL"),
+        ("busy_timeout", int(config.get("SQLITE_BUSY_TIMEOUT_MS", 5000))),
+        ("mmap_size", int(config.get("SQLITE_MMAP_SIZE", 256 * 1024 * 1024))),
+        # záporné číslo = KiB
+        ("cache_size", -int(config.get("SQLITE_CACHE_SIZE_KB", 64 * 1024))),
+        ("temp_store", "MEMORY"),
+    ]
+
+
+@event.listens_for(Engine, "connect")
+def _sqlite_on_connect(dbapi_conn, connection_record):
+    if not _pragmas or not isinstance(dbapi_conn, sqlite3.Connection):
+        return
+    cur = dbapi_conn.cursor()
+    for name, value in _pragmas:
+        try:
+            cur.execute(f"PRAGMA {name}={value}")
+        except sqlite3.Error:
+            # napr. journal_mode na read-only spojení – WAL je už uložený v súbore
+            pass
+    cur.close()
+
+
+def init_sqlite(app):
+    """Zapni SQLite profil podľa konfigurácie (volať pred prvým spojením)."""
+    _pragmas.clear()
+    uri = app.config.get("SQLALCHEMY_DATABASE_URI") or ""
+    if app.config.get("SQLITE_TUNING", True) and uri.startswith("sqlite"):
+        _pragmas.extend(sqlite_pragmas(app.config))
+
+
+def sqlite_readonly_uri(uri: str) -> str | None:
+    """sqlite:///cesta.db -> sqlite:///file:cesta.db?mode=ro&uri=true (None pre iné DB / :memory:)."""
+    url = make_url(uri)
+    if url.get_backend_name() != "sqlite" or not url.database or url.database == ":memory:":
+        return None
+    path = url.database.replace("\\", "/")
+    return f"sqlite:///file:{path}?mode=ro&uri=true"
+
+
+# -----------------------------
+# Session: čítanie z read-only enginu
+# -----------------------------
+class RoutingSession(_FsaSession):
+    """
+    Flask-SQLAlchemy session, ktorá pri GET/HEAD posiela SELECTy na bind `readonly`
+    (ak je nakonfigurovaný). Flush, DML a všetko po prvom zápise v session ide na hlavný engine,
+    aby request videl vlastné zmeny.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        engine = super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+        if bind is not None:
+            return engine
+
+        engines = self._db.engines
+        ro = engines.get(READONLY_BIND)
+        if ro is None or engine is not engines.get(None):
+            return engine
+        if self._flushing or self.info.get("db_wrote"):
+            return engine
+        if clause is not None and not isinstance(clause, (Select, CompoundSelect)):
+            return engine
+        if not has_request_context() or request.method not in ("GET", "HEAD"):
+            return engine
+        return ro
+
+
+@event.listens_for(Session, "after_flush")
+def _mark_wrote(session, flush_context):
+    session.info["db_wrote"] = True
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _mark_dml(orm_execute_state):
+    if orm_execute_state.is_update or orm_execute_state.is_delete or orm_execute_state.is_insert:
+        orm_execute_state.session.info["db_wrote"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _clear_wrote(session):
+    session.info.pop("db_wrote", None)
+
+
+@event.listens_for(Session, "after_rollback")
+def _clear_wrote_rb(session):
+    session.info.pop("db_wrote", None)
+
+
+# -----------------------------
+# Periodická údržba
+# -----------------------------
+def sqlite_optimize(db) -> str:
+    """PRAGMA optimize (+ ANALYZE, ak ešte nie sú štatistiky). Pre iné DB nič."""
+    if db.engine.dialect.name != "sqlite":
+        return "skip"
+    with db.engine.connect() as conn:
+        has_stats = conn.exec_driver_sql(
+            "SELECT 1 FROM sqlite_master WHERE type='table' AND name='sqlite_stat1'"
+        ).first()
+        if not has_stats:
+            conn.exec_driver_sql("ANALYZE")
+        conn.exec_driver_sql("PRAGMA optimize")
+        conn.commit()
+    return "analyze+optimize" if not has_stats else "optimize"
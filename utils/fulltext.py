@@ -0,0 +1,255 @@
+# utils/fulltext.py
+"""
+Fulltextové vyhľadávanie cez SQLite FTS5 (ľudia a organizácie, fórum).
+
+`ilike('%q%')` s úvodným % nepoužije index – každé písmeno v hľadaní je
+full scan tabuľky. FTS5 tabuľky používajú tokenizer unicode61
+s remove_diacritics (Žilina == zilina) a prefixové indexy pre 2 a 3 znaky.
+Dotaz: každé slovo ako prefix ("mar"* "bas"*), zoradenie podľa bm25,
+snippet() so zvýraznením (highlight() → <mark>).
+
+Ľudia – `pouzivatel_fts` (rowid = pouzivatel.id):
+  prezyvka, meno (meno + priezvisko), organizacia, mesto (obec / sídlo),
+  bio, zamerania (štítky z Pouzivatel.zamerania_list())
+  Štítky zamerania vznikajú v Pythone, takže SQL triggery nestačia –
+  after_flush hook prepíše riadok indexu pri insert/update (len ak sa
+  zmenilo niektoré z PEOPLE_SOURCE) a zmaže ho pri delete, v tej istej
+  transakcii. Hromadné Query.update() hook obchádza → `flask search-reindex`.
+
+Fórum – `forum_fts` (rowid = post.id, pre tému -topic.id):
+  nazov, body, topic_id, post_id (posledné dva UNINDEXED; post_id je pri
+  téme NULL). Text je čisto z DB, takže index držia SQL triggery na
+  forum_topic / forum_post (viď migráciu) – zachytia aj hromadné zmeny.
+  forum_hits() zoskupí zhody po témach (najlepšia zhoda témy → snippet
+  a post_id pre kotvu #post-<id>), forum_rank() ju zmieša s čerstvosťou
+  aktivita_at.
+
+Iná DB než SQLite (alebo tabuľka ešte nie je zmigrovaná) → *_hits() vrátia
+None a volajúci ostane pri ilike.
+"""
+import re
+
+from flask import current_app
+from markupsafe import Markup, escape
+from sqlalchemy import column, event, func, inspect, literal_column, select, table
+from sqlalchemy.orm import Session
+
+from models import db, Pouzivatel
+
+PEOPLE_FTS = "pouzivatel_fts"
+PEOPLE_COLUMNS = ("prezyvka", "meno", "organizacia", "mesto", "bio", "zamerania")
+PEOPLE_WEIGHTS = (10.0, 8.0, 8.0, 3.0, 1.0, 4.0)   # bm25 váhy v poradí PEOPLE_COLUMNS
+
+# stĺpce Pouzivatel, z ktorých sa skladá riadok indexu (vrátane vstupov zamerania_list)
+PEOPLE_SOURCE = (
+    "prezyvka", "meno", "priezvisko", "organizacia_nazov", "obec", "sidlo_mesto", "bio",
+    "rola", "rola_ina", "role_data", "hud_oblast", "hud_spec", "tanec_spec", "tanec_ine",
+    "moderator_podrola", "ucitel_predmety", "ucitel_ine",
+)
+
+MAX_TERMS = 8
+SNIPPET_TOKENS = 10
+_HL_START, _HL_END = "\x02", "\x03"   # značky zo snippet(), po escape → <mark>
+_WORD = re.compile(r"\w+")
+
+FORUM_FTS = "forum_fts"
+FORUM_WEIGHTS = (4.0, 1.0)   # nazov, body
+
+_people = table(PEOPLE_FTS, column("rowid"), *(column(c) for c in PEOPLE_COLUMNS))
+_forum = table(FORUM_FTS, column("rowid"), column("nazov"), column("body"), column("topic_id"), column("post_id"))
+_tables = set()   # (url, názov) zmigrovaných tabuliek
+
+
+def fts_ready(name: str, conn=None) -> bool:
+    """
+    Je `name` FTS tabuľka k dispozícii (SQLite + zmigrované)? Cachuje sa len
+    kladný výsledok – po `flask db upgrade` za behu sa FTS zapne bez reštartu.
+    """
+    engine = conn.engine if conn is not None else db.engine
+    if engine.dialect.name != "sqlite":
+        return False
+    key = (str(engine.url), name)
+    if key in _tables:
+        return True
+
+    def probe(c):
+        return c.exec_driver_sql(
+            "SELECT 1 FROM sqlite_master WHERE type='table' AND name=?", (name,)).first() is not None
+    if conn is not None:
+        found = probe(conn)
+    else:
+        with engine.connect() as c:
+            found = probe(c)
+    if found:
+        _tables.add(key)
+    return found
+
+
+def match_expr(q_text: str) -> str | None:
+    """'Ján  bas' -> '"Ján"* "bas"*' – všetky slová, každé ako prefix; None ak nič."""
+    words = _WORD.findall(q_text or "")[:MAX_TERMS]
+    return " ".join(f'"{w}"*' for w in words) or None
+
+
+def highlight(snippet: str | None) -> Markup | None:
+    """Snippet z FTS → bezpečné HTML so <mark> okolo zhôd."""
+    if not snippet:
+        return None
+    return Markup(str(escape(snippet)).replace(_HL_START, "<mark>").replace(_HL_END, "</mark>"))
+
+
+# -----------------------------
+# ľudia a organizácie
+# -----------------------------
+def people_doc(u: Pouzivatel) -> dict:
+    mesta = [m for m in (u.obec, u.sidlo_mesto) if m]
+    return dict(
+        rowid=u.id,
+        prezyvka=u.prezyvka or "",
+        meno=" ".join(x for x in (u.meno, u.priezvisko) if x),
+        organizacia=u.organizacia_nazov or "",
+        mesto=" ".join(dict.fromkeys(mesta)),
+        bio=u.bio or "",
+        zamerania=" · ".join(u.zamerania_list()),
+    )
+
+
+def people_hits(q_text: str):
+    """
+    Subquery (id, rank, snippet) so zhodami pre `q_text`, alebo None
+    (prázdny dotaz / FTS nedostupné → volajúci použije ilike).
+    Nižší rank = lepšia zhoda (bm25).
+    """
+    expr = match_expr(q_text)
+    if not expr or not fts_ready(PEOPLE_FTS):
+        return None
+    fts = literal_column(PEOPLE_FTS)
+    return (select(_people.c.rowid.label("id"),
+                   func.bm25(fts, *PEOPLE_WEIGHTS).label("rank"),
+                   func.snippet(fts, -1, _HL_START, _HL_END, "…", SNIPPET_TOKENS).label("snippet"))
+            .where(fts.op("MATCH")(expr))
+            .subquery("people_hits"))
+
+
+def with_snippets(rows) -> list:
+    """[(Pouzivatel, snippet), ...] → [Pouzivatel] s atribútom search_snippet pre šablónu."""
+    out = []
+    for u, snippet in rows:
+        u.search_snippet = highlight(snippet)
+        out.append(u)
+    return out
+
+
+def _write_people(conn, users, deleted_ids=()) -> None:
+    ids = [u.id for u in users] + list(deleted_ids)
+    if not ids:
+        return
+    conn.execute(_people.delete().where(_people.c.rowid.in_(ids)))
+    if users:
+        conn.execute(_people.insert(), [people_doc(u) for u in users])
+
+
+def rebuild_people_index(batch: int = 500) -> int:
+    """Celý index ľudí nanovo (CLI `flask search-reindex`). Vráti počet riadkov."""
+    conn = db.session.connection()
+    if not fts_ready(PEOPLE_FTS, conn):
+        return 0
+    conn.execute(_people.delete())
+    count = 0
+    last_id = 0
+    while True:
+        chunk = (Pouzivatel.query.filter(Pouzivatel.id > last_id)
+                 .order_by(Pouzivatel.id).limit(batch).all())
+        if not chunk:
+            break
+        conn.execute(_people.insert(), [people_doc(u) for u in chunk])
+        count += len(chunk)
+        last_id = chunk[-1].id
+    conn.exec_driver_sql(f"INSERT INTO {PEOPLE_FTS}({PEOPLE_FTS}) VALUES ('optimize')")
+    db.session.commit()
+    return count
+
+
+# -----------------------------
+# fórum
+# -----------------------------
+def forum_hits(q_text: str, max_hits: int | None = None):
+    """
+    Subquery (topic_id, score, post_id, snippet, hits) – jeden riadok na tému
+    s jej najlepšou zhodou (post_id je None, ak najlepšie sedí samotná téma),
+    alebo None (prázdny dotaz / FTS nedostupné).
+    """
+    expr = match_expr(q_text)
+    if not expr or not fts_ready(FORUM_FTS):
+        return None
+    max_hits = max_hits or current_app.config.get("FORUM_SEARCH_MAX_HITS", 1000)
+    fts = literal_column(FORUM_FTS)
+    score = func.bm25(fts, *FORUM_WEIGHTS)
+    inner = (select(_forum.c.topic_id, _forum.c.post_id, score.label("score"),
+                    func.snippet(fts, -1, _HL_START, _HL_END, "…", SNIPPET_TOKENS * 2).label("snippet"))
+             .where(fts.op("MATCH")(expr))
+             .order_by(score)
+             .limit(max_hits)       # strop – zoskupenie a zoradenie nerastú s počtom zhôd
+             .subquery())
+    # SQLite: holé stĺpce pri min() pochádzajú z riadku s minimom → post_id/snippet najlepšej zhody
+    return (select(inner.c.topic_id, func.min(inner.c.score).label("score"),
+                   inner.c.post_id, inner.c.snippet, func.count().label("hits"))
+            .group_by(inner.c.topic_id)
+            .subquery("forum_hits"))
+
+
+def forum_rank(hits, aktivita_at):
+    """
+    Výraz na zoradenie: bm25 (záporné, nižšie = lepšie) tlmené vekom poslednej
+    aktivity – téma stará FORUM_SEARCH_HALF_LIFE_DAYS má polovičnú váhu.
+    """
+    half_life = float(current_app.config.get("FORUM_SEARCH_HALF_LIFE_DAYS", 30))
+    age_days = func.julianday("now") - func.julianday(aktivita_at)
+    return hits.c.score / (1.0 + func.max(age_days, 0) / half_life)
+
+
+def with_forum_hits(rows) -> list:
+    """[(ForumTopic, post_id, snippet, hits), ...] → [ForumTopic] s atribútmi search_*."""
+    out = []
+    for t, post_id, snippet, hits in rows:
+        t.search_post_id = post_id
+        t.search_snippet = highlight(snippet)
+        t.search_hits = hits
+        out.append(t)
+    return out
+
+
+def rebuild_forum_index() -> int:
+    """Index fóra nanovo z forum_topic + forum_post (triggery ho inak držia samy)."""
+    conn = db.session.connection()
+    if not fts_ready(FORUM_FTS, conn):
+        return 0
+    conn.exec_driver_sql(f"DELETE FROM {FORUM_FTS}")
+    conn.exec_driver_sql(
+        f"INSERT INTO {FORUM_FTS}(rowid, nazov, body, topic_id, post_id) "
+        "SELECT -id, nazov, body, id, NULL FROM forum_topic")
+    conn.exec_driver_sql(
+        f"INSERT INTO {FORUM_FTS}(rowid, nazov, body, topic_id, post_id) "
+        "SELECT id, '', body, topic_id, id FROM forum_post")
+    conn.exec_driver_sql(f"INSERT INTO {FORUM_FTS}({FORUM_FTS}) VALUES ('optimize')")
+    count = conn.exec_driver_sql(f"SELECT count(*) FROM {FORUM_FTS}").scalar()
+    db.session.commit()
+    return count
+
+
+# --- ORM hook: zmeny Pouzivatel cez session → index v tej istej transakcii ---
+def _people_changed(u) -> bool:
+    attrs = inspect(u).attrs
+    return any(attrs[k].history.has_changes() for k in PEOPLE_SOURCE)
+
+
+@event.listens_for(Session, "after_flush")
+def _people_flushed(session, flush_context):
+    upsert = [o for o in session.new if isinstance(o, Pouzivatel)]
+    upsert += [o for o in session.dirty if isinstance(o, Pouzivatel) and _people_changed(o)]
+    deleted = [o.id for o in session.deleted if isinstance(o, Pouzivatel)]
+    if not (upsert or deleted):
+        return
+    conn = session.connection()
+    if fts_ready(PEOPLE_FTS, conn):
+        _write_people(conn, upsert, deleted)
@@ -0,0 +1,127 @@
+# utils/gallery_zip.py
+"""
+Stiahnutie celej galérie (skupina / používateľ) ako ZIP, prúdovo.
+
+Archív sa nikdy nedrží celý v pamäti: zipfile píše do malého bufferu bez
+seek() (lokálne hlavičky + data descriptor, centrálny adresár na konci)
+a generátor ho po kúskoch vyprázdňuje do odpovede.
+
+Čítanie súborov z úložiska (disk alebo S3) beží v ThreadPoolExecutor
+s oknom PREFETCH súborov dopredu – kým sa jeden posiela klientovi, ďalšie
+sa už načítavajú. Pamäť ~ okno × veľkosť súboru (berie sa najväčší uložený
+JPEG, nie originál).
+
+JPEG / WebP / PNG / GIF sú už skomprimované – ukladajú sa ZIP_STORED
+(deflate by len pálil CPU), ostatné ZIP_DEFLATED.
+"""
+import os
+import time
+import zipfile
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+
+from flask import current_app
+
+from utils.images import largest_file
+from utils.storage import get_storage, resolve_key
+
+STORED_EXT = {".jpg", ".jpeg", ".webp", ".png", ".gif"}
+CHUNK = 256 * 1024
+
+
+class _Sink:
+    """Zapisovateľný „súbor“ pre zipfile: len append + tell, obsah si vyberá generátor."""
+
+    def __init__(self):
+        self.buf = bytearray()
+        self.pos = 0
+
+    def write(self, data) -> int:
+        self.buf += data
+        self.pos += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self.pos
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        out = bytes(self.buf)
+        self.buf.clear()
+        return out
+
+
+def gallery_entries(rows, folder: str, prefix: str) -> list[tuple[str, str]]:
+    """
+    (názov v archíve, kľúč v úložisku) pre riadky galérie; fotky, ktoré ešte
+    spracúva worker (varianty = pending), sa vynechajú.
+    """
+    out = []
+    for i, row in enumerate(rows, 1):
+        name = largest_file(row.nazov_suboru, row.varianty)
+        if not name:
+            continue
+        ext = os.path.splitext(name)[1].lower() or ".jpg"
+        out.append((f"{prefix}_{i:03}{ext}", resolve_key(folder, name)))
+    return out
+
+
+def _read(st, key: str) -> bytes | Exception:
+    try:
+        with closing(st.open(key)) as f:
+            return f.read()
+    except Exception as e:  # chýbajúci súbor nesmie zhodiť celý archív
+        return e
+
+
+def stream_zip(entries: list[tuple[str, str]], workers: int | None = None, prefetch: int | None = None):
+    """Generátor bajtov ZIP archívu z `entries` (názov v archíve, kľúč v úložisku)."""
+    cfg = current_app.config
+    workers = workers or cfg.get("GALLERY_ZIP_WORKERS", 4)
+    prefetch = max(prefetch or cfg.get("GALLERY_ZIP_PREFETCH", 8), workers)
+    log = current_app.logger
+    st = get_storage()
+    stamp = time.localtime()[:6]
+
+    sink = _Sink()
+    pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="gallery-zip")
+    pending = deque()
+    todo = iter(entries)
+
+    def fill():
+        while len(pending) < prefetch:
+            item = next(todo, None)
+            if item is None:
+                return
+            pending.append((item[0], item[1], pool.submit(_read, st, item[1])))
+
+    try:
+        with zipfile.ZipFile(sink, "w", allowZip64=True) as zf:
+            fill()
+            while pending:
+                arcname, key, fut = pending.popleft()
+                fill()
+                data = fut.result()
+                if not isinstance(data, bytes):
+                    log.warning("gallery zip: %s sa nedá prečítať: %s", key, data)
+                    continue
+                info = zipfile.ZipInfo(arcname, date_time=stamp)
+                info.compress_type = (zipfile.ZIP_STORED if os.path.splitext(arcname)[1].lower() in STORED_EXT
+                                      else zipfile.ZIP_DEFLATED)
+                info.file_size = len(data)
+                with zf.open(info, "w") as dst:
+                    view = memoryview(data)
+                    for off in range(0, len(view), CHUNK):
+                        dst.write(view[off:off + CHUNK])
+                        if len(sink.buf) >= CHUNK:
+                            yield sink.drain()
+                if sink.buf:
+                    yield sink.drain()
+        if sink.buf:
+            yield sink.drain()  # centrálny adresár
+    finally:
+        # klient sa odpojil / hotovo – nenačítavaj zvyšok
+        pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,320 @@
+# utils/images.py
+"""
+Spoločné spracovanie nahraných obrázkov (galérie, inzeráty, podujatia, reklamy, profilovky).
+
+Z každého uploadu vzniknú pevné veľkosti (SIZES, dlhšia strana v px) vo WebP
+a JPEG ako fallback: `<stem>_160.webp`, `<stem>_160.jpg`, ... Originál sa neukladá.
+Orientácia z EXIF sa aplikuje na pixely, samotné EXIF (GPS, model telefónu) sa zahodí.
+Menší obrázok sa nezväčšuje – väčšie veľkosti sa vtedy vynechajú.
+
+Zoznam variantov sa ukladá k záznamu ako JSON (stĺpec `varianty` / `*_varianty`):
+  [{"w": 160, "h": 120, "webp": "x_160.webp", "jpg": "x_160.jpg"}, ...]
+a do stĺpca s názvom súboru ide najväčší JPEG (starý kód a odkazy fungujú ďalej).
+
+V šablónach: `picture(folder, name, varianty, sizes=..., default=...)` vyrobí
+<picture> so srcset, prehliadač si vyberie najmenšiu postačujúcu veľkosť.
+Staré záznamy bez variantov sa vykreslia ako obyčajný <img>.
+
+Metadáta (ImageMeta: rozmery najväčšieho variantu, dominantná farba, LQIP –
+16px WebP ako data URI) sa počítajú pri spracovaní a ukladajú k záznamu
+(sirka/vyska/farba/lqip, pri podujatí a reklame foto_*). S `meta=` dostane <img>
+width/height (žiadny layout shift pri lazy loadingu) a farbu + rozmazaný
+náhľad ako pozadie, kým sa nenačíta.
+
+Galérie spracúva fronta (modules/image_jobs.py): kým worker nedobehne,
+má záznam varianty == PENDING a šablóny ukážu zástupný obrázok.
+
+Nové uploady ležia v obsahovo adresovanom úložisku (utils/blobs.py) – názvy
+sú potom kľúče s cestou ("blobs/ab/cd/<sha>_480.webp") a `folder` sa pre ne
+ignoruje. Takéto súbory delete_image nemaže, patria blobu s počtom odkazov.
+Profilovky (store_image) majú tiež celé kľúče ("profilovky/ab/cd/<stem>_480.webp");
+plochý názov bez lomky je starý súbor priamo v `folder`.
+
+`folder` je prefix kľúča v úložisku (utils/storage.py), nie cesta na disku –
+URL aj mazanie idú cez get_storage(), takže súbory môžu ležať aj v S3 za CDN.
+"""
+import base64
+import io
+import json
+import os
+from collections import namedtuple
+from functools import lru_cache
+
+from markupsafe import Markup, escape
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from utils.storage import get_storage, staging_dir, shard_prefix, resolve_key, is_blob_key
+
+SIZES = (160, 480, 1200)
+ALLOWED_EXT = {"png", "jpg", "jpeg", "gif", "webp"}
+FORMATS = ("JPEG", "PNG", "GIF", "WEBP")  # iné dekodéry Pillow (EPS, PSD, ...) ani neskúšame
+
+# dekompresná bomba: väčší obrázok sa odmietne podľa hlavičky, pred dekódovaním
+# (env, lebo save_image beží aj v process poole bez app configu)
+MAX_PIXELS = int(os.getenv("IMAGE_MAX_PIXELS", str(40_000_000)))
+Image.MAX_IMAGE_PIXELS = MAX_PIXELS
+
+JPEG_QUALITY = 82
+WEBP_QUALITY = 80
+LQIP_SIZE = 16
+LQIP_QUALITY = 30
+
+ImageMeta = namedtuple("ImageMeta", "sirka vyska farba lqip")
+META_FIELDS = ImageMeta._fields
+
+# varianty ešte nie sú hotové (čaká vo fronte)
+PENDING = "pending"
+PENDING_SRC = (
+    "data:image/svg+xml;charset=utf-8,"
+    "%3Csvg xmlns='http://www.w3.org/2000/svg' viewBox='0 0 4 3'%3E"
+    "%3Crect width='4' height='3' fill='%23e9e9ee'/%3E"
+    "%3Ctext x='2' y='1.85' font-size='.9' text-anchor='middle'%3E%E2%8F%B3%3C/text%3E%3C/svg%3E"
+)
+
+
+class ImageError(ValueError):
+    """Súbor nie je obrázok, ktorý vieme spracovať."""
+
+
+def allowed_ext(filename: str) -> bool:
+    return "." in (filename or "") and filename.rsplit(".", 1)[1].lower() in ALLOWED_EXT
+
+
+# -----------------------------
+# Spracovanie
+# -----------------------------
+def _flatten(img):
+    """RGB pre JPEG (priehľadnosť na bielom pozadí)."""
+    if img.mode in ("RGBA", "LA") or (img.mode == "P" and "transparency" in img.info):
+        img = img.convert("RGBA")
+        bg = Image.new("RGB", img.size, (255, 255, 255))
+        bg.paste(img, mask=img.getchannel("A"))
+        return bg
+    return img.convert("RGB")
+
+
+def _dominant_color(img) -> str:
+    """Najčastejšia farba po redukcii na 5 farieb (nie priemer – ten býva sivý)."""
+    small = _flatten(img)
+    small.thumbnail((64, 64))
+    q = small.quantize(colors=5)
+    palette = q.getpalette()
+    _, idx = max(q.getcolors())
+    r, g, b = palette[idx * 3: idx * 3 + 3]
+    return f"#{r:02x}{g:02x}{b:02x}"
+
+
+def _lqip(img) -> str:
+    tiny = _flatten(img)
+    tiny.thumbnail((LQIP_SIZE, LQIP_SIZE))
+    buf = io.BytesIO()
+    tiny.save(buf, "WEBP", quality=LQIP_QUALITY)
+    return "data:image/webp;base64," + base64.b64encode(buf.getvalue()).decode("ascii")
+
+
+def compute_meta(img) -> dict:
+    """Metadáta pre šablóny z už otočeného obrázka (dict kvôli pickle z process poolu)."""
+    return ImageMeta(img.width, img.height, _dominant_color(img), _lqip(img))._asdict()
+
+
+def image_meta(path: str) -> dict | None:
+    """Metadáta z existujúceho súboru (backfill); None, ak súbor chýba / nie je obrázok."""
+    try:
+        with Image.open(path, formats=FORMATS) as img:
+            if img.width * img.height > MAX_PIXELS:
+                return None
+            img.load()
+            return compute_meta(ImageOps.exif_transpose(img))
+    except (UnidentifiedImageError, OSError, Image.DecompressionBombError):
+        return None
+
+
+def save_image(src, folder: str, stem: str, sizes=SIZES) -> tuple[str, str, dict]:
+    """
+    Spracuj obrázok (cesta alebo file-like, napr. FileStorage) do `folder`.
+    Vráti (hlavný súbor = najväčší JPEG, JSON variantov, metadáta – viď compute_meta).
+    Pri chybe ImageError.
+    """
+    try:
+        img = Image.open(getattr(src, "stream", src), formats=FORMATS)  # číta len hlavičku
+        if img.width * img.height > MAX_PIXELS:
+            raise ImageError(f"obrázok má priveľa pixelov ({img.width}x{img.height})")
+        img.load()  # pri GIF/animáciách berieme prvý snímok
+    except (UnidentifiedImageError, OSError, Image.DecompressionBombError) as e:
+        raise ImageError(str(e)) from e
+
+    img = ImageOps.exif_transpose(img)
+    if img.mode not in ("RGB", "RGBA"):
+        img = img.convert("RGBA" if img.mode in ("LA", "P") else "RGB")
+    img.info.pop("exif", None)
+
+    os.makedirs(folder, exist_ok=True)
+    out, written = [], []
+    longest = max(img.size)
+    try:
+        for size in sorted(sizes):
+            im = img.copy()
+            im.thumbnail((size, size), Image.LANCZOS)
+            webp = f"{stem}_{size}.webp"
+            jpg = f"{stem}_{size}.jpg"
+            im.save(os.path.join(folder, webp), "WEBP", quality=WEBP_QUALITY, method=4)
+            written.append(webp)
+            _flatten(im).save(os.path.join(folder, jpg), "JPEG", quality=JPEG_QUALITY,
+                              optimize=True, progressive=True)
+            written.append(jpg)
+            out.append({"w": im.width, "h": im.height, "webp": webp, "jpg": jpg})
+            if size >= longest:
+                break  # ďalšie veľkosti by boli len kópie
+        meta = compute_meta(im)  # rozmery najväčšieho variantu
+    except Exception as e:
+        for name in written:
+            _remove(os.path.join(folder, name))
+        raise ImageError(str(e)) from e
+
+    return out[-1]["jpg"], json.dumps(out, separators=(",", ":")), meta
+
+
+def store_image(src, folder: str, stem: str, sizes=SIZES) -> tuple[str, str, dict]:
+    """
+    save_image do úložiska pod "<folder>/ab/cd/" (viď utils/storage.shard_prefix).
+    Vráti celé kľúče (názov aj varianty). Pri chybe ImageError.
+    """
+    prefix = shard_prefix(folder, stem)
+    local = staging_dir(prefix)
+    name, raw, meta = save_image(src, local, stem, sizes=sizes)
+    st = get_storage()
+    for n in image_files(name, raw):
+        st.put_file(f"{prefix}/{n}", os.path.join(local, n))
+    return f"{prefix}/{name}", prefix_variants(raw, prefix), meta
+
+
+def prefix_variants(raw: str | None, prefix: str) -> str | None:
+    """JSON variantov s názvami doplnenými na kľúče "<prefix>/<názov>"."""
+    vs = variants(raw)
+    if not vs:
+        return raw
+    return json.dumps([dict(v, webp=f"{prefix}/{v['webp']}", jpg=f"{prefix}/{v['jpg']}") for v in vs],
+                      separators=(",", ":"))
+
+
+def image_files(name: str | None, varianty: str | None) -> set[str]:
+    """Hlavný súbor + všetky varianty záznamu."""
+    names = {name} if name else set()
+    for v in variants(varianty):
+        names.update((v.get("webp"), v.get("jpg")))
+    names.discard(None)
+    return names
+
+
+def largest_file(name: str | None, varianty: str | None) -> str | None:
+    """Najväčší uložený JPEG záznamu (starý záznam bez variantov = hlavný súbor)."""
+    if varianty == PENDING:
+        return None
+    vs = variants(varianty)
+    return vs[-1]["jpg"] if vs else name
+
+
+def _remove(path: str):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def delete_image(folder: str, name: str | None, varianty: str | None = None):
+    """
+    Zmaž z úložiska hlavný súbor aj všetky varianty (chýbajúce ticho ignoruje).
+    Kľúče blobov preskočí – tie uvoľní GC, keď na ne nič neukazuje.
+    """
+    st = get_storage()
+    for n in image_files(name, varianty):
+        if not is_blob_key(n):
+            st.delete(resolve_key(folder, n))
+
+
+# -----------------------------
+# Šablóny
+# -----------------------------
+@lru_cache(maxsize=4096)
+def variants(raw: str | None) -> tuple:
+    if not raw:
+        return ()
+    try:
+        return tuple(json.loads(raw))
+    except (TypeError, ValueError):
+        return ()
+
+
+def _static(folder, name):
+    return get_storage().url(resolve_key(folder, name))
+
+
+def image_url(folder: str, name: str | None, varianty: str | None = None,
+              width: int | None = None, fmt: str = "jpg", default: str | None = None) -> str | None:
+    """URL najmenšieho variantu so šírkou >= width (bez width najväčší)."""
+    if varianty == PENDING:
+        return PENDING_SRC
+    vs = variants(varianty)
+    if vs:
+        pick = vs[-1]
+        if width:
+            pick = next((v for v in vs if v["w"] >= width), vs[-1])
+        return _static(folder, pick[fmt])
+    if name:
+        return _static(folder, name)
+    return default
+
+
+def image_srcset(folder: str, varianty: str | None, fmt: str = "jpg") -> str:
+    return ", ".join(f"{_static(folder, v[fmt])} {v['w']}w" for v in variants(varianty))
+
+
+def _apply_meta(attrs: dict, meta: ImageMeta):
+    if meta.sirka and meta.vyska:
+        # pomer strán pre prehliadač; výšku aj tak určuje CSS (.has-dim v base.css)
+        attrs.setdefault("width", meta.sirka)
+        attrs.setdefault("height", meta.vyska)
+        attrs["class_"] = " ".join(filter(None, ("has-dim", attrs.get("class_"))))
+    if meta.farba or meta.lqip:
+        bg = f"background:{meta.farba or 'transparent'}"
+        if meta.lqip:
+            bg += f" url({meta.lqip}) center/cover no-repeat"
+        attrs["style"] = bg + ";" + (attrs.get("style") or "")
+        attrs.setdefault("onload", "this.style.background='none'")
+
+
+def picture(folder: str, name: str | None, varianty: str | None = None, sizes: str = "100vw",
+            width: int | None = None, default: str | None = None, meta: ImageMeta | None = None,
+            **attrs) -> Markup:
+    """
+    <picture> s WebP + JPEG srcset (alebo <img>, ak záznam varianty nemá).
+    `width` = odhad zobrazenej šírky pre src fallback; ostatné kwargs idú na <img>
+    (`class_` -> class, `data_x` -> data-x). `data-full` ukazuje na najväčší variant (lightbox).
+    `meta` (ImageMeta z modelu) pridá width/height a zástupné pozadie (farba + LQIP).
+    """
+    vs = variants(varianty)
+    src = image_url(folder, name, varianty, width=width, default=default)
+    if not src:
+        return Markup("")
+
+    attrs.setdefault("loading", "lazy")
+    if vs:
+        attrs.setdefault("data_full", _static(folder, vs[-1]["jpg"]))
+    if meta is not None and varianty != PENDING and (name or vs):
+        _apply_meta(attrs, meta)
+    img_attrs = "".join(
+        f' {k.rstrip("_").replace("_", "-")}="{escape(v)}"'
+        for k, v in attrs.items() if v is not None and v is not False
+    )
+
+    if varianty == PENDING:
+        return Markup(f'<img src="{escape(src)}" title="Fotka sa spracúva…"{img_attrs}>')
+    if not vs:
+        return Markup(f'<img src="{escape(src)}"{img_attrs}>')
+    return Markup(
+        '<picture style="display:contents">'
+        f'<source type="image/webp" srcset="{escape(image_srcset(folder, varianty, "webp"))}" sizes="{escape(sizes)}">'
+        f'<img src="{escape(src)}" srcset="{escape(image_srcset(folder, varianty, "jpg"))}" '
+        f'sizes="{escape(sizes)}"{img_attrs}>'
+        '</picture>'
+    )
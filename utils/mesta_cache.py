@@ -0,0 +1,134 @@
+# utils/mesta_cache.py
+"""
+Procesová cache zoznamu miest (tabuľka `mesto`).
+
+Mestá sa menia len výnimočne (import cez modules/napln_mesta.py, admin úprava),
+no čítajú sa pri každom renderi (context processor `mesta_all`, selecty vo filtroch).
+Namiesto tisícok ORM objektov na request držíme nemenné n-tice `MestoRow`
+(id, nazov, okres, kraj), ktoré sa dajú v šablónach používať rovnako ako model.
+
+Invalidácia:
+- v rámci procesu: commit so zmenou `Mesto` (ORM event) alebo `invalidate_mesta_cache()`
+  zvýši verziu a pri najbližšom čítaní sa zoznam načíta nanovo,
+- mimo procesu (napr. napln_mesta.py spustené z konzoly, iný gunicorn worker):
+  raz za MESTA_CACHE_CHECK_SECONDS porovnáme lacný podpis `count(id), max(id),
+  max(updated_at)` – posledné zachytí aj premenovanie / úpravu v inom procese
+  (updated_at nastavuje onupdate, platí aj pre Query.update()).
+"""
+import threading
+import time
+from collections import namedtuple
+
+from flask import current_app, has_app_context
+from sqlalchemy import event, func
+from sqlalchemy.orm import Session
+
+from models import db, Mesto
+
+MestoRow = namedtuple("MestoRow", "id nazov okres kraj")
+
+_DEFAULT_CHECK_SECONDS = 60
+
+_lock = threading.Lock()
+_state = {
+    "version": 0,          # zvyšuje invalidate_mesta_cache()
+    "loaded_version": -1,  # verzia, z ktorej sú aktuálne dáta
+    "signature": None,     # (count, max_id, max_updated_at) v čase načítania
+    "checked_at": 0.0,     # monotonic čas poslednej kontroly podpisu
+    "by_nazov": (),
+    "by_kraj": (),
+    "by_id": {},
+}
+
+
+def invalidate_mesta_cache() -> int:
+    """Označ cache ako neplatnú; vráti novú verziu."""
+    with _lock:
+        _state["version"] += 1
+        return _state["version"]
+
+
+def mesta_cache_version() -> int:
+    return _state["version"]
+
+
+def _check_interval() -> float:
+    if has_app_context():
+        return float(current_app.config.get("MESTA_CACHE_CHECK_SECONDS", _DEFAULT_CHECK_SECONDS))
+    return float(_DEFAULT_CHECK_SECONDS)
+
+
+def _signature():
+    cnt, max_id, updated = db.session.query(func.count(Mesto.id), func.max(Mesto.id),
+                                            func.max(Mesto.updated_at)).one()
+    return (int(cnt or 0), int(max_id or 0), updated)
+
+
+def _load():
+    rows = (db.session.query(Mesto.id, Mesto.nazov, Mesto.okres, Mesto.kraj)
+            .order_by(Mesto.nazov.asc())
+            .all())
+    by_nazov = tuple(MestoRow(*r) for r in rows)
+    by_kraj = tuple(sorted(by_nazov, key=lambda m: (m.kraj or "", m.okres or "", m.nazov or "")))
+    return by_nazov, by_kraj, {m.id: m for m in by_nazov}
+
+
+def _ensure_fresh():
+    now = time.monotonic()
+    stale = _state["loaded_version"] != _state["version"]
+
+    if not stale and (now - _state["checked_at"]) < _check_interval():
+        return
+
+    with _lock:
+        version = _state["version"]
+        sig = _signature()
+        if _state["loaded_version"] != version or sig != _state["signature"]:
+            by_nazov, by_kraj, by_id = _load()
+            _state.update(by_nazov=by_nazov, by_kraj=by_kraj, by_id=by_id,
+                          signature=sig, loaded_version=version)
+        _state["checked_at"] = now
+
+
+def get_mesta(order: str = "nazov") -> tuple:
+    """
+    Všetky mestá ako tuple `MestoRow`.
+    order='nazov' (abecedne) alebo order='kraj' (kraj, okres, názov – pre dopyty).
+    Pri chybe DB (napr. tabuľka ešte neexistuje pri migráciách) vráti prázdnu n-ticu.
+    """
+    try:
+        _ensure_fresh()
+    except Exception:
+        return ()
+    return _state["by_kraj"] if order == "kraj" else _state["by_nazov"]
+
+
+def get_mesto(mesto_id) -> MestoRow | None:
+    """Jedno mesto podľa id (z cache), alebo None."""
+    try:
+        _ensure_fresh()
+        return _state["by_id"].get(int(mesto_id))
+    except (TypeError, ValueError):
+        return None
+    except Exception:
+        return None
+
+
+# --- ORM hook: zmena Mesto cez session invaliduje cache až po commite ---
+@event.listens_for(Session, "after_flush")
+def _mesto_flushed(session, flush_context):
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, Mesto):
+            session.info["mesta_dirty"] = True
+            return
+
+
+@event.listens_for(Session, "after_commit")
+def _mesto_committed(session):
+    if session.info.pop("mesta_dirty", False):
+        invalidate_mesta_cache()
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _mesto_rolled_back(session, previous_transaction):
+    session.info.pop("mesta_dirty", None)
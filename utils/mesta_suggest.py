@@ -0,0 +1,133 @@
+# utils/mesta_suggest.py
+"""
+Prefixový index miest pre autocomplete (/api/mesta/suggest).
+
+Index je zoradené pole kľúčov (malé písmená bez diakritiky) + bisect.
+Každé mesto má kľúč pre celý názov aj pre každé ďalšie slovo názvu,
+takže „bystr“ nájde aj „Banská Bystrica“. Poradie výsledkov určuje
+„používanosť“ mesta (koľkokrát naň odkazujú dopyty, inzeráty, rýchle dopyty
+a profily), potom kratší názov a abeceda.
+
+Index sa stavia lenivo z utils/mesta_cache a prestavuje sa, keď cache
+načíta nový zoznam miest (iná n-tica = iná identita).
+"""
+import threading
+from bisect import bisect_left
+
+from sqlalchemy import func
+
+from models import db, Dopyt, Inzerat, RychlyDopyt, Pouzivatel
+from utils.mesta_cache import get_mesta
+from utils.moderation_text import _strip_diacritics
+
+_lock = threading.Lock()
+_index = {"source": None, "keys": [], "ids": [], "rows": {}, "usage": {}}
+
+
+def fold(text: str) -> str:
+    """Normalizovaný kľúč: malé písmená, bez diakritiky, zjednotené medzery."""
+    return " ".join(_strip_diacritics((text or "").lower()).split())
+
+
+def _usage_counts(rows) -> dict:
+    """id mesta -> koľkokrát sa používa (FK + textové polia v profile)."""
+    usage = {}
+
+    for model in (Dopyt, Inzerat, RychlyDopyt):
+        for mid, cnt in (db.session.query(model.mesto_id, func.count(model.id))
+                         .filter(model.mesto_id.isnot(None))
+                         .group_by(model.mesto_id)):
+            usage[mid] = usage.get(mid, 0) + int(cnt)
+
+    # profily ukladajú názov (obec / sidlo_mesto), nie id
+    by_name = {}
+    for col in (Pouzivatel.obec, Pouzivatel.sidlo_mesto):
+        for name, cnt in (db.session.query(col, func.count(Pouzivatel.id))
+                          .filter(col.isnot(None))
+                          .group_by(col)):
+            by_name[name] = by_name.get(name, 0) + int(cnt)
+    if by_name:
+        for m in rows:
+            if m.nazov in by_name:
+                usage[m.id] = usage.get(m.id, 0) + by_name[m.nazov]
+
+    return usage
+
+
+def _build(rows):
+    pairs = []
+    for m in rows:
+        key = fold(m.nazov)
+        if not key:
+            continue
+        pairs.append((key, m.id))
+        words = key.replace("-", " ").split()
+        for i in range(1, len(words)):
+            pairs.append((" ".join(words[i:]), m.id))
+    pairs.sort()
+
+    try:
+        usage = _usage_counts(rows)
+    except Exception:
+        usage = {}
+
+    return {
+        "source": rows,
+        "keys": [k for k, _ in pairs],
+        "ids": [i for _, i in pairs],
+        "rows": {m.id: m for m in rows},
+        "usage": usage,
+    }
+
+
+def _get_index() -> dict:
+    global _index
+    rows = get_mesta()
+    if _index["source"] is not rows:
+        with _lock:
+            if _index["source"] is not rows:
+                _index = _build(rows)
+    return _index
+
+
+def suggest(q: str, limit: int = 10) -> list:
+    """Top `limit` miest, ktorých názov (alebo slovo v názve) začína na `q`."""
+    key = fold(q)
+    if not key:
+        return []
+
+    idx = _get_index()
+    keys, ids = idx["keys"], idx["ids"]
+
+    seen = set()
+    pos = bisect_left(keys, key)
+    while pos < len(keys) and keys[pos].startswith(key):
+        seen.add(ids[pos])
+        pos += 1
+
+    rows, usage = idx["rows"], idx["usage"]
+    hits = [rows[i] for i in seen if i in rows]
+    hits.sort(key=lambda m: (-usage.get(m.id, 0),
+                             not fold(m.nazov).startswith(key),
+                             len(m.nazov), m.nazov))
+    return hits[:limit]
+
+
+def canonical_nazov(text: str | None) -> str | None:
+    """
+    Názov mesta z tabuľky pre voľne napísaný text („zilina“ → „Žilina“),
+    alebo None, ak také mesto nepoznáme. Pre polia, ktoré ukladajú názov
+    (obec, sidlo_mesto) – <select> predtým zaručoval platnú hodnotu.
+    """
+    key = fold(text)
+    if not key:
+        return None
+    idx = _get_index()
+    keys, ids, rows = idx["keys"], idx["ids"], idx["rows"]
+    pos = bisect_left(keys, key)
+    while pos < len(keys) and keys[pos] == key:
+        m = rows.get(ids[pos])
+        if m is not None and fold(m.nazov) == key:
+            return m.nazov
+        pos += 1
+    return None
@@ -0,0 +1,181 @@
+# utils/nplusone.py
+"""
+Detektor N+1 dotazov.
+
+Každý SQL príkaz v requeste sa zredukuje na „tvar“ (bez literálov, IN zoznamy
+zbalené), tvary sa počítajú. Keď ten istý tvar prekročí NPLUSONE_THRESHOLD,
+zapíše sa hlásenie: endpoint, riadok šablóny (ak dotaz spustila šablóna),
+miesto v Python kóde a lazy relácia (napr. `Inzerat.fotky`), ktorá ho spôsobila.
+
+Hlásenia idú do logu „nplusone“ a do posledných záznamov na /admin/perf.
+S NPLUSONE_RAISE (default = app.testing) sa namiesto toho vyhodí NPlusOneError,
+takže test, ktorý renderuje stránku s N+1, spadne ešte pred deployom.
+"""
+import logging
+import os
+import re
+import sys
+import threading
+from collections import Counter, deque
+from functools import lru_cache
+
+from flask import g, has_request_context, request
+from flask import request_started, request_finished
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+nplusone_log = logging.getLogger("nplusone")
+
+_DEFAULT_THRESHOLD = 10
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_lock = threading.Lock()
+_recent = deque(maxlen=50)
+
+
+class NPlusOneError(RuntimeError):
+    """Vyhodené pri NPLUSONE_RAISE, keď sa rovnaký dotaz opakuje viac ako N-krát."""
+
+
+# -----------------------------
+# Normalizácia SQL
+# -----------------------------
+_RE_STRING = re.compile(r"'(?:[^']|'')*'")
+_RE_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_RE_IN_LIST = re.compile(r"\(\s*(?:\?|%s|:\w+|__\[POSTCOMPILE_\w+\])(?:\s*,\s*(?:\?|%s|:\w+))*\s*\)")
+_RE_WS = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=2048)
+def fingerprint(statement: str) -> str:
+    s = _RE_STRING.sub("?", statement)
+    s = _RE_NUMBER.sub("?", s)
+    s = _RE_IN_LIST.sub("(…)", s)
+    return _RE_WS.sub(" ", s).strip()
+
+
+# -----------------------------
+# Kde v kóde / šablóne
+# -----------------------------
+def _locate():
+    """(riadok šablóny, miesto v Python kóde) pre aktuálne vykonávaný dotaz."""
+    tpl_loc = py_loc = None
+    frame = sys._getframe(2)
+    while frame is not None and (tpl_loc is None or py_loc is None):
+        tpl = frame.f_globals.get("__jinja_template__")
+        if tpl is not None:
+            if tpl_loc is None:
+                tpl_loc = f"{tpl.name}:{tpl.get_corresponding_lineno(frame.f_lineno)}"
+        elif py_loc is None:
+            fn = frame.f_code.co_filename
+            if (fn.startswith(_ROOT) and "site-packages" not in fn
+                    and not fn.endswith(os.path.join("utils", "nplusone.py"))):
+                py_loc = f"{os.path.relpath(fn, _ROOT)}:{frame.f_lineno} in {frame.f_code.co_name}"
+        frame = frame.f_back
+    return tpl_loc, py_loc
+
+
+def _state():
+    if not has_request_context():
+        return None
+    return g.get("_nplusone")
+
+
+# -----------------------------
+# Eventy
+# -----------------------------
+@event.listens_for(Session, "do_orm_execute")
+def _orm_execute(orm_execute_state):
+    st = _state()
+    if st is None:
+        return
+    rel = None
+    if orm_execute_state.is_relationship_load:
+        path = orm_execute_state.loader_strategy_path
+        try:
+            prop = path[-1]
+            rel = f"{prop.parent.class_.__name__}.{prop.key}"
+        except Exception:
+            rel = str(path)
+    st["pending_rel"] = rel
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    st = _state()
+    if st is None:
+        return
+    rel, st["pending_rel"] = st.get("pending_rel"), None
+
+    fp = fingerprint(statement)
+    counts = st["counts"]
+    counts[fp] += 1
+    if counts[fp] != st["threshold"] + 1:
+        return
+
+    tpl_loc, py_loc = _locate()
+    report = {
+        "endpoint": request.endpoint or request.path,
+        "path": request.full_path.rstrip("?"),
+        "template": tpl_loc,
+        "code": py_loc,
+        "relationship": rel,
+        "threshold": st["threshold"],
+        "sql": fp[:500],
+        "count": counts[fp],
+    }
+    st["reports"].append((fp, report))
+
+    msg = (f"N+1 v {report['endpoint']}: dotaz opakovaný > {report['threshold']}x"
+           f" (relácia {rel or '?'}, šablóna {tpl_loc or '-'}, kód {py_loc or '-'}): {fp[:200]}")
+    if st["raise"]:
+        raise NPlusOneError(msg)
+    nplusone_log.warning(msg)
+    with _lock:
+        _recent.append(report)
+
+
+def _req_start(sender, **extra):
+    cfg = sender.config
+    if request.endpoint == "static":
+        return
+    g._nplusone = {
+        "counts": Counter(),
+        "threshold": int(cfg.get("NPLUSONE_THRESHOLD", _DEFAULT_THRESHOLD)),
+        "raise": bool(cfg.get("NPLUSONE_RAISE", sender.testing)),
+        "reports": [],
+        "pending_rel": None,
+    }
+
+
+def _req_done(sender, response, **extra):
+    st = g.pop("_nplusone", None)
+    if st is None:
+        return
+    # finálne počty pre hlásenia (v čase hlásenia to bolo len threshold + 1)
+    for fp, rep in st["reports"]:
+        rep["count"] = st["counts"][fp]
+
+
+def request_reports() -> list:
+    """Hlásenia aktuálneho requestu (napr. pre testy)."""
+    st = _state()
+    return [rep for _, rep in st["reports"]] if st else []
+
+
+def recent_reports() -> list:
+    with _lock:
+        return list(reversed(_recent))
+
+
+def reset():
+    with _lock:
+        _recent.clear()
+
+
+def init_nplusone(app):
+    if not app.config.get("NPLUSONE_ENABLED", True):
+        return
+    request_started.connect(_req_start, app)
+    request_finished.connect(_req_done, app)
@@ -0,0 +1,187 @@
+# utils/orphans.py
+"""
+Upratovanie súborov, na ktoré neukazuje žiadny riadok v DB.
+
+Súbory po sebe nechávajú staré cesty (zmaz_fotku_skupina ignoruje chyby OS,
+moderácia reklám zhltne výnimku, anonymize_user len vynuluje profil_fotka,
+routes.upload_fotka ukladá pod pôvodným menom a staré verzie nemaže).
+
+Postup pre každý adresár z TARGETS:
+1. Množina odkazovaných ciest – jeden dotaz na tabuľku (názov + varianty),
+   riadky sa čítajú prúdovo (yield_per).
+2. Prúdový prechod adresára (os.scandir, bez zoznamu v pamäti); súbor mladší
+   ako ochranná lehota sa preskočí – upload zapíše súbor pred commitom.
+3. Neodkazované súbory sa presunú do karantény
+   instance/orphans/<YYYYmmddTHHMMSS>/<adresár>/…; obnova = presun späť.
+4. Behy karantény staršie ako QUARANTINE_DAYS sa zmažú natrvalo.
+
+Bloby s ref_count 0 maže utils/blobs.collect_garbage – tu sa v static/blobs
+hľadajú len súbory, ktoré nepatria žiadnemu riadku `blob` (napr. pád workera
+medzi zápisom variantov a commitom).
+Pevné súbory (avatar-*.svg, default.png …) chráni KEEP. Prechádza sa len
+lokálne úložisko (utils/storage.py, STORAGE_BACKEND=local) a adresár fronty.
+"""
+import fnmatch
+import os
+import shutil
+from datetime import datetime, timedelta
+
+from flask import current_app
+
+from models import db, Pouzivatel, Skupina, Blob, ImageJob
+from utils.images import variants
+from utils import blobs
+from utils.storage import get_storage, resolve_key
+
+GRACE_SECONDS = 3600
+QUARANTINE_DAYS = 7
+QUARANTINE_DIR = "orphans"   # v instance/
+_RUN_FMT = "%Y%m%dT%H%M%S"
+
+# súbory, ktoré sú súčasťou aplikácie (predvolené obrázky), nie uploady
+KEEP = ("*.svg", "default.*", ".*")
+
+
+def _targets() -> list:
+    """
+    (názov, adresár, zdroje odkazov); zdroj = (model, stĺpec s názvom, stĺpec s variantmi, prefix).
+    Názvy sa k prefixu pripájajú cez storage.resolve_key (plochý starý názov aj
+    celý kľúč "profilovky/ab/cd/…"); prefix None = názov relatívny k adresáru.
+    Pri vzdialenom úložisku (S3) sa prechádza len lokálny adresár fronty.
+    """
+    out = []
+    st = get_storage()
+    if st.local_dir("") is not None:
+        out += [
+            ("profilovky", st.local_dir("profilovky"),
+             [(Pouzivatel, "profil_fotka", "profil_fotka_varianty", "profilovky")]),
+            ("profilovky_skupina", st.local_dir("profilovky_skupina"),
+             [(Skupina, "profil_fotka_skupina", "profil_fotka_skupina_varianty", "profilovky_skupina")]),
+        ]
+        for model, sub in blobs.LEGACY_FOLDERS.items():
+            _, name, var, _, _ = blobs.REFS[model]
+            out.append((sub, st.local_dir(sub), [(model, name, var, sub)]))
+        out.append((blobs.BLOB_PREFIX, st.local_dir(blobs.BLOB_PREFIX),
+                    [(Blob, "nazov", "varianty", blobs.BLOB_PREFIX)]))
+    out.append(("incoming", current_app.config["IMAGE_INCOMING_DIR"],
+                [(ImageJob, "src_path", None, None)]))
+    return out
+
+
+def _referenced(folder: str, sources: list) -> set[str]:
+    """Normalizované absolútne cesty súborov, na ktoré ukazujú riadky (jeden dotaz na zdroj)."""
+    refs = set()
+    root = get_storage().local_dir("")
+    for model, name_col, var_col, prefix in sources:
+        cols = [getattr(model, name_col)] + ([getattr(model, var_col)] if var_col else [])
+        q = db.session.query(*cols).filter(cols[0].isnot(None))
+        if model is ImageJob:
+            q = q.filter(ImageJob.stav.in_(("pending", "running")))
+        for row in q.yield_per(1000):
+            keys = [row[0]]
+            if var_col:
+                for v in variants(row[1]):
+                    keys += [v.get("webp"), v.get("jpg")]
+            refs.update(os.path.normpath(os.path.join(root, resolve_key(prefix, k)) if prefix
+                                         else os.path.join(folder, k)) for k in keys if k)
+    return refs
+
+
+def _scan(folder: str):
+    """Prúdovo všetky súbory pod `folder` (rekurzívne) ako os.DirEntry."""
+    try:
+        it = os.scandir(folder)
+    except OSError:
+        return
+    with it:
+        for entry in it:
+            if entry.is_dir(follow_symlinks=False):
+                yield from _scan(entry.path)
+            elif entry.is_file(follow_symlinks=False):
+                yield entry
+
+
+def _kept(name: str) -> bool:
+    return any(fnmatch.fnmatch(name, p) for p in KEEP)
+
+
+def _move(src: str, dst: str):
+    os.makedirs(os.path.dirname(dst), exist_ok=True)
+    try:
+        os.replace(src, dst)
+    except OSError:
+        shutil.move(src, dst)  # iný súborový systém
+
+
+def quarantine_root() -> str:
+    return os.path.join(current_app.instance_path, QUARANTINE_DIR)
+
+
+def _dir_size(folder: str) -> int:
+    size = 0
+    for entry in _scan(folder):
+        try:
+            size += entry.stat(follow_symlinks=False).st_size
+        except OSError:
+            pass
+    return size
+
+
+def _purge(days: int, dry_run: bool) -> tuple[int, int]:
+    """Zmaž behy karantény staršie ako `days`. Vráti (počet behov, bajty)."""
+    root = quarantine_root()
+    cutoff = datetime.utcnow() - timedelta(days=days)
+    runs = freed = 0
+    try:
+        names = sorted(os.listdir(root))
+    except OSError:
+        return 0, 0
+    for name in names:
+        try:
+            when = datetime.strptime(name, _RUN_FMT)
+        except ValueError:
+            continue
+        if when >= cutoff:
+            continue
+        path = os.path.join(root, name)
+        freed += _dir_size(path)
+        runs += 1
+        if not dry_run:
+            shutil.rmtree(path, ignore_errors=True)
+    return runs, freed
+
+
+def collect_orphans(grace_seconds: int = GRACE_SECONDS, quarantine_days: int = QUARANTINE_DAYS,
+                    dry_run: bool = False) -> dict:
+    """
+    Presuň neodkazované súbory do karantény a vyprázdni starú karanténu.
+    Vráti {názov adresára: (súbory, bajty), ..., "purged": (behy, bajty)};
+    pri dry_run sa nič nepresúva ani nemaže, čísla hovoria, čo by sa uvoľnilo.
+    """
+    cutoff = datetime.utcnow().timestamp() - grace_seconds
+    run_dir = os.path.join(quarantine_root(), datetime.utcnow().strftime(_RUN_FMT))
+    report = {}
+    for label, folder, sources in _targets():
+        refs = _referenced(folder, sources)
+        db.session.rollback()  # nedrž transakciu (SQLite zámok) počas prechodu disku
+        count = size = 0
+        for entry in _scan(folder):
+            if _kept(entry.name) or os.path.normpath(entry.path) in refs:
+                continue
+            try:
+                st = entry.stat(follow_symlinks=False)
+            except OSError:
+                continue
+            if st.st_mtime > cutoff:
+                continue
+            if not dry_run:
+                try:
+                    _move(entry.path, os.path.join(run_dir, label, os.path.relpath(entry.path, folder)))
+                except OSError as e:
+                    current_app.logger.warning("orphans: %s sa nedá presunúť: %s", entry.path, e)
+                    continue
+            count += 1
+            size += st.st_size
+        report[label] = (count, size)
+    report["purged"] = _purge(quarantine_days, dry_run)
+    return report
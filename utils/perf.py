@@ -0,0 +1,193 @@
+# utils/perf.py
+"""
+Meranie výkonu po requestoch: počet SQL dotazov, čas v DB, čas renderu šablón, celkový čas.
+
+Zdroje:
+- SQLAlchemy `before_cursor_execute` / `after_cursor_execute` (všetky enginy),
+- Flask signály `request_started` / `request_finished`,
+- `before_render_template` / `template_rendered` (render cez render_template).
+
+Výstupy:
+- hlavička `Server-Timing` (PERF_SERVER_TIMING) – vidno v DevTools → Network → Timing,
+- klzné okno posledných PERF_WINDOW meraní na endpoint (admin stránka /admin/perf),
+- voliteľne jeden JSON riadok na request do logu „perf“ (PERF_LOG_JSON).
+"""
+import json
+import logging
+import threading
+import time
+from collections import deque
+
+from flask import g, has_request_context, request
+from flask import request_started, request_finished, template_rendered
+from flask.signals import before_render_template
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+perf_log = logging.getLogger("perf")
+
+# hranice histogramu celkového času (ms); posledný kôš je „viac“
+BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+
+_DEFAULT_WINDOW = 500
+
+_lock = threading.Lock()
+_samples = {}   # endpoint -> deque[(wall_ms, sql_ms, queries, tpl_ms)]
+
+
+# -----------------------------
+# Stav aktuálneho requestu
+# -----------------------------
+def _state():
+    """Slovník merania pre aktuálny request, alebo None (mimo requestu / vypnuté)."""
+    if not has_request_context():
+        return None
+    return g.get("_perf")
+
+
+def current_stats() -> dict | None:
+    """Priebežné čísla aktuálneho requestu (napr. pre debug badge)."""
+    st = _state()
+    if st is None:
+        return None
+    return {"queries": st["queries"], "sql_ms": st["sql"] * 1000, "tpl_ms": st["tpl"] * 1000}
+
+
+# -----------------------------
+# SQL
+# -----------------------------
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor(conn, cursor, statement, parameters, context, executemany):
+    if _state() is not None:
+        conn.info.setdefault("_perf_t0", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor(conn, cursor, statement, parameters, context, executemany):
+    stack = conn.info.get("_perf_t0")
+    if not stack:
+        return
+    dt = time.perf_counter() - stack.pop()
+    st = _state()
+    if st is not None:
+        st["queries"] += 1
+        st["sql"] += dt
+
+
+# -----------------------------
+# Šablóny
+# -----------------------------
+def _tpl_start(sender, template, context, **extra):
+    st = _state()
+    if st is not None:
+        st["tpl_stack"].append(time.perf_counter())
+
+
+def _tpl_done(sender, template, context, **extra):
+    st = _state()
+    if st is not None and st["tpl_stack"]:
+        t0 = st["tpl_stack"].pop()
+        if not st["tpl_stack"]:  # vnorené render_template nepočítame dvakrát
+            st["tpl"] += time.perf_counter() - t0
+
+
+# -----------------------------
+# Request
+# -----------------------------
+def _req_start(sender, **extra):
+    if request.endpoint == "static":
+        return
+    g._perf = {"t0": time.perf_counter(), "queries": 0, "sql": 0.0, "tpl": 0.0, "tpl_stack": []}
+
+
+def _req_done(sender, response, **extra):
+    st = g.pop("_perf", None)
+    if st is None:
+        return
+    cfg = sender.config
+    wall = (time.perf_counter() - st["t0"]) * 1000
+    sql, tpl, q = st["sql"] * 1000, st["tpl"] * 1000, st["queries"]
+    endpoint = request.endpoint or f"<{response.status_code}>"
+
+    if cfg.get("PERF_SERVER_TIMING", True):
+        response.headers.add(
+            "Server-Timing",
+            f'db;dur={sql:.1f};desc="{q} queries", tpl;dur={tpl:.1f}, total;dur={wall:.1f}',
+        )
+
+    record(endpoint, wall, sql, q, tpl, window=int(cfg.get("PERF_WINDOW", _DEFAULT_WINDOW)))
+
+    if cfg.get("PERF_LOG_JSON"):
+        perf_log.info(json.dumps({
+            "endpoint": endpoint, "method": request.method, "path": request.path,
+            "status": response.status_code, "wall_ms": round(wall, 1), "sql_ms": round(sql, 1),
+            "queries": q, "tpl_ms": round(tpl, 1),
+        }))
+
+
+def record(endpoint, wall_ms, sql_ms, queries, tpl_ms, window=_DEFAULT_WINDOW):
+    with _lock:
+        dq = _samples.get(endpoint)
+        if dq is None or dq.maxlen != window:
+            dq = _samples[endpoint] = deque(dq or (), maxlen=window)
+        dq.append((wall_ms, sql_ms, queries, tpl_ms))
+
+
+# -----------------------------
+# Agregácia pre /admin/perf
+# -----------------------------
+def percentile(sorted_vals, p):
+    if not sorted_vals:
+        return 0.0
+    k = min(len(sorted_vals) - 1, max(0, int(round(p / 100.0 * (len(sorted_vals) - 1)))))
+    return sorted_vals[k]
+
+
+def snapshot() -> list:
+    """Súhrn na endpoint, zoradený podľa celkového stráveného času."""
+    with _lock:
+        data = {ep: list(dq) for ep, dq in _samples.items()}
+
+    rows = []
+    for ep, samples in data.items():
+        if not samples:
+            continue
+        walls = sorted(s[0] for s in samples)
+        n = len(samples)
+        hist = [0] * (len(BUCKETS_MS) + 1)
+        for w in walls:
+            i = 0
+            while i < len(BUCKETS_MS) and w > BUCKETS_MS[i]:
+                i += 1
+            hist[i] += 1
+        rows.append({
+            "endpoint": ep,
+            "count": n,
+            "p50": percentile(walls, 50),
+            "p95": percentile(walls, 95),
+            "p99": percentile(walls, 99),
+            "max": walls[-1],
+            "avg_queries": sum(s[2] for s in samples) / n,
+            "max_queries": max(s[2] for s in samples),
+            "avg_sql": sum(s[1] for s in samples) / n,
+            "avg_tpl": sum(s[3] for s in samples) / n,
+            "total": sum(walls),
+            "hist": hist,
+        })
+    rows.sort(key=lambda r: r["total"], reverse=True)
+    return rows
+
+
+def reset():
+    with _lock:
+        _samples.clear()
+
+
+def init_perf(app):
+    """Zapoj signály (SQL listenery sú globálne na Engine)."""
+    if not app.config.get("PERF_ENABLED", True):
+        return
+    request_started.connect(_req_start, app)
+    request_finished.connect(_req_done, app)
+    before_render_template.connect(_tpl_start, app)
+    template_rendered.connect(_tpl_done, app)
@@ -0,0 +1,112 @@
+# utils/search_keys.py
+"""
+Normalizované „kľúče“ na hľadanie v slovenskom texte.
+
+SQLite `ilike` skladá len ASCII a diakritiku neriešuje vôbec – „Žilina“,
+„zilina“ a „ŽILINA“ sa navzájom nenájdu. Vybrané stĺpce preto majú tieňový
+stĺpec *_key = malé písmená bez diakritiky (rovnaký NFD strip ako
+utils/moderation_text._strip_diacritics). Dotaz sa normalizuje tou istou
+funkciou a porovnáva sa kľúč s kľúčom.
+
+Index majú len kľúče, ktoré dotaz vie použiť: key_prefix() (rozsah) a
+rovnosť – pouzivatel.prezyvka_key (find_user), podujatie.miesto_key.
+key_contains() (LIKE '%q%') index nepoužije nikdy.
+
+Údržba: before_insert / before_update na modeloch z KEY_COLUMNS prepočíta
+kľúče, keď sa zmení zdrojový stĺpec. Hromadné Query.update() eventy
+obchádzajú → `flask search-reindex` (backfill_keys).
+"""
+import re
+
+from sqlalchemy import event, inspect
+
+from models import db, Pouzivatel, Skupina, Podujatie
+from utils.moderation_text import _strip_diacritics
+
+# model -> {kľúčový stĺpec: (zdrojové stĺpce, spojené medzerou)}
+KEY_COLUMNS = {
+    Pouzivatel: {
+        "prezyvka_key": ("prezyvka",),
+        "meno_key": ("meno", "priezvisko"),
+        "organizacia_key": ("organizacia_nazov",),
+    },
+    Skupina: {
+        "nazov_key": ("nazov",),
+    },
+    Podujatie: {
+        "nazov_key": ("nazov",),
+        "organizator_key": ("organizator",),
+        "miesto_key": ("miesto",),
+    },
+}
+
+_SPACES = re.compile(r"\s+")
+
+
+def search_key(text: str | None) -> str:
+    """'  Žilinský  KRAJ ' -> 'zilinsky kraj'"""
+    return _SPACES.sub(" ", _strip_diacritics((text or "").lower())).strip()
+
+
+def _like_escape(s: str) -> str:
+    return s.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def key_contains(column, q_text: str):
+    """column (…_key) obsahuje normalizovaný `q_text` (prechod tabuľkou, bez indexu)."""
+    return column.like(f"%{_like_escape(search_key(q_text))}%", escape="\\")
+
+
+def key_prefix(column, q_text: str):
+    """column (…_key) začína normalizovaným `q_text` – rozsah, takže ide cez index."""
+    k = search_key(q_text)
+    return column.between(k, k + "\uffff")
+
+
+def _source_value(obj, sources) -> str | None:
+    parts = [getattr(obj, s) for s in sources]
+    joined = " ".join(p for p in parts if p)
+    return search_key(joined) or None
+
+
+def fill_keys(obj, only_changed: bool = False) -> None:
+    """Prepočítaj *_key na objekte (pri update len tie, ktorých zdroj sa zmenil)."""
+    attrs = inspect(obj).attrs
+    for key_col, sources in KEY_COLUMNS[type(obj)].items():
+        if only_changed and not any(attrs[s].history.has_changes() for s in sources):
+            continue
+        setattr(obj, key_col, _source_value(obj, sources))
+
+
+def backfill_keys(batch: int = 500) -> int:
+    """Dopočítaj kľúče všetkým riadkom (CLI `flask search-reindex`). Vráti počet zmien."""
+    changed = 0
+    for model, cols in KEY_COLUMNS.items():
+        last_id = 0
+        while True:
+            chunk = model.query.filter(model.id > last_id).order_by(model.id).limit(batch).all()
+            if not chunk:
+                break
+            for obj in chunk:
+                for key_col, sources in cols.items():
+                    value = _source_value(obj, sources)
+                    if getattr(obj, key_col) != value:
+                        setattr(obj, key_col, value)
+                        changed += 1
+            db.session.commit()
+            last_id = chunk[-1].id
+    return changed
+
+
+# --- ORM hooky ---
+def _before_insert(mapper, conn, target):
+    fill_keys(target)
+
+
+def _before_update(mapper, conn, target):
+    fill_keys(target, only_changed=True)
+
+
+for _model in KEY_COLUMNS:
+    event.listen(_model, "before_insert", _before_insert)
+    event.listen(_model, "before_update", _before_update)
@@ -0,0 +1,94 @@
+# utils/sharding.py
+"""
+Presun starých plochých uploadov do dvoch úrovní adresárov (`flask uploads-shard`).
+
+Plochý názov "x_1200.jpg" v adresári `folder` sa zmení na celý kľúč
+"folder/ab/cd/x_1200.jpg" (utils/storage.shard_prefix), varianty rovnako.
+Nové uploady už ukladajú celé kľúče (store_image, bloby), takže sa migrujú
+len riadky bez lomky v názve.
+
+Beží za chodu, po dávkach:
+1. súbory sa skopírujú na nové miesto (lokálne hard link, v S3 copy),
+2. riadky sa prepíšu podmieneným UPDATE (... WHERE názov = starý) a commit,
+3. staré súbory sa zmažú, až keď na starý názov nič neukazuje.
+Medzi krokmi fungujú staré aj nové URL. Rovnaký plochý názov vo viacerých
+riadkoch (zdieľaná profilovka) dostane jeden nový kľúč. Prerušený beh stačí
+spustiť znova.
+"""
+import fnmatch
+
+from sqlalchemy import update
+
+from models import db, Pouzivatel, Skupina
+from utils import blobs
+from utils.images import image_files, prefix_variants, PENDING
+from utils.orphans import KEEP
+from utils.storage import get_storage, shard_prefix
+
+
+def _sources() -> list:
+    """(model, stĺpec s názvom, stĺpec s variantmi, prefix v úložisku)"""
+    out = [
+        (Pouzivatel, "profil_fotka", "profil_fotka_varianty", "profilovky"),
+        (Skupina, "profil_fotka_skupina", "profil_fotka_skupina_varianty", "profilovky_skupina"),
+    ]
+    for model, folder in blobs.LEGACY_FOLDERS.items():
+        _, name, var, _, _ = blobs.REFS[model]
+        out.append((model, name, var, folder))
+    return out
+
+
+def _flat_names(col, after: str, limit: int) -> list[str]:
+    return [r[0] for r in db.session.query(col).filter(col.isnot(None), col > after, ~col.contains("/"))
+            .distinct().order_by(col).limit(limit)]
+
+
+def migrate_flat(batch: int = 200, dry_run: bool = False, on_progress=None) -> dict:
+    """
+    Presuň ploché súbory všetkých zdrojov do "<prefix>/ab/cd/".
+    Vráti {prefix: (názvov, súborov)}; pri dry_run len spočíta, čo by sa presunulo.
+    """
+    st = get_storage()
+    report = {}
+    for model, name_col, var_col, folder in _sources():
+        t = model.__table__
+        col = getattr(model, name_col)
+        names = files = 0
+        last = ""
+        while True:
+            chunk = _flat_names(col, last, batch)
+            if not chunk:
+                break
+            last = chunk[-1]
+            done = []
+            for old in chunk:
+                if any(fnmatch.fnmatch(old, p) for p in KEEP):
+                    continue  # predvolený obrázok aplikácie, nie upload
+                rows = db.session.query(t.c.id, t.c[var_col]).filter(t.c[name_col] == old).all()
+                if any(v == PENDING for _, v in rows):
+                    continue
+                prefix = shard_prefix(folder, old)
+                keys = set(image_files(old, None))
+                for _, v in rows:
+                    keys |= image_files(old, v)
+                names += 1
+                files += len(keys)
+                if dry_run:
+                    continue
+                for k in keys:
+                    st.copy(f"{folder}/{k}", f"{prefix}/{k}")
+                for row_id, v in rows:
+                    db.session.execute(update(t).where(t.c.id == row_id, t.c[name_col] == old)
+                                       .values({name_col: f"{prefix}/{old}", var_col: prefix_variants(v, prefix)}))
+                done.append((old, keys))
+            db.session.commit()
+
+            for old, keys in done:
+                if db.session.query(t.c.id).filter(t.c[name_col] == old).first() is None:
+                    for k in keys:
+                        st.delete(f"{folder}/{k}")
+            db.session.rollback()
+            if on_progress:
+                on_progress(folder, names)
+        report[folder] = (names, files)
+    return report
@@ -0,0 +1,282 @@
+# utils/storage.py
+"""
+Úložisko nahratých súborov. Kľúč = cesta relatívna k static/
+("profilovky/5_1757…_480.webp", "blobs/ab/cd/<sha>_1200.jpg"), takže rovnaké
+kľúče sedia v DB pre oba backendy.
+
+STORAGE_BACKEND:
+- local (default) – static/ na disku servera; URL cez /static, cez /media
+  (UPLOAD_SERVE_MODE, modules/media.py – kontrola prístupu + X-Accel-Redirect),
+  alebo STORAGE_PUBLIC_URL (CDN, ktorá ťahá z tohto servera).
+- s3 – S3-kompatibilné úložisko (AWS, MinIO, R2 …) cez boto3. Zápis prúdovo,
+  od 8 MB po častiach (multipart). URL = STORAGE_PUBLIC_URL/<kľúč> (CDN),
+  inak S3_ENDPOINT_URL/<bucket>/<kľúč> (path-style, napr. MinIO).
+  Lokálne: docker compose -f docker-compose.storage.yml up -d, potom
+  `flask storage-check`.
+
+Rozloženie: nové súbory idú do dvoch úrovní podľa hashu (<prefix>/ab/cd/<názov>),
+nech v jednom adresári nie sú státisíce súborov. Do DB sa ukladá celý kľúč
+(s lomkou); starý plochý názov bez lomky platí v adresári `folder` –
+resolve_key() to rozlíši, `flask uploads-shard` staré súbory presunie.
+
+Pillow zapisuje do adresára: local_dir(prefix) vráti priamo cieľ (local), pri
+s3 None – obrázky sa vtedy spravia v STORAGE_STAGING_DIR a put_file ich nahrá
+(a lokálnu kópiu zmaže). Chyby pri mazaní sa len zalogujú – zvyšok upratuje
+utils/orphans.py (len local) a utils/blobs.collect_garbage.
+"""
+import hashlib
+import mimetypes
+import os
+import shutil
+import uuid
+
+from flask import current_app, url_for
+
+CHUNK = 1024 * 1024
+BLOB_PREFIX = "blobs"      # obsahovo adresované súbory (utils/blobs.py), maže ich len GC
+MULTIPART_CHUNK = 8 * 1024 * 1024
+
+
+def shard(digest: str) -> str:
+    """Dve úrovne adresárov z hex hashu: "ab/cd"."""
+    return f"{digest[:2]}/{digest[2:4]}"
+
+
+def shard_prefix(folder: str, name: str) -> str:
+    """Adresár pre nový súbor: "<folder>/ab/cd" podľa hashu názvu (stemu)."""
+    return f"{folder}/{shard(hashlib.sha1(name.encode()).hexdigest())}"
+
+
+def resolve_key(folder: str, name: str) -> str:
+    """Kľúč v úložisku: celý kľúč (s lomkou) ostáva, plochý starý názov patrí do `folder`."""
+    return name if "/" in name else f"{folder}/{name}"
+
+
+def is_blob_key(name: str | None) -> bool:
+    return bool(name) and name.startswith(BLOB_PREFIX + "/")
+
+
+def _content_type(key: str) -> str:
+    return mimetypes.guess_type(key)[0] or "application/octet-stream"
+
+
+class LocalStorage:
+    """Súbory v adresári `root` (static/ aplikácie)."""
+    name = "local"
+
+    def __init__(self, root: str, public_url: str | None = None, endpoint: str | None = None):
+        self.root = os.path.abspath(root)
+        self.public_url = (public_url or "").rstrip("/") or None
+        self.endpoint = endpoint  # "media.serve" = cez Flask + X-Accel-Redirect (modules/media.py)
+
+    def _path(self, key: str) -> str:
+        path = os.path.normpath(os.path.join(self.root, key))
+        if path != self.root and not path.startswith(self.root + os.sep):
+            raise ValueError(f"kľúč mimo úložiska: {key!r}")
+        return path
+
+    def local_dir(self, prefix: str) -> str:
+        path = self._path(prefix)
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    def local_path(self, key: str) -> str:
+        return self._path(key)
+
+    def save(self, key: str, fileobj) -> int:
+        """Prúdovo ulož `fileobj` pod `key` (cez dočasný súbor, čitateľ nevidí polovičný súbor)."""
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{uuid.uuid4().hex[:8]}.part"
+        try:
+            with open(tmp, "wb") as out:
+                shutil.copyfileobj(fileobj, out, CHUNK)
+            os.replace(tmp, path)
+        except BaseException:
+            self._remove(tmp)
+            raise
+        return os.path.getsize(path)
+
+    def put_file(self, key: str, path: str):
+        """Presuň hotový lokálny súbor pod `key` (ak už je na mieste, nerob nič)."""
+        dst = self._path(key)
+        if os.path.abspath(path) == dst:
+            return
+        os.makedirs(os.path.dirname(dst), exist_ok=True)
+        shutil.move(path, dst)
+
+    def copy(self, src: str, dst: str) -> bool:
+        """Skopíruj (hard link, ak sa dá) `src` na `dst`. False = `src` neexistuje."""
+        s, d = self._path(src), self._path(dst)
+        if not os.path.isfile(s):
+            return False
+        os.makedirs(os.path.dirname(d), exist_ok=True)
+        self._remove(d)
+        try:
+            os.link(s, d)
+        except OSError:
+            shutil.copy2(s, d)
+        return True
+
+    def delete(self, key: str):
+        self._remove(self._path(key))
+
+    def exists(self, key: str) -> bool:
+        return os.path.isfile(self._path(key))
+
+    def size(self, key: str) -> int | None:
+        try:
+            return os.path.getsize(self._path(key))
+        except OSError:
+            return None
+
+    def open(self, key: str):
+        return open(self._path(key), "rb")
+
+    def url(self, key: str) -> str:
+        if self.public_url:
+            return f"{self.public_url}/{key}"
+        if self.endpoint:
+            return url_for(self.endpoint, key=key)
+        return url_for("static", filename=key)
+
+    @staticmethod
+    def _remove(path: str):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            current_app.logger.warning("storage: %s sa nedá zmazať: %s", path, e)
+
+
+class S3Storage:
+    """Bucket v S3-kompatibilnom úložisku (boto3 sa načíta až tu – pri local ho netreba)."""
+    name = "s3"
+
+    def __init__(self, bucket: str, endpoint_url: str | None = None, region: str | None = None,
+                 access_key: str | None = None, secret_key: str | None = None,
+                 public_url: str | None = None):
+        try:
+            import boto3
+            from boto3.s3.transfer import TransferConfig
+            from botocore.exceptions import ClientError
+        except ImportError as e:
+            raise RuntimeError("STORAGE_BACKEND=s3 potrebuje balík boto3 (pip install boto3)") from e
+        if not bucket:
+            raise RuntimeError("STORAGE_BACKEND=s3 potrebuje S3_BUCKET")
+
+        self.bucket = bucket
+        self.client = boto3.client("s3", endpoint_url=endpoint_url or None, region_name=region or None,
+                                   aws_access_key_id=access_key or None,
+                                   aws_secret_access_key=secret_key or None)
+        self.transfer = TransferConfig(multipart_threshold=MULTIPART_CHUNK,
+                                       multipart_chunksize=MULTIPART_CHUNK, use_threads=False)
+        self._client_error = ClientError
+        base = public_url or (f"{endpoint_url.rstrip('/')}/{bucket}" if endpoint_url
+                              else f"https://{bucket}.s3.amazonaws.com")
+        self.public_url = base.rstrip("/")
+
+    def local_dir(self, prefix: str) -> None:
+        return None
+
+    def local_path(self, key: str) -> None:
+        return None
+
+    def _extra(self, key: str) -> dict:
+        return {"ContentType": _content_type(key)}
+
+    def save(self, key: str, fileobj) -> None:
+        """Prúdovo nahraj `fileobj` (nad MULTIPART_CHUNK po častiach)."""
+        self.client.upload_fileobj(fileobj, self.bucket, key, ExtraArgs=self._extra(key), Config=self.transfer)
+
+    def put_file(self, key: str, path: str):
+        """Nahraj lokálny súbor a zmaž ho."""
+        self.client.upload_file(path, self.bucket, key, ExtraArgs=self._extra(key), Config=self.transfer)
+        os.remove(path)
+
+    def copy(self, src: str, dst: str) -> bool:
+        """Kópia v rámci bucketu (veľké súbory po častiach). False = `src` neexistuje."""
+        if not self.exists(src):
+            return False
+        self.client.copy({"Bucket": self.bucket, "Key": src}, self.bucket, dst, Config=self.transfer)
+        return True
+
+    def delete(self, key: str):
+        try:
+            self.client.delete_object(Bucket=self.bucket, Key=key)
+        except self._client_error as e:
+            current_app.logger.warning("storage: s3 %s sa nedá zmazať: %s", key, e)
+
+    def _head(self, key: str) -> dict | None:
+        try:
+            return self.client.head_object(Bucket=self.bucket, Key=key)
+        except self._client_error as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return None
+            raise
+
+    def exists(self, key: str) -> bool:
+        return self._head(key) is not None
+
+    def size(self, key: str) -> int | None:
+        head = self._head(key)
+        return head["ContentLength"] if head else None
+
+    def open(self, key: str):
+        return self.client.get_object(Bucket=self.bucket, Key=key)["Body"]
+
+    def url(self, key: str) -> str:
+        return f"{self.public_url}/{key}"
+
+
+def make_storage(config) -> LocalStorage | S3Storage:
+    backend = (config.get("STORAGE_BACKEND") or "local").lower()
+    if backend == "local":
+        serve = config.get("UPLOAD_SERVE_MODE") or "static"
+        return LocalStorage(config["STORAGE_LOCAL_ROOT"], public_url=config.get("STORAGE_PUBLIC_URL"),
+                            endpoint=None if serve == "static" else "media.serve")
+    if backend == "s3":
+        return S3Storage(config.get("S3_BUCKET"), endpoint_url=config.get("S3_ENDPOINT_URL"),
+                         region=config.get("S3_REGION"), access_key=config.get("S3_ACCESS_KEY_ID"),
+                         secret_key=config.get("S3_SECRET_ACCESS_KEY"),
+                         public_url=config.get("STORAGE_PUBLIC_URL"))
+    raise RuntimeError(f"neznámy STORAGE_BACKEND: {backend!r} (local | s3)")
+
+
+def init_storage(app):
+    app.config.setdefault("STORAGE_LOCAL_ROOT", app.static_folder)
+    app.config.setdefault("STORAGE_STAGING_DIR", os.path.join(app.instance_path, "storage_staging"))
+    app.extensions["storage"] = make_storage(app.config)
+
+
+def get_storage() -> LocalStorage | S3Storage:
+    return current_app.extensions["storage"]
+
+
+def staging_dir(prefix: str) -> str:
+    """Lokálny adresár, kam Pillow zapíše súbory pre `prefix` (local = priamo cieľ)."""
+    st = get_storage()
+    path = st.local_dir(prefix)
+    if path is None:
+        path = os.path.join(current_app.config["STORAGE_STAGING_DIR"], prefix)
+        os.makedirs(path, exist_ok=True)
+    return path
+
+
+def check_storage() -> list[str]:
+    """Zapíš, prečítaj a zmaž testovací súbor (CLI `flask storage-check`). Vráti priebeh."""
+    import io
+    st = get_storage()
+    key = f"_check/{uuid.uuid4().hex}.txt"
+    body = os.urandom(MULTIPART_CHUNK + 1024)  # nad hranicou multipartu
+    log = [f"backend {st.name}"]
+    st.save(key, io.BytesIO(body))
+    log.append(f"zápis {key} ({len(body)} B)")
+    with st.open(key) as f:
+        ok = f.read() == body
+    log.append("čítanie " + ("ok" if ok else "NESEDÍ"))
+    log.append(f"url {st.url(key)}")
+    st.delete(key)
+    log.append("zmazanie " + ("ok" if not st.exists(key) else "ZLYHALO"))
+    return log
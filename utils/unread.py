@@ -0,0 +1,155 @@
+# utils/unread.py
+"""
+Počítadlá neprečítaných správ / fórových notifikácií pre badge v hlavičke.
+
+Namiesto COUNT(*) pri každom renderi držíme súčty priamo na používateľovi
+(Pouzivatel.unread_spravy, Pouzivatel.unread_forum). Keďže current_user sa
+načítava pri každom requeste tak či tak, badge nestojí žiadny ďalší dotaz.
+
+Údržba:
+- ORM eventy na Sprava / ForumNotification (insert, update, delete) upravia
+  počítadlo atómovým `UPDATE ... SET x = x + :delta` v tej istej transakcii,
+- hromadné `Query.update()` eventy obchádzajú → volajúci zavolá `adjust_unread()`,
+- `reconcile_unread()` (CLI `flask unread-reconcile`) prepočíta všetko zo zdrojových tabuliek.
+"""
+from sqlalchemy import event, func, inspect, update
+
+from models import db, Pouzivatel, Sprava, ForumNotification
+
+_user = Pouzivatel.__table__
+
+
+def _apply(conn, user_id, spravy=0, forum=0):
+    if not user_id or not (spravy or forum):
+        return
+    values = {}
+    if spravy:
+        values["unread_spravy"] = _user.c.unread_spravy + spravy
+    if forum:
+        values["unread_forum"] = _user.c.unread_forum + forum
+    conn.execute(update(_user).where(_user.c.id == user_id).values(**values))
+
+
+def adjust_unread(user_id, spravy: int = 0, forum: int = 0) -> None:
+    """Ručná úprava počítadiel v aktuálnej session (napr. po hromadnom update)."""
+    _apply(db.session, user_id, spravy=spravy, forum=forum)
+
+
+def unread_counts(user) -> tuple[int, int]:
+    """(správy, fórum) pre badge; záporné hodnoty (drift) orežeme na 0."""
+    return (max(0, int(getattr(user, "unread_spravy", 0) or 0)),
+            max(0, int(getattr(user, "unread_forum", 0) or 0)))
+
+
+# --- pomocníci pre stav pred/po zmene ---
+# Po commite sú atribúty expirované; bez active_history by set nepoznal starú
+# hodnotu a history.deleted by bolo prázdne. Prázdny listener s active_history
+# zabezpečí, že sa stará hodnota pred zmenou dočíta.
+def _track(attr):
+    event.listen(attr, "set", lambda target, value, oldvalue, initiator: value,
+                 active_history=True, retval=True)
+
+
+for _attr in (Sprava.komu_id, Sprava.precitane, Sprava.deleted_by_recipient,
+              ForumNotification.user_id, ForumNotification.read_at):
+    _track(_attr)
+
+
+def _before(target, key):
+    hist = inspect(target).attrs[key].history
+    if hist.deleted:
+        return hist.deleted[0]
+    return getattr(target, key)
+
+
+def _sprava_unread(komu_id, precitane, deleted_by_recipient):
+    return bool(komu_id) and not precitane and not deleted_by_recipient
+
+
+# --- Sprava ---
+@event.listens_for(Sprava, "after_insert")
+def _sprava_inserted(mapper, conn, target):
+    if _sprava_unread(target.komu_id, target.precitane, target.deleted_by_recipient):
+        _apply(conn, target.komu_id, spravy=1)
+
+
+@event.listens_for(Sprava, "after_update")
+def _sprava_updated(mapper, conn, target):
+    old_komu = _before(target, "komu_id")
+    was = _sprava_unread(old_komu, _before(target, "precitane"), _before(target, "deleted_by_recipient"))
+    now = _sprava_unread(target.komu_id, target.precitane, target.deleted_by_recipient)
+    if old_komu != target.komu_id:
+        if was:
+            _apply(conn, old_komu, spravy=-1)
+        if now:
+            _apply(conn, target.komu_id, spravy=1)
+    elif was != now:
+        _apply(conn, target.komu_id, spravy=(1 if now else -1))
+
+
+@event.listens_for(Sprava, "after_delete")
+def _sprava_deleted(mapper, conn, target):
+    if _sprava_unread(target.komu_id, target.precitane, target.deleted_by_recipient):
+        _apply(conn, target.komu_id, spravy=-1)
+
+
+# --- ForumNotification ---
+@event.listens_for(ForumNotification, "after_insert")
+def _notif_inserted(mapper, conn, target):
+    if target.read_at is None:
+        _apply(conn, target.user_id, forum=1)
+
+
+@event.listens_for(ForumNotification, "after_update")
+def _notif_updated(mapper, conn, target):
+    old_user = _before(target, "user_id")
+    was = _before(target, "read_at") is None
+    now = target.read_at is None
+    if old_user != target.user_id:
+        if was:
+            _apply(conn, old_user, forum=-1)
+        if now:
+            _apply(conn, target.user_id, forum=1)
+    elif was != now:
+        _apply(conn, target.user_id, forum=(1 if now else -1))
+
+
+@event.listens_for(ForumNotification, "after_delete")
+def _notif_deleted(mapper, conn, target):
+    if target.read_at is None:
+        _apply(conn, target.user_id, forum=-1)
+
+
+# --- rekonciliácia ---
+def reconcile_unread(user_id: int | None = None) -> int:
+    """
+    Prepočíta počítadlá zo zdrojových tabuliek (oprava driftu).
+    Vráti počet používateľov, ktorým sa hodnota zmenila.
+    """
+    spravy_q = (db.session.query(Sprava.komu_id, func.count(Sprava.id))
+                .filter(Sprava.komu_id.isnot(None),
+                        Sprava.precitane.isnot(True),
+                        Sprava.deleted_by_recipient.isnot(True))
+                .group_by(Sprava.komu_id))
+    forum_q = (db.session.query(ForumNotification.user_id, func.count(ForumNotification.id))
+               .filter(ForumNotification.read_at.is_(None))
+               .group_by(ForumNotification.user_id))
+    users_q = db.session.query(Pouzivatel.id, Pouzivatel.unread_spravy, Pouzivatel.unread_forum)
+
+    if user_id is not None:
+        spravy_q = spravy_q.filter(Sprava.komu_id == user_id)
+        forum_q = forum_q.filter(ForumNotification.user_id == user_id)
+        users_q = users_q.filter(Pouzivatel.id == user_id)
+
+    spravy = dict(spravy_q.all())
+    forum = dict(forum_q.all())
+
+    changed = 0
+    for uid, cur_s, cur_f in users_q.all():
+        want_s, want_f = int(spravy.get(uid, 0)), int(forum.get(uid, 0))
+        if (cur_s, cur_f) != (want_s, want_f):
+            db.session.execute(update(_user).where(_user.c.id == uid)
+                               .values(unread_spravy=want_s, unread_forum=want_f))
+            changed += 1
+    db.session.commit()
+    return changed
@@ -0,0 +1,77 @@
+# utils/uploads.py
+"""
+Limity uploadov a skoré odmietnutie.
+
+- MAX_CONTENT_LENGTH platí pre každý request; endpointy s viacerými fotkami
+  (galérie, inzerát) majú vlastný limit cez `@upload_limit("CONFIG_KLUC")`.
+  Werkzeug odmietne request s väčším Content-Length ešte pred čítaním tela
+  (413) a pri chunked tele ho preruší po prekročení limitu.
+- Multipart parser číta telo po blokoch; súbor nad 500 kB ide do dočasného
+  súboru, nie do RAM. Textové polia formulára majú strop MAX_FORM_MEMORY.
+- Jednotlivý súbor sa kopíruje po blokoch (utils/blobs.ingest) s limitom
+  UPLOAD_MAX_FILE_BYTES a typ sa určí z prvých bajtov (sniff_image), nie
+  z prípony – nepodporovaný súbor sa odmietne po prvom bloku.
+- Pixely (dekompresná bomba) kontroluje utils/images.save_image z hlavičky,
+  ešte pred dekódovaním.
+"""
+from flask import Request, current_app, flash, redirect, request, url_for
+
+from utils.images import ImageError
+
+MAX_FORM_MEMORY = 1024 * 1024   # textové polia multipart formulára spolu
+SNIFF_BYTES = 12
+
+# prvé bajty -> formát (názov v Pillow)
+_MAGIC = (
+    (b"\xff\xd8\xff", "JPEG"),
+    (b"\x89PNG\r\n\x1a\n", "PNG"),
+    (b"GIF87a", "GIF"),
+    (b"GIF89a", "GIF"),
+)
+
+
+class UploadRejected(ImageError):
+    """Upload je príliš veľký alebo nemá podporovaný typ."""
+
+
+def sniff_image(head: bytes) -> str | None:
+    """Formát obrázka podľa magických bajtov (JPEG/PNG/GIF/WEBP), inak None."""
+    for magic, fmt in _MAGIC:
+        if head.startswith(magic):
+            return fmt
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "WEBP"
+    return None
+
+
+def upload_limit(config_key: str):
+    """Dekorátor view: limit veľkosti requestu z app.config[config_key] namiesto MAX_CONTENT_LENGTH."""
+    def deco(fn):
+        fn.upload_limit_key = config_key
+        return fn
+    return deco
+
+
+class UploadRequest(Request):
+    """Request s limitom podľa endpointu (endpoint je známy pred parsovaním formulára)."""
+    max_form_memory_size = MAX_FORM_MEMORY
+
+    @property
+    def max_content_length(self) -> int | None:
+        if not current_app:
+            return None
+        view = current_app.view_functions.get(self.endpoint) if self.url_rule else None
+        key = getattr(view, "upload_limit_key", None)
+        if key:
+            return current_app.config.get(key)
+        return current_app.config.get("MAX_CONTENT_LENGTH")
+
+
+def _too_large(e):
+    flash("Súbor je príliš veľký.", "danger")
+    return redirect(request.referrer or url_for("main.index"), code=303)
+
+
+def init_uploads(app):
+    app.request_class = UploadRequest
+    app.register_error_handler(413, _too_large)
@@ -0,0 +1,187 @@
+# zip_benchmark.py
+"""
+ZIP export galérie (utils/gallery_zip.py): priepustnosť a peak RSS servera.
+
+Používateľovi --user-id sa v skupine „ZIP benchmark“ vyrobí galéria s N fotkami
+(default 500) v dočasnom úložisku (STORAGE_LOCAL_ROOT), server v samostatnom
+procese ju vydá cez GET /skupina/<id>/galeria.zip a klient archív prúdovo
+zapíše na disk.
+Meria sa čas do prvého bajtu, celkový čas, MB/s a nárast VmHWM servera –
+pri prúdovom zápise nezávisí od veľkosti galérie (len od okna prefetch).
+Z lokálneho disku (page cache) rozdiel medzi --workers 1 a 4 takmer nevidno,
+paralelné čítanie sa prejaví pri S3 / sieťovom disku.
+
+Použitie:
+  python seed_dataset.py --scale 0.1 --reset        # najprv dáta (instance/bench.db)
+  python zip_benchmark.py                           # 500 fotiek 1600x1067
+  python zip_benchmark.py --files 500 --workers 1   # bez paralelného čítania
+  python zip_benchmark.py --workers 8 --prefetch 16
+
+Fotky sú náhodný šum (JPEG sa nedá skomprimovať → realistická veľkosť); na disk sa
+vyrobí len --distinct rôznych súborov, ostatné sú hard linky. Riadky galérie sa
+na konci zmažú.
+"""
+import argparse
+import http.client
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import zipfile
+
+from upload_benchmark import BASE, DEFAULT_DB, _proc_kb, _serve, _free_port
+
+BENCH_GROUP = "ZIP benchmark"
+
+
+def _env(db_file: str, root: str, workers: int, prefetch: int) -> dict:
+    return dict(os.environ, DATABASE_URL="sqlite:///" + db_file.replace("\\", "/"),
+                HOUSEKEEP_MODE="off", IMAGE_QUEUE_MODE="cli", PERF_ENABLED="0",
+                NPLUSONE_ENABLED="0", SQLITE_READONLY_ENGINE="0", STORAGE_BACKEND="local",
+                STORAGE_LOCAL_ROOT=root, GALLERY_ZIP_WORKERS=str(workers),
+                GALLERY_ZIP_PREFETCH=str(prefetch))
+
+
+def _make_photos(root: str, n: int, distinct: int, width: int, height: int) -> tuple[list[str], int]:
+    """N súborov v rozložení galeria_skupina/ab/cd/…; vráti (kľúče, bajty spolu)."""
+    from PIL import Image
+    from utils.storage import shard_prefix
+
+    src = []
+    for i in range(min(distinct, n)):
+        img = Image.frombytes("RGB", (width, height), random.randbytes(width * height * 3))
+        p = os.path.join(root, f"_src_{i}.jpg")
+        img.save(p, "JPEG", quality=82)
+        src.append(p)
+
+    keys, total = [], 0
+    for i in range(n):
+        name = f"zipbench_{i:04}_1600.jpg"
+        key = f"{shard_prefix('galeria_skupina', name)}/{name}"
+        dst = os.path.join(root, key)
+        os.makedirs(os.path.dirname(dst), exist_ok=True)
+        s = src[i % len(src)]
+        try:
+            os.link(s, dst)
+        except OSError:
+            shutil.copyfile(s, dst)
+        keys.append(key)
+        total += os.path.getsize(dst)
+    return keys, total
+
+
+def _prepare(user_id: int, keys: list[str]) -> tuple[int, str]:
+    """Vlastná skupina „ZIP benchmark“ s galériou z `keys` + session cookie."""
+    from app import app
+    from models import db, Pouzivatel, Skupina, GaleriaSkupina
+
+    with app.app_context():
+        user = db.session.get(Pouzivatel, user_id)
+        if user is None:
+            sys.exit(f"❌ používateľ {user_id} neexistuje")
+        grp = Skupina.query.filter_by(nazov=BENCH_GROUP, zakladatel_id=user.id).first()
+        if grp is None:
+            grp = Skupina(nazov=BENCH_GROUP, zakladatel_id=user.id)
+            grp.clenovia.append(user)
+            db.session.add(grp)
+            db.session.flush()
+        GaleriaSkupina.query.filter(GaleriaSkupina.nazov_suboru.like("galeria_skupina/%/zipbench_%")).delete(
+            synchronize_session=False)
+        db.session.add_all(GaleriaSkupina(skupina_id=grp.id, nazov_suboru=k) for k in keys)
+        db.session.commit()
+
+        serializer = app.session_interface.get_signing_serializer(app)
+        cookie = serializer.dumps({"guest_access_granted": True, "_user_id": str(user_id), "_fresh": True})
+        return grp.id, f"{app.config.get('SESSION_COOKIE_NAME', 'session')}={cookie}"
+
+
+def _cleanup():
+    from app import app
+    from models import db, GaleriaSkupina
+    with app.app_context():
+        GaleriaSkupina.query.filter(GaleriaSkupina.nazov_suboru.like("galeria_skupina/%/zipbench_%")).delete(
+            synchronize_session=False)
+        db.session.commit()
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Priepustnosť a peak RSS servera pri ZIP exporte galérie.")
+    ap.add_argument("--db", default=DEFAULT_DB, help="SQLite DB (default instance/bench.db zo seed_dataset.py)")
+    ap.add_argument("--files", type=int, default=500)
+    ap.add_argument("--distinct", type=int, default=20, help="Koľko rôznych fotiek vyrobiť (zvyšok hard linky).")
+    ap.add_argument("--width", type=int, default=1600)
+    ap.add_argument("--height", type=int, default=1067)
+    ap.add_argument("--user-id", type=int, default=1)
+    ap.add_argument("--workers", type=int, default=4, help="GALLERY_ZIP_WORKERS")
+    ap.add_argument("--prefetch", type=int, default=8, help="GALLERY_ZIP_PREFETCH")
+    ap.add_argument("--serve", type=int, help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args.serve:
+        return _serve(args.serve)
+
+    db_file = os.path.abspath(args.db)
+    if not os.path.exists(db_file):
+        sys.exit(f"❌ {db_file} neexistuje – najprv spusti seed_dataset.py")
+    if not os.path.exists("/proc/self/status"):
+        sys.exit("❌ meranie RSS potrebuje /proc (Linux)")
+
+    with tempfile.TemporaryDirectory() as root:
+        env = _env(db_file, root, args.workers, args.prefetch)
+        os.environ.update(env)
+        sys.path.insert(0, BASE)
+        print(f"🖼️  generujem {args.files} fotiek {args.width}x{args.height} …")
+        keys, total = _make_photos(root, args.files, args.distinct, args.width, args.height)
+        group_id, cookie = _prepare(args.user_id, keys)
+
+        port = _free_port()
+        out_path = os.path.join(root, "out.zip")
+        server = subprocess.Popen([sys.executable, os.path.abspath(__file__), "--serve", str(port)],
+                                  cwd=BASE, env=env, stdout=subprocess.PIPE, text=True)
+        try:
+            server.stdout.readline()  # "ready"
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=600)
+            conn.request("GET", "/moja-skupina", headers={"Cookie": cookie})  # zahriatie (importy, šablóny)
+            conn.getresponse().read()
+
+            hwm_before = _proc_kb(server.pid, "VmHWM")
+            started = time.perf_counter()
+            conn.request("GET", f"/skupina/{group_id}/galeria.zip", headers={"Cookie": cookie})
+            resp = conn.getresponse()
+            first = None
+            size = 0
+            with open(out_path, "wb") as out:
+                while chunk := resp.read(256 * 1024):
+                    if first is None:
+                        first = time.perf_counter() - started
+                    out.write(chunk)
+                    size += len(chunk)
+            elapsed = time.perf_counter() - started
+            hwm_after = _proc_kb(server.pid, "VmHWM")
+        finally:
+            server.terminate()
+            server.wait()
+            _cleanup()
+
+        with zipfile.ZipFile(out_path) as zf:
+            infos = zf.infolist()
+            stored = sum(1 for i in infos if i.compress_type == zipfile.ZIP_STORED)
+            bad = zf.testzip()
+
+    mb = 1024
+    print(f"\nGET /skupina/{group_id}/galeria.zip  {args.files} fotiek, {total / 1024 / 1024:.1f} MB, "
+          f"workers={args.workers} prefetch={args.prefetch}  → {resp.status}")
+    print(f"  archív          {size / 1024 / 1024:8.1f} MB, {len(infos)} súborov ({stored} stored)"
+          f"{'' if bad is None else f', CHYBA v {bad}'}")
+    print(f"  prvý bajt       {(first or 0) * 1000:8.0f} ms")
+    print(f"  čas             {elapsed * 1000:8.0f} ms")
+    print(f"  priepustnosť    {size / 1024 / 1024 / elapsed:8.1f} MB/s")
+    print(f"  peak RSS        {hwm_after / mb:8.1f} MB  (pred exportom {hwm_before / mb:.1f} MB)")
+    print(f"  nárast peaku    {(hwm_after - hwm_before) / mb:8.1f} MB")
+
+
+if __name__ == "__main__":
+    main()